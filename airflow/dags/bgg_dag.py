@@ -0,0 +1,130 @@
+# airflow/dags/bgg_dag.py
+"""Crawls the BoardGameGeek rankings as sharded, individually retried Airflow tasks.
+
+    discover_last_page -> plan_shards -> fetch_shard[*] -> parse_shard[*] -> load_shards
+
+Page 1 is fetched to find how many pages there are, the page range is split into shards, and
+each shard is fetched by its own dynamically mapped task into the raw page store. Each fetch task
+has its own HTMLPages and so its own rate limiter, so fetch shards run one at a time to keep the
+whole crawl to a single rate limit; parse shards run in parallel. Parse tasks
+replay their shard from the store, so a failed parse never refetches, and stage the games for a
+single load task that merges them and writes the db. A failed shard is retried on its own and
+only fetches the pages its last attempt missed.
+
+Every task must see the same raw page store and staging folder, e.g. a shared volume. Configured
+with environment variables:
+    BGG_PIPELINE_SRC: The pipeline's src folder. Defaults to ../../src from this file.
+    BGG_CACHE_DIR: The raw page store. Defaults to the RawPageCache default.
+    BGG_STAGING_DIR: Where parsed shards are staged. Defaults to "data/staging".
+    BGG_SHARD_SIZE: The most pages per fetch shard. Defaults to 50.
+    BGG_FETCH_WORKERS: If set, each fetch shard fetches its pages with this many threads sharing the
+        shard's rate limit. Defaults to one page at a time.
+    BGG_TOP_N: If set, only the pages holding the best N games are crawled, e.g. 1000 for 10 pages, and
+        only the best N games are loaded.
+    BGG_EXPORT_DIR: If set, the rankings are also exported to Parquet under this folder.
+    BGG_PARSE_CACHE_DIR: If set, pages unchanged since an earlier crawl are not parsed again, their
+        games are read from the parse cache in this folder.
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from airflow.sdk import dag, task
+
+SRC_DIR = os.environ.get("BGG_PIPELINE_SRC", str(Path(__file__).resolve().parents[2] / "src"))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+CACHE_DIR = os.environ.get("BGG_CACHE_DIR")
+STAGING_DIR = os.environ.get("BGG_STAGING_DIR", "data/staging")
+SHARD_SIZE = int(os.environ.get("BGG_SHARD_SIZE", "50"))
+FETCH_WORKERS = int(os.environ["BGG_FETCH_WORKERS"]) if os.environ.get("BGG_FETCH_WORKERS") else None
+TOP_N = int(os.environ["BGG_TOP_N"]) if os.environ.get("BGG_TOP_N") else None
+EXPORT_DIR = os.environ.get("BGG_EXPORT_DIR")
+PARSE_CACHE_DIR = os.environ.get("BGG_PARSE_CACHE_DIR")
+
+
+@dag(
+    dag_id="bgg_rankings",
+    schedule="@daily",
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    # Bounds the parse shards running at once. Fetch shards run one at a time, see fetch_shard.
+    max_active_tasks=4,
+    default_args={
+        "retries": 3,
+        "retry_delay": timedelta(minutes=5),
+        "retry_exponential_backoff": True,
+    },
+    tags=["bgg"],
+)
+def bgg_rankings():
+    # The pipeline is imported inside each task so parsing this file stays cheap for the scheduler.
+
+    @task
+    def crawl_date(ds: str | None = None) -> str:
+        """Pins the crawl date once, so every task reads and writes the same crawl in the store."""
+        return ds or date.today().isoformat()
+
+    @task
+    def discover_last_page(crawl_date: str) -> int:
+        from pipeline import discover_last_page
+
+        return discover_last_page(cache_dir=CACHE_DIR, crawl_date=date.fromisoformat(crawl_date), top_n=TOP_N)
+
+    @task
+    def plan_shards(last_page: int) -> list[dict[str, int]]:
+        from pipeline import plan_page_shards
+
+        return [{"start": start, "stop": stop} for start, stop in plan_page_shards(last_page, shard_size=SHARD_SIZE)]
+
+    # Each fetch task rate limits only its own requests, so running one at a time keeps BGG to a
+    # single task's rate limit however many shards there are.
+    @task(retries=5, max_active_tis_per_dag=1)
+    def fetch_shard(shard: dict[str, int], crawl_date: str) -> dict[str, int]:
+        from pipeline import fetch_page_shard
+
+        fetch_page_shard(
+            shard["start"],
+            shard["stop"],
+            cache_dir=CACHE_DIR,
+            crawl_date=date.fromisoformat(crawl_date),
+            fetch_workers=FETCH_WORKERS,
+        )
+        return shard
+
+    @task
+    def parse_shard(shard: dict[str, int], crawl_date: str) -> str:
+        from pipeline import parse_page_shard
+
+        return parse_page_shard(
+            shard["start"],
+            shard["stop"],
+            staging_dir=STAGING_DIR,
+            cache_dir=CACHE_DIR,
+            crawl_date=date.fromisoformat(crawl_date),
+            parse_cache_dir=PARSE_CACHE_DIR,
+            top_n=TOP_N,
+        )
+
+    @task
+    def load_shards(shard_paths: list[str], crawl_date: str) -> int:
+        from pipeline import load_page_shards
+
+        return load_page_shards(
+            sorted(shard_paths),
+            incremental=True,
+            record_history=True,
+            crawl_date=date.fromisoformat(crawl_date),
+            export_dir=EXPORT_DIR,
+        )
+
+    run_date = crawl_date()
+    shards = plan_shards(discover_last_page(run_date))
+    fetched_shards = fetch_shard.partial(crawl_date=run_date).expand(shard=shards)
+    shard_paths = parse_shard.partial(crawl_date=run_date).expand(shard=fetched_shards)
+    load_shards(shard_paths, run_date)
+
+
+bgg_rankings()
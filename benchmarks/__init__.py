@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path, as tests/conftest.py does for the tests.
+src_path = str(Path(__file__).parent.parent / "src")
+if src_path not in sys.path:
+    sys.path.append(src_path)
@@ -0,0 +1,299 @@
+# benchmarks/run_benchmarks.py
+"""Throughput benchmarks for the parse, validate, insert and crawl stages of the pipeline.
+
+Each scenario runs in a fresh process on synthetic BGG browse pages so peak RSS is measured
+per scenario. Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                      # compare against the saved baseline
+    python -m benchmarks.run_benchmarks --save-baseline      # record a new baseline
+    python -m benchmarks.run_benchmarks --sizes 10 100 --scenarios parse crawl
+
+The process exits with status 1 if any throughput drops, or peak RSS grows, by more than
+`--tolerance` compared to the baseline.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import benchmarks # noqa: F401 puts src on the path
+from benchmarks.synthetic_pages import ROWS_PER_PAGE, make_ranking_page
+
+SCENARIOS = ("parse", "validate", "validate_batch", "insert", "crawl", "pipeline")
+DEFAULT_SIZES = (10, 100, 1500)
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "baseline.json"
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _synthetic_rows(pages: int) -> list[tuple[int, int, str]]:
+    return [(rank * 3 + 11, rank, f"Game {rank}") for rank in range(1, pages * ROWS_PER_PAGE + 1)]
+
+
+def _bench_parse(pages: int, backend: str) -> dict:
+    from parsers.html_parsers import extract_game_ids_names_and_ranks
+
+    parse_s = 0.0
+    rows = 0
+    for page in range(1, pages + 1):
+        html_content = make_ranking_page(page, last_page=pages)
+        start = time.perf_counter()
+        game_ids_and_names, _ = extract_game_ids_names_and_ranks(html_content, backend=backend)
+        parse_s += time.perf_counter() - start
+        rows += len(game_ids_and_names)
+    return {"rows": rows, "stages": {"parse": parse_s}}
+
+
+def _bench_validate(pages: int, backend: str) -> dict:
+    from schemas import GameRankCreate
+
+    rows = _synthetic_rows(pages)
+    start = time.perf_counter()
+    for game_id, rank, name in rows:
+        GameRankCreate(id=game_id, rank=rank, name=name)
+    return {"rows": len(rows), "stages": {"validate": time.perf_counter() - start}}
+
+
+def _bench_validate_batch(pages: int, backend: str) -> dict:
+    from schemas import validate_game_rank_columns
+
+    rows = _synthetic_rows(pages)
+    ids, ranks, names = (list(column) for column in zip(*rows))
+    start = time.perf_counter()
+    batch = validate_game_rank_columns(ids, ranks, names)
+    validate_s = time.perf_counter() - start
+    assert len(batch) == len(rows)
+    return {"rows": len(rows), "stages": {"validate": validate_s}}
+
+
+def _insert_rows(rows: list[dict], db_path: Path) -> float:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models import Base, Game
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        start = time.perf_counter()
+        db.bulk_insert_mappings(Game, rows) # type: ignore
+        db.commit()
+        return time.perf_counter() - start
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _bench_insert(pages: int, backend: str) -> dict:
+    rows = [{"id": game_id, "rank": rank, "name": name} for game_id, rank, name in _synthetic_rows(pages)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        insert_s = _insert_rows(rows, Path(tmp_dir) / "bench.db")
+    return {"rows": len(rows), "stages": {"insert": insert_s}}
+
+
+class _MockedBGG:
+    """An httpx.MockTransport handler rendering synthetic pages and keeping track of the time spent doing so."""
+
+    def __init__(self, last_page: int, distinct_pages: bool) -> None:
+        self.last_page = last_page
+        self.distinct_pages = distinct_pages
+        self.render_s = 0.0
+        self.bytes_served = 0
+        self._shared_page: str | None = None
+
+    def __call__(self, request):
+        import httpx
+
+        start = time.perf_counter()
+        page = int(request.url.path.rsplit("/", 1)[-1])
+        if self.distinct_pages:
+            html_content = make_ranking_page(page, last_page=self.last_page)
+        else:
+            if self._shared_page is None:
+                self._shared_page = make_ranking_page(1, last_page=self.last_page)
+            html_content = self._shared_page
+        response = httpx.Response(200, text=html_content)
+        self.render_s += time.perf_counter() - start
+        self.bytes_served += len(html_content)
+        return response
+
+
+def _bench_crawl(pages: int, backend: str) -> dict:
+    import httpx
+    from sources.html_pages import HTMLPages
+
+    mocked_bgg = _MockedBGG(last_page=pages, distinct_pages=False)
+    with HTMLPages(delay_s=0.0, transport=httpx.MockTransport(mocked_bgg)) as html_pages:
+        start = time.perf_counter()
+        fetched = html_pages.fetch_ranking_pages(start=1, stop=pages)
+        fetch_s = time.perf_counter() - start - mocked_bgg.render_s
+    assert all(page is not None for page in fetched)
+    return {"rows": 0, "bytes": mocked_bgg.bytes_served, "stages": {"fetch": fetch_s}}
+
+
+def _bench_pipeline(pages: int, backend: str) -> dict:
+    import httpx
+    from parsers.html_parsers import extract_game_ids_names_and_ranks
+    from schemas import validate_game_rank_columns
+    from sources.html_pages import HTMLPages
+
+    mocked_bgg = _MockedBGG(last_page=pages, distinct_pages=True)
+    stages = {"fetch": 0.0, "parse": 0.0, "validate": 0.0, "insert": 0.0}
+    mappings = []
+    with HTMLPages(delay_s=0.0, transport=httpx.MockTransport(mocked_bgg)) as html_pages:
+        for page in range(1, pages + 1):
+            render_before = mocked_bgg.render_s
+            start = time.perf_counter()
+            html_content = html_pages.fetch_ranking_page(page=page)
+            stages["fetch"] += time.perf_counter() - start - (mocked_bgg.render_s - render_before)
+            assert html_content is not None
+
+            start = time.perf_counter()
+            game_ids_and_names, game_ranks = extract_game_ids_names_and_ranks(html_content, backend=backend)
+            stages["parse"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = validate_game_rank_columns(
+                [game_id for game_id, _ in game_ids_and_names], game_ranks, [name for _, name in game_ids_and_names]
+            )
+            mappings.extend({"id": game.id, "name": game.name, "rank": game.rank} for game in batch)
+            stages["validate"] += time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stages["insert"] = _insert_rows(mappings, Path(tmp_dir) / "bench.db")
+    return {"rows": len(mappings), "bytes": mocked_bgg.bytes_served, "stages": stages}
+
+
+_BENCHMARKS = {
+    "parse": _bench_parse,
+    "validate": _bench_validate,
+    "validate_batch": _bench_validate_batch,
+    "insert": _bench_insert,
+    "crawl": _bench_crawl,
+    "pipeline": _bench_pipeline,
+}
+
+
+def run_scenario(scenario: str, pages: int, backend: str) -> dict:
+    """Runs one scenario and summarises it. Meant to be called in a fresh process.
+
+    Args:
+        scenario (str): One of SCENARIOS.
+        pages (int): The number of synthetic pages to push through the scenario.
+        backend (str): The html parser backend, used by the parse and pipeline scenarios.
+
+    Returns:
+        dict: The total and per-stage seconds, pages/s, rows/s and peak RSS of the run.
+    """
+    result = _BENCHMARKS[scenario](pages, backend)
+    seconds = sum(result["stages"].values())
+    summary = {
+        "pages": pages,
+        "rows": result["rows"],
+        "seconds": round(seconds, 4),
+        "pages_per_s": round(pages / seconds, 2) if seconds else None,
+        "rows_per_s": round(result["rows"] / seconds, 2) if seconds and result["rows"] else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "stages": {stage: round(stage_s, 4) for stage, stage_s in result["stages"].items()},
+    }
+    if "bytes" in result:
+        summary["mb_per_s"] = round(result["bytes"] / (1024 * 1024) / seconds, 2) if seconds else None
+    return summary
+
+
+def result_key(scenario: str, pages: int, backend: str) -> str:
+    if scenario in ("parse", "pipeline"):
+        return f"{scenario}[{backend}]/{pages}"
+    return f"{scenario}/{pages}"
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lists every result that regressed by more than `tolerance` against the baseline.
+
+    Args:
+        results (dict): The results of this run, keyed by `result_key`.
+        baseline (dict): The baseline results, keyed the same way.
+        tolerance (float): The allowed fractional slowdown or memory growth, e.g. 0.25.
+
+    Returns:
+        list[str]: A description of each regression. Empty if there were none.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]
+        for metric in ("pages_per_s", "rows_per_s"):
+            if result.get(metric) and expected.get(metric) and result[metric] < expected[metric] * (1 - tolerance):
+                regressions.append(f"{key}: {metric} fell from {expected[metric]} to {result[metric]}")
+        if result["peak_rss_mb"] > expected["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak_rss_mb rose from {expected['peak_rss_mb']} to {result['peak_rss_mb']}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the bgg pipeline stages on synthetic pages.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--backend", default="bs4", help="The html parser backend to benchmark.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--output", type=Path, help="Also write this run's results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    # A fresh spawned process per scenario, so each peak RSS only reflects that scenario.
+    context = multiprocessing.get_context("spawn")
+    for scenario in args.scenarios:
+        for pages in args.sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                summary = executor.submit(run_scenario, scenario, pages, args.backend).result()
+            key = result_key(scenario, pages, args.backend)
+            results[key] = summary
+            print(
+                f"{key:<28} {summary['seconds']:>9.3f} s  {summary['pages_per_s'] or 0:>10.1f} pages/s  "
+                f"{summary['rows_per_s'] or 0:>12.1f} rows/s  {summary['peak_rss_mb']:>8.1f} MB peak  "
+                f"{summary['stages']}"
+            )
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save_baseline:
+        baseline_results = {}
+        if args.baseline.exists():
+            baseline_results = json.loads(args.baseline.read_text())["results"]
+        baseline_results.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({**report, "results": baseline_results}, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline to record one.")
+        return 0
+
+    regressions = compare_to_baseline(results, json.loads(args.baseline.read_text())["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
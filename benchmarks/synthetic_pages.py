@@ -0,0 +1,120 @@
+# benchmarks/synthetic_pages.py
+import random
+
+ROWS_PER_PAGE = 100
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>Browse Board Games | BoardGameGeek</title>
+{scripts}
+{styles}
+</head>
+<body class="geek">
+<div id="nav">
+{nav_links}
+</div>
+<div id="maincontent">
+    <div class="infobox">
+        <a href="/browse/boardgame/page/{previous_page}" title="previous page">&laquo; Prev</a>
+        <a href="/browse/boardgame/page/{next_page}" title="next page">Next &raquo;</a>
+        <a href="/browse/boardgame/page/{last_page}" title="last page">[{last_page}]</a>
+    </div>
+    <table class="collection_table" id="collectionitems">
+        <tr>
+            <th class="collection_rank">Board Game Rank</th>
+            <th class="collection_thumbnail">Thumbnail</th>
+            <th class="collection_objectname">Title</th>
+            <th class="collection_bggrating">Geek Rating</th>
+            <th class="collection_bggrating">Avg Rating</th>
+            <th class="collection_bggrating">Num Voters</th>
+            <th class="collection_shop">Shop</th>
+        </tr>
+"""
+
+_ROW = """        <tr id="row_">
+            <td class="collection_rank">
+                <a name="{rank}"></a>
+                {rank}
+            </td>
+            <td class="collection_thumbnail">
+                <a href="/boardgame/{game_id}/{slug}"><img alt="Board Game: {name}" src="https://cf.geekdo-images.com/{image}__micro/img/{image}.jpg"></a>
+            </td>
+            <td class="collection_objectname">
+                <div id="results_objectname{rank}" style="z-index:{z_index};">
+                    <a href="/boardgame/{game_id}/{slug}" class="primary">{name}</a>
+                    <span class="smallerfont dull">({year})</span>
+                </div>
+                <p class="smallefont dull">{description}</p>
+            </td>
+            <td class="collection_bggrating">{geek_rating:.3f}</td>
+            <td class="collection_bggrating">{average_rating:.2f}</td>
+            <td class="collection_bggrating">{num_voters}</td>
+            <td class="collection_shop">
+                <a href="/boardgame/{game_id}/{slug}/marketplace" class="ulprice">Marketplace</a>
+            </td>
+        </tr>
+"""
+
+_TAIL = """    </table>
+</div>
+<div id="footer">
+{footer_links}
+</div>
+</body>
+</html>
+"""
+
+_WORDS = (
+    "build", "trade", "engine", "cards", "dice", "worker", "placement", "empire", "explore",
+    "drafting", "tiles", "route", "network", "auction", "cooperative", "legacy", "campaign",
+    "resources", "victory", "points", "the", "and", "of", "in", "your", "to", "a", "with",
+)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_ranking_page(page: int, last_page: int, rows_per_page: int = ROWS_PER_PAGE, seed: int = 0) -> str:
+    """Builds a synthetic BGG browse page with roughly the size and shape of a real one.
+
+    Args:
+        page (int): The page number. Ranks on the page follow on from the previous page.
+        last_page (int): The number shown in the "last page" link.
+        rows_per_page (int, optional): The number of games on the page. Defaults to 100.
+        seed (int, optional): Seeds the random names and descriptions. Defaults to 0.
+
+    Returns:
+        str: The html of the page.
+    """
+    rng = random.Random(seed * 1_000_003 + page)
+    parts = [_HEAD.format(
+        scripts="\n".join(f"    <script>window.geek{i} = {{config: '{'x' * 400}'}};</script>" for i in range(30)),
+        styles="\n".join(f"    <style>.c{i} {{ margin: {i}px; color: #{i:06x}; }}</style>" for i in range(60)),
+        nav_links="\n".join(f'    <a href="/section/{i}" class="nav-link">{_sentence(rng, 2)}</a>' for i in range(250)),
+        previous_page=max(1, page - 1),
+        next_page=min(last_page, page + 1),
+        last_page=last_page,
+    )]
+    for row in range(1, rows_per_page + 1):
+        rank = (page - 1) * rows_per_page + row
+        name = _sentence(rng, rng.randint(1, 4))[:-1] + (" &amp; Friends" if rank % 17 == 0 else "")
+        parts.append(_ROW.format(
+            rank=rank,
+            game_id=rank * 3 + 11, # unique, so the pages can be loaded into the Games table
+            slug=name.lower().replace(" ", "-").replace("&amp;", "and"),
+            name=name,
+            image=f"{rng.getrandbits(64):016x}",
+            z_index=1000 - row,
+            year=rng.randint(1960, 2025),
+            description=_sentence(rng, rng.randint(10, 30)),
+            geek_rating=rng.uniform(5.5, 8.5),
+            average_rating=rng.uniform(6.0, 9.0),
+            num_voters=rng.randint(100, 120_000),
+        ))
+    parts.append(_TAIL.format(
+        footer_links="\n".join(f'    <a href="/footer/{i}">{_sentence(rng, 2)}</a>' for i in range(80)),
+    ))
+    return "".join(parts)
@@ -0,0 +1,230 @@
+# src/cli.py
+"""The bgg-pipeline command line.
+
+    bgg-pipeline crawl    Fetch the ranking pages into the raw page store.
+    bgg-pipeline parse    Parse stored pages into staged shards.
+    bgg-pipeline load     Load the staged shards into the db.
+    bgg-pipeline export   Export the loaded rankings to Parquet.
+    bgg-pipeline run      Run the whole pipeline in one process.
+
+Only the standard library is imported up front. Each subcommand imports the pipeline when it
+runs, and the db engine, HTTP client and logging are created on first use, so `--help` and
+argument errors return in milliseconds.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+SRC_DIR = str(Path(__file__).resolve().parent)
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+DEFAULT_STAGING_DIR = "data/staging"
+# The same as parsers.backends.PARSER_BACKENDS, repeated so building the parser imports nothing.
+PARSER_BACKENDS = ("bs4", "strainer", "stream", "lxml")
+
+
+def _crawl(args: argparse.Namespace) -> int:
+    from pipeline import discover_last_page, fetch_page_shard, plan_page_shards
+
+    last_page = args.stop or discover_last_page(cache_dir=args.cache_dir, crawl_date=args.crawl_date, top_n=args.top_n)
+    failed_shards = []
+    for start, stop in plan_page_shards(last_page, shard_size=args.shard_size):
+        if stop < args.start:
+            continue
+        try:
+            fetch_page_shard(
+                max(start, args.start),
+                stop,
+                cache_dir=args.cache_dir,
+                crawl_date=args.crawl_date,
+                fetch_workers=args.workers,
+            )
+        except RuntimeError as e:
+            failed_shards.append(str(e))
+    for error in failed_shards:
+        print(error, file=sys.stderr)
+    return 1 if failed_shards else 0
+
+
+def _parse(args: argparse.Namespace) -> int:
+    from pipeline import discover_last_page, parse_page_shard, plan_page_shards
+    from sources.html_pages import HTMLPages
+    from sources.page_cache import RawPageCache
+
+    last_page = args.stop
+    if last_page is None:
+        cache = RawPageCache(root=args.cache_dir) if args.cache_dir is not None else RawPageCache()
+        last_page = discover_last_page(html_pages=HTMLPages(cache=cache, crawl_date=args.crawl_date, replay=True))
+    for start, stop in plan_page_shards(last_page, shard_size=args.shard_size):
+        if stop < args.start:
+            continue
+        print(parse_page_shard(
+            max(start, args.start),
+            stop,
+            staging_dir=args.staging_dir,
+            cache_dir=args.cache_dir,
+            crawl_date=args.crawl_date,
+            parser_backend=args.parser_backend,
+            parse_cache_dir=args.parse_cache_dir,
+            top_n=args.top_n,
+        ))
+    return 0
+
+
+def _load(args: argparse.Namespace) -> int:
+    from pipeline import load_page_shards
+
+    shard_paths = sorted(str(path) for path in (Path(args.staging_dir) / args.crawl_date.isoformat()).glob("*.rankings"))
+    if not shard_paths:
+        print(f"No staged shards for {args.crawl_date} in {args.staging_dir}", file=sys.stderr)
+        return 1
+    load_page_shards(
+        shard_paths,
+        incremental=not args.insert,
+        record_history=args.history,
+        crawl_date=args.crawl_date,
+        batch_size=args.batch_size,
+    )
+    return 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    from pipeline import export_loaded_rankings
+
+    export_loaded_rankings(args.export_dir, crawl_date=args.crawl_date)
+    return 0
+
+
+def _run(args: argparse.Namespace) -> int:
+    from pipeline import main_pipeline
+
+    main_pipeline(
+        streaming=args.streaming,
+        max_concurrency=args.concurrency,
+        requests_per_s=args.rps,
+        max_requests_per_s=args.max_rps,
+        burst=args.burst,
+        batch_size=args.batch_size,
+        parser_backend=args.parser_backend,
+        cache_dir=args.cache_dir,
+        replay=args.replay,
+        crawl_date=args.crawl_date,
+        incremental=not args.insert,
+        record_history=args.history,
+        export_dir=args.export_dir,
+        checkpoint_path=args.checkpoint,
+        refresh_details=args.refresh_details,
+        xml_api_token=os.environ.get("BGG_API_TOKEN"),
+        metrics_dir=args.metrics_dir,
+        parse_cache_dir=args.parse_cache_dir,
+        top_n=args.top_n,
+        max_rank=args.max_rank,
+        stop_on_unranked_page=args.stop_on_unranked,
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser of every subcommand."""
+    parser = argparse.ArgumentParser(prog="bgg-pipeline", description="Crawl the BoardGameGeek rankings into a db.")
+    parser.add_argument("--database-url", help="The db to use. Defaults to BGG_DATABASE_URL or the local SQLite file.")
+    parser.add_argument("--log-file", default="app.log", help="The file to log to as well as the console. Defaults to app.log.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log at DEBUG level.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_crawl_date(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("--crawl-date", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD. Defaults to today.")
+
+    def add_page_range(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("--start", type=int, default=1, help="The first page. Defaults to 1.")
+        subparser.add_argument("--stop", type=int, help="The last page. Defaults to the last ranking page.")
+        subparser.add_argument("--shard-size", type=int, default=50, help="Pages per shard. Defaults to 50.")
+        subparser.add_argument("--cache-dir", help="The raw page store. Defaults to data/raw_html_cache.")
+
+    def add_load_options(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("--insert", action="store_true", help="Bulk insert instead of upserting. Fails on existing ids.")
+        subparser.add_argument("--history", action="store_true", help="Also record the ranks in the rank history.")
+        subparser.add_argument("--batch-size", type=int, default=1000, help="Rows per commit. Defaults to 1000.")
+
+    crawl = subparsers.add_parser("crawl", help="Fetch the ranking pages into the raw page store.")
+    add_crawl_date(crawl)
+    add_page_range(crawl)
+    crawl.add_argument("--top-n", type=int, help="Only fetch the pages holding the best N games. Ignored with --stop.")
+    crawl.add_argument("--workers", type=int, help="Fetch with this many threads sharing one rate limit. Defaults to one page at a time.")
+    crawl.set_defaults(handler=_crawl)
+
+    parse = subparsers.add_parser("parse", help="Parse stored pages into staged shards.")
+    add_crawl_date(parse)
+    add_page_range(parse)
+    parse.add_argument("--staging-dir", default=DEFAULT_STAGING_DIR, help=f"Defaults to {DEFAULT_STAGING_DIR}.")
+    parse.add_argument("--parser-backend", default="bs4", choices=PARSER_BACKENDS)
+    parse.add_argument("--parse-cache-dir", help="Reuse the games parsed from unchanged pages, cached in this folder.")
+    parse.add_argument("--top-n", type=int, help="Leave out games ranked worse than N.")
+    parse.set_defaults(handler=_parse)
+
+    load = subparsers.add_parser("load", help="Load the staged shards into the db.")
+    add_crawl_date(load)
+    add_load_options(load)
+    load.add_argument("--staging-dir", default=DEFAULT_STAGING_DIR, help=f"Defaults to {DEFAULT_STAGING_DIR}.")
+    load.set_defaults(handler=_load)
+
+    export = subparsers.add_parser("export", help="Export the loaded rankings to Parquet.")
+    add_crawl_date(export)
+    export.add_argument("--export-dir", default="data/parquet", help="Defaults to data/parquet.")
+    export.set_defaults(handler=_export)
+
+    run = subparsers.add_parser("run", help="Run the whole pipeline in one process.")
+    add_crawl_date(run)
+    add_load_options(run)
+    # The streaming pipeline fetches one page at a time, so it cannot be combined with --concurrency.
+    fetch_mode = run.add_mutually_exclusive_group()
+    fetch_mode.add_argument("--streaming", action="store_true", help="Stream pages into the db with periodic commits.")
+    fetch_mode.add_argument(
+        "--concurrency",
+        type=int,
+        help="Fetch up to N pages at once, within the --rps budget. Not with --streaming. Defaults to one at a time.",
+    )
+    run.add_argument("--rps", type=float, default=0.5, help="With --concurrency, requests per second across all of them. Defaults to 0.5.")
+    run.add_argument("--max-rps", type=float, help="With --concurrency, the most requests per second to speed up to. Defaults to --rps.")
+    run.add_argument("--burst", type=int, default=1, help="With --concurrency, requests that may go out back to back. Defaults to 1.")
+    run.add_argument("--parser-backend", default="bs4", choices=PARSER_BACKENDS)
+    run.add_argument("--cache-dir", help="Cache raw pages in this folder.")
+    run.add_argument("--replay", action="store_true", help="Re-parse the cached pages without the network.")
+    run.add_argument("--checkpoint", help="Checkpoint the crawl to this manifest and resume it.")
+    run.add_argument("--export-dir", help="Also export the rankings to Parquet under this folder.")
+    run.add_argument("--refresh-details", action="store_true", help="Fetch changed games' details from the XML API.")
+    run.add_argument("--metrics-dir", help="Write the run's metrics here.")
+    run.add_argument("--top-n", type=int, help="Only crawl the best N games, fetching just the pages that hold them.")
+    run.add_argument("--max-rank", type=int, help="Skip games ranked worse than this and stop after the page that reaches it.")
+    run.add_argument("--stop-on-unranked", action="store_true", help="Stop after the first page holding unranked games.")
+    run.add_argument("--parse-cache-dir", help="Reuse the games parsed from unchanged pages, cached in this folder.")
+    run.set_defaults(handler=_run)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the bgg-pipeline command line.
+
+    Args:
+        argv (list[str] | None, optional): The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.database_url is not None:
+        # Read by the engine when it is first created.
+        os.environ["BGG_DATABASE_URL"] = args.database_url
+
+    import logging
+    from utils.logging_config import setup_logging
+
+    setup_logging(log_file=args.log_file, level=logging.DEBUG if args.verbose else logging.INFO)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
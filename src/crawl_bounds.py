@@ -0,0 +1,123 @@
+# src/crawl_bounds.py
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from schemas import GameRank
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CrawlBounds:
+    """Where a ranking crawl may stop before the last page BGG lists.
+
+    Attributes:
+        top_n (int | None): Only crawl the best `top_n` games. The pages to fetch are worked out up
+            front from how many games page 1 holds, e.g. 10 pages for the top 1,000.
+        max_rank (int | None): Drop games ranked worse than this, and stop after the page that
+            reaches it. Unlike `top_n` nothing is planned up front, so it holds if pages change size.
+        stop_on_unranked_page (bool): Stop after the first page holding unranked games, i.e. where the
+            tail of unranked games at the end of the rankings begins. The ranked games on it are kept.
+    """
+    top_n: int | None = None
+    max_rank: int | None = None
+    stop_on_unranked_page: bool = False
+
+    def __post_init__(self) -> None:
+        for name in ("top_n", "max_rank"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1")
+
+    @property
+    def rank_limit(self) -> int | None:
+        """The worst rank to keep, or None to keep every rank."""
+        limits = [limit for limit in (self.top_n, self.max_rank) if limit is not None]
+        return min(limits) if limits else None
+
+    def last_page(self, page_size: int, last_page: int) -> int:
+        """Works out the last page to fetch.
+
+        Args:
+            page_size (int): How many games a full page holds, e.g. the games on page 1.
+            last_page (int): The last page BGG lists.
+
+        Returns:
+            int: The page holding the `top_n`th game, or `last_page` if it is sooner or there is no `top_n`.
+        """
+        if self.top_n is None or page_size < 1:
+            return last_page
+        return min(last_page, math.ceil(self.top_n / page_size))
+
+
+@dataclass
+class RankDiscontinuity:
+    """A break in the ranks of a crawl, e.g. from a game moving between pages mid-crawl.
+
+    Attributes:
+        page_number (int): The page the break was found on.
+        expected_rank (int): The rank that should have come next.
+        found_rank (int): The rank that came instead. Lower than expected means ranks repeat, higher
+            means ranks are missing.
+    """
+    page_number: int
+    expected_rank: int
+    found_rank: int
+
+
+@dataclass
+class BoundedRankingCrawl:
+    """Follows a crawl page by page, trimming it to its bounds and checking its ranks are contiguous.
+
+    Feed it each page that parsed, in page order, with `accept_page` and stop fetching once
+    `finished` is True. A page that failed to parse says nothing about where the ranked games
+    end, so it is not fed in. A page that arrives after a later page, e.g. one a ResumableCrawl
+    retried, is trimmed like any other but its ranks are not checked, as the break it fills was
+    already reported.
+
+    Attributes:
+        bounds (CrawlBounds): The crawl's bounds.
+        last_rank (int | None): The last rank accepted.
+        last_page (int | None): The latest page accepted.
+        discontinuities (list[RankDiscontinuity]): Every break in the ranks so far.
+        finished (bool): Whether the crawl has reached its bounds.
+    """
+    bounds: CrawlBounds = field(default_factory=CrawlBounds)
+    last_rank: int | None = None
+    last_page: int | None = None
+    discontinuities: list[RankDiscontinuity] = field(default_factory=list)
+    finished: bool = False
+
+    def accept_page(self, page_number: int, games: Sequence[GameRank], unranked: int = 0) -> list[GameRank]:
+        """Checks a page's ranks follow on from the previous page's and trims it to the rank limit.
+
+        Args:
+            page_number (int): The page the games came from.
+            games (Sequence[GameRank]): The page's valid ranked games, in page order.
+            unranked (int, optional): How many games on the page have no rank. Defaults to 0.
+
+        Returns:
+            list[GameRank]: The games within the rank limit.
+        """
+        if unranked and self.bounds.stop_on_unranked_page:
+            logger.info(f"PAGE {page_number} HAS {unranked} UNRANKED GAMES, STOPPING THE CRAWL")
+            self.finished = True
+        if self.last_page is not None and page_number < self.last_page:
+            logger.info(f"PAGE {page_number} ARRIVED AFTER PAGE {self.last_page}, NOT CHECKING ITS RANKS")
+        else:
+            self.last_page = page_number
+            for game in games:
+                if self.last_rank is not None and game.rank != self.last_rank + 1:
+                    self.discontinuities.append(RankDiscontinuity(page_number, self.last_rank + 1, game.rank))
+                    logger.warning(f"PAGE {page_number} RANKS ARE NOT CONTIGUOUS: EXPECTED RANK {self.last_rank + 1}, FOUND {game.rank}")
+                self.last_rank = game.rank
+
+        limit = self.bounds.rank_limit
+        if limit is None:
+            return list(games)
+        kept = [game for game in games if game.rank <= limit]
+        if games and games[-1].rank >= limit:
+            logger.info(f"PAGE {page_number} REACHED RANK {limit}, STOPPING THE CRAWL")
+            self.finished = True
+        return kept
@@ -1,14 +1,202 @@
 #src/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from models import Base
 
-# Create the SQLite engine
-DATABASE_URL = "sqlite:///./data/bgg_data.db"
-engine = create_engine(DATABASE_URL)
+# The database URL can be overridden with the BGG_DATABASE_URL environment variable.
+DEFAULT_DATABASE_URL = "sqlite:///./data/bgg_data.db"
+DATABASE_URL = os.environ.get("BGG_DATABASE_URL", DEFAULT_DATABASE_URL)
 
-# Create a configured Session class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create all tables defined in your models.
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+@dataclass(frozen=True)
+class StorageProfile:
+    """The SQLite PRAGMAs applied to every new connection.
+
+    Attributes:
+        journal_mode (str): WAL lets readers (e.g. Airflow tasks) keep reading while a load writes.
+        synchronous (str): NORMAL only syncs at WAL checkpoints, which is still safe in WAL mode.
+        cache_size_kib (int): The page cache size per connection, in KiB.
+        mmap_size_bytes (int): How much of the file to memory-map for reads. 0 disables it.
+        temp_store (str): Where temporary tables and indexes live, MEMORY or DEFAULT.
+        busy_timeout_ms (int): How long to wait on a locked database before failing.
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 64 * 1024
+    mmap_size_bytes: int = 256 * 1024**2
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            # A negative cache_size is in KiB rather than pages.
+            f"PRAGMA cache_size=-{self.cache_size_kib}",
+            f"PRAGMA mmap_size={self.mmap_size_bytes}",
+            f"PRAGMA temp_store={self.temp_store}",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+        ]
+
+
+STORAGE_PROFILES = {
+    # Tuned for the nightly loads with concurrent readers.
+    "default": StorageProfile(),
+    # For one-off large loads where losing the load on a power cut is acceptable.
+    "bulk_load": StorageProfile(synchronous="OFF", cache_size_kib=256 * 1024),
+    # SQLite's own defaults: rollback journal, full syncs, a 2 MiB cache.
+    "legacy": StorageProfile(
+        journal_mode="DELETE",
+        synchronous="FULL",
+        cache_size_kib=2000,
+        mmap_size_bytes=0,
+        temp_store="DEFAULT",
+        busy_timeout_ms=0,
+    ),
+}
+
+
+def create_db_engine(url: str | None = None, profile: StorageProfile | str | None = None) -> Engine:
+    """Creates an engine, applying a storage profile to every SQLite connection it opens.
+
+    Args:
+        url (str | None, optional): The database URL. Defaults to DATABASE_URL.
+        profile (StorageProfile | str | None, optional): A StorageProfile or the name of one in
+            STORAGE_PROFILES. Defaults to the BGG_STORAGE_PROFILE environment variable, or "default".
+
+    Returns:
+        engine (Engine): The engine. No connection is made until it is first used.
+    """
+    url = url or DATABASE_URL
+    if profile is None:
+        profile = os.environ.get("BGG_STORAGE_PROFILE", "default")
+    if isinstance(profile, str):
+        profile = STORAGE_PROFILES[profile]
+
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        pragmas = profile.pragmas()
+
+        @event.listens_for(engine, "connect")
+        def apply_storage_profile(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return engine
+
+
+def init_db(engine: Engine) -> None:
+    """Creates the database file's folder, if needed, and all tables defined in the models.
+
+    Args:
+        engine (Engine): The engine to create the tables with.
+    """
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+    Base.metadata.create_all(bind=engine)
+
+
+def _bulk_load_pragmas() -> list[str]:
+    profile = STORAGE_PROFILES["bulk_load"]
+    # The journal mode is left alone, as switching out of WAL would block readers and persists in the file.
+    return [f"PRAGMA synchronous={profile.synchronous}", f"PRAGMA cache_size=-{profile.cache_size_kib}"]
+
+
+def _enter_bulk_load(dbapi_connection, connection_record, connection_proxy) -> None:
+    cursor = dbapi_connection.cursor()
+    if "bulk_load_restore" not in connection_record.info:
+        synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+        cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+        connection_record.info["bulk_load_restore"] = [f"PRAGMA synchronous={synchronous}", f"PRAGMA cache_size={cache_size}"]
+    for pragma in _bulk_load_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _exit_bulk_load(dbapi_connection, connection_record) -> None:
+    restore = connection_record.info.pop("bulk_load_restore", None)
+    if restore is None or dbapi_connection is None:
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in restore:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+@contextmanager
+def bulk_load_mode(engine: Engine) -> Iterator[None]:
+    """Speeds up a large load by deferring index upkeep and, on SQLite, syncs to disk.
+
+    The secondary indexes, e.g. RankHistory's, are dropped for the duration of the load and rebuilt
+    afterwards, as building an index once over the loaded rows is much cheaper than updating it on
+    every insert. Primary keys are untouched, so a load of only the Games table gains nothing there.
+    On SQLite, every connection used during the load also runs with the "bulk_load" profile's
+    synchronous and cache size, and gets its own settings back when it is returned to the pool.
+    A power cut mid-load can then lose the load, but not corrupt earlier data in WAL mode.
+
+    Args:
+        engine (Engine): The engine the load runs against.
+    """
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+    for index in indexes:
+        index.drop(bind=engine, checkfirst=True)
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite:
+        event.listen(engine, "checkout", _enter_bulk_load)
+        event.listen(engine, "checkin", _exit_bulk_load)
+    try:
+        yield
+    finally:
+        if sqlite:
+            event.remove(engine, "checkout", _enter_bulk_load)
+            event.remove(engine, "checkin", _exit_bulk_load)
+        for index in indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+_engine: Engine | None = None
+_session_factory: sessionmaker[Session] | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Returns the process's engine, creating it on first use.
+
+    Nothing connects to the database, or reads BGG_DATABASE_URL and BGG_STORAGE_PROFILE, until
+    the first call, so importing this module has no side effects.
+
+    Returns:
+        engine (Engine): The engine for DATABASE_URL.
+    """
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine(os.environ.get("BGG_DATABASE_URL", DATABASE_URL))
+            _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+        return _engine
+
+
+def get_session() -> Session:
+    """Opens a new session on the process's engine."""
+    get_engine()
+    return _session_factory()
+
+
+def __getattr__(name: str):
+    # `engine` and `SessionLocal` used to be created at import time. They are still importable,
+    # but are only created when first looked up.
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        get_engine()
+        return _session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,271 @@
+# src/exports/parquet_export.py
+import os
+from collections.abc import Iterable
+from datetime import date
+from pathlib import Path
+from ranking_batch import RankingBatch
+from schemas import GameStatistics
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_EXPORT_ROOT = "data/parquet"
+RANKINGS_DATASET = "rankings"
+STATISTICS_DATASET = "statistics"
+PARTITION_COLUMN = "crawl_date"
+
+
+def _pyarrow():
+    # Imported when an export runs, so importing this module stays cheap for the stages that never export.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    return pa, pq
+
+
+def partition_path(root: str | Path, dataset: str, crawl_date: date) -> Path:
+    """The folder holding one crawl of a dataset, laid out as a hive partition.
+
+    Args:
+        root (str | Path): The export root.
+        dataset (str): The dataset, e.g. RANKINGS_DATASET.
+        crawl_date (date): The crawl.
+
+    Returns:
+        Path: <root>/<dataset>/crawl_date=<YYYY-MM-DD>
+    """
+    return Path(root) / dataset / f"{PARTITION_COLUMN}={crawl_date.isoformat()}"
+
+
+class ParquetPartitionWriter:
+    """Writes one crawl of a dataset to a single Parquet file in its crawl date partition.
+
+    Rows are buffered into row groups of `row_group_size`, so every row group carries min/max
+    statistics that readers use to skip it. The file is written under a temporary name and only
+    replaces the partition's file on a clean close, so re-exporting a crawl overwrites it and a
+    failed export leaves the previous one in place. Use as a context manager.
+    """
+
+    def __init__(
+            self,
+            schema,
+            root: str | Path,
+            dataset: str,
+            crawl_date: date,
+            dictionary_columns: list[str] | None = None,
+            row_group_size: int = 100_000,
+            compression: str = "zstd",
+            ) -> None:
+        """Initialises the ParquetPartitionWriter.
+
+        Args:
+            schema (pyarrow.Schema): The schema of the rows.
+            root (str | Path): The export root.
+            dataset (str): The dataset, e.g. RANKINGS_DATASET.
+            crawl_date (date): The crawl the rows belong to.
+            dictionary_columns (list[str] | None, optional): The columns to dictionary-encode. Defaults to None.
+            row_group_size (int, optional): The most rows per row group. Defaults to 100,000.
+            compression (str, optional): The Parquet compression codec. Defaults to "zstd".
+        """
+        self.schema = schema
+        self.path = partition_path(root, dataset, crawl_date) / "part-0.parquet"
+        self.dictionary_columns = dictionary_columns or []
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.rows_written = 0
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._pending = []
+        self._pending_rows = 0
+        self._writer = None
+
+    def __enter__(self) -> "ParquetPartitionWriter":
+        _, pq = _pyarrow()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(
+            self._tmp_path,
+            self.schema,
+            compression=self.compression,
+            use_dictionary=self.dictionary_columns,
+            write_statistics=True,
+        )
+        return self
+
+    def write_table(self, table) -> None:
+        """Buffers a pyarrow Table of rows, writing out every full row group."""
+        if self._writer is None:
+            raise RuntimeError("ParquetPartitionWriter must be used as a context manager")
+        self._pending.append(table.select(self.schema.names).cast(self.schema))
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        pa, _ = _pyarrow()
+        if not self._pending_rows:
+            return
+        table = pa.concat_tables(self._pending)
+        # Only the last row group of the file may be short.
+        rows = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_size
+        self._writer.write_table(table.slice(0, rows), row_group_size=self.row_group_size)
+        self.rows_written += rows
+        self._pending = [table.slice(rows)] if rows < table.num_rows else []
+        self._pending_rows = table.num_rows - rows
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        completed = False
+        try:
+            if exc_type is None:
+                self._flush(final=True)
+                completed = True
+        finally:
+            self._writer.close()
+            self._writer = None
+            if completed:
+                os.replace(self._tmp_path, self.path)
+            else:
+                self._tmp_path.unlink(missing_ok=True)
+
+
+class RankingsParquetWriter(ParquetPartitionWriter):
+    """Writes a crawl's rankings, with the id, rank and name of every game, to Parquet.
+
+    Names are dictionary-encoded. Use as a context manager and feed it RankingBatches.
+    """
+
+    def __init__(
+            self,
+            crawl_date: date,
+            root: str | Path = DEFAULT_EXPORT_ROOT,
+            row_group_size: int = 100_000,
+            compression: str = "zstd",
+            ) -> None:
+        """Initialises the RankingsParquetWriter.
+
+        Args:
+            crawl_date (date): The crawl the rankings belong to.
+            root (str | Path, optional): The export root. Defaults to "data/parquet".
+            row_group_size (int, optional): The most rows per row group. Defaults to 100,000.
+            compression (str, optional): The Parquet compression codec. Defaults to "zstd".
+        """
+        pa, _ = _pyarrow()
+        schema = pa.schema([("id", pa.int64()), ("rank", pa.int64()), ("name", pa.string())])
+        super().__init__(
+            schema,
+            root=root,
+            dataset=RANKINGS_DATASET,
+            crawl_date=crawl_date,
+            dictionary_columns=["name"],
+            row_group_size=row_group_size,
+            compression=compression,
+        )
+
+    def write_batch(self, batch: RankingBatch) -> None:
+        """Buffers a batch of rankings."""
+        if len(batch):
+            self.write_table(batch.to_arrow())
+
+
+def export_rankings(
+        batch: RankingBatch,
+        crawl_date: date,
+        root: str | Path = DEFAULT_EXPORT_ROOT,
+        row_group_size: int = 100_000,
+        ) -> Path:
+    """Exports a crawl's rankings to its crawl date partition, replacing any earlier export of that crawl.
+
+    Args:
+        batch (RankingBatch): The crawl's games.
+        crawl_date (date): The date of the crawl.
+        root (str | Path, optional): The export root. Defaults to "data/parquet".
+        row_group_size (int, optional): The most rows per row group. Defaults to 100,000.
+
+    Returns:
+        Path: The Parquet file written.
+    """
+    with RankingsParquetWriter(crawl_date, root=root, row_group_size=row_group_size) as writer:
+        writer.write_batch(batch)
+    logger.info(f"EXPORTED {writer.rows_written} RANKINGS TO {writer.path}")
+    return writer.path
+
+
+def export_game_statistics(
+        statistics: Iterable[GameStatistics],
+        crawl_date: date,
+        root: str | Path = DEFAULT_EXPORT_ROOT,
+        row_group_size: int = 100_000,
+        ) -> Path:
+    """Exports a crawl's game statistics to its crawl date partition, replacing any earlier export of that crawl.
+
+    Args:
+        statistics (Iterable[GameStatistics]): The validated statistics of each game.
+        crawl_date (date): The date of the crawl.
+        root (str | Path, optional): The export root. Defaults to "data/parquet".
+        row_group_size (int, optional): The most rows per row group. Defaults to 100,000.
+
+    Returns:
+        Path: The Parquet file written.
+    """
+    pa, _ = _pyarrow()
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("description", pa.string()),
+        ("year_published", pa.int32()),
+        ("min_players", pa.int32()),
+        ("max_players", pa.int32()),
+        ("suggested_num_player", pa.int32()),
+        ("min_age", pa.int32()),
+        ("average_rating", pa.float64()),
+        ("average_weight", pa.float64()),
+    ])
+    with ParquetPartitionWriter(
+            schema,
+            root=root,
+            dataset=STATISTICS_DATASET,
+            crawl_date=crawl_date,
+            row_group_size=row_group_size,
+            ) as writer:
+        rows = [game.model_dump() for game in statistics]
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    logger.info(f"EXPORTED {writer.rows_written} GAME STATISTICS TO {writer.path}")
+    return writer.path
+
+
+def read_history(
+        root: str | Path = DEFAULT_EXPORT_ROOT,
+        dataset: str = RANKINGS_DATASET,
+        columns: list[str] | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        ):
+    """Lazily loads every exported crawl of a dataset as a dask DataFrame with a crawl_date column.
+
+    Nothing is read until the frame is computed. Only the requested columns are read, crawls
+    outside `start`..`end` are skipped by partition, and row groups are pruned by their statistics
+    for any further filters dask pushes down.
+
+    Args:
+        root (str | Path, optional): The export root. Defaults to "data/parquet".
+        dataset (str, optional): RANKINGS_DATASET or STATISTICS_DATASET. Defaults to RANKINGS_DATASET.
+        columns (list[str] | None, optional): The columns to load. Defaults to all of them.
+        start (date | None, optional): The earliest crawl date to include. Defaults to None.
+        end (date | None, optional): The latest crawl date to include. Defaults to None.
+
+    Returns:
+        dask.dataframe.DataFrame: The history, one row per game per crawl.
+    """
+    import dask.dataframe as dd
+    pa, _ = _pyarrow()
+
+    filters = []
+    if start is not None:
+        filters.append((PARTITION_COLUMN, ">=", start))
+    if end is not None:
+        filters.append((PARTITION_COLUMN, "<=", end))
+    if columns is not None and PARTITION_COLUMN not in columns:
+        columns = [*columns, PARTITION_COLUMN]
+    return dd.read_parquet(
+        str(Path(root) / dataset),
+        columns=columns,
+        filters=filters or None,
+        dataset={"partitioning": {"flavor": "hive", "schema": pa.schema([(PARTITION_COLUMN, pa.date32())])}},
+    )
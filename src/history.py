@@ -0,0 +1,136 @@
+# src/history.py
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from models import RankSnapshot
+from schemas import GameRankCreate
+from utils.streaming import batched
+
+
+@dataclass
+class RankMove:
+    """How far a game moved in the rankings between two crawls.
+
+    Attributes:
+        game_id (int): The game.
+        from_rank (int): The game's rank on the earlier date.
+        to_rank (int): The game's rank on the later date.
+    """
+    game_id: int
+    from_rank: int
+    to_rank: int
+
+    @property
+    def change(self) -> int:
+        """Places gained, so positive means the game climbed the rankings."""
+        return self.from_rank - self.to_rank
+
+
+def record_snapshot(db: Session, crawl_date: date, games: Iterable[GameRankCreate], batch_size: int = 5000) -> int:
+    """Records the rank of every game on a crawl date. Re-recording the same date overwrites it.
+
+    Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        crawl_date (date): The date of the crawl.
+        games (Iterable[GameRankCreate]): The games and their ranks.
+        batch_size (int, optional): How many rows to send per executemany. Defaults to 5000.
+
+    Returns:
+        rows_recorded (int): The number of snapshot rows written.
+    """
+    rows_recorded = 0
+    statement = sqlite_insert(RankSnapshot)
+    statement = statement.on_conflict_do_update(
+        index_elements=[RankSnapshot.game_id, RankSnapshot.crawl_date],
+        set_={"rank": statement.excluded.rank},
+    )
+    for batch in batched(games, batch_size):
+        db.execute(statement, [{"game_id": game.id, "crawl_date": crawl_date, "rank": game.rank} for game in batch])
+        rows_recorded += len(batch)
+    return rows_recorded
+
+
+def rank_history(
+        db: Session,
+        game_id: int,
+        start: date | None = None,
+        end: date | None = None,
+        ) -> list[tuple[date, int]]:
+    """Returns a game's rank over time.
+
+    Args:
+        db (Session): The db session to read with.
+        game_id (int): The game.
+        start (date | None, optional): The earliest crawl date to include. Defaults to None.
+        end (date | None, optional): The latest crawl date to include. Defaults to None.
+
+    Returns:
+        list[tuple[date, int]]: The crawl date and rank of each snapshot, oldest first.
+    """
+    query = select(RankSnapshot.crawl_date, RankSnapshot.rank).where(RankSnapshot.game_id == game_id)
+    if start is not None:
+        query = query.where(RankSnapshot.crawl_date >= start)
+    if end is not None:
+        query = query.where(RankSnapshot.crawl_date <= end)
+    return [(crawl_date, rank) for crawl_date, rank in db.execute(query.order_by(RankSnapshot.crawl_date))]
+
+
+def top_n(db: Session, crawl_date: date, n: int = 100) -> list[tuple[int, int]]:
+    """Returns the top ranked games on a crawl date.
+
+    Args:
+        db (Session): The db session to read with.
+        crawl_date (date): The date of the crawl.
+        n (int, optional): How many games to return. Defaults to 100.
+
+    Returns:
+        list[tuple[int, int]]: The rank and game id of each game, best first.
+    """
+    query = (
+        select(RankSnapshot.rank, RankSnapshot.game_id)
+        .where(RankSnapshot.crawl_date == crawl_date)
+        .order_by(RankSnapshot.rank)
+        .limit(n)
+    )
+    return [(rank, game_id) for rank, game_id in db.execute(query)]
+
+
+def movers(
+        db: Session,
+        from_date: date,
+        to_date: date,
+        limit: int = 20,
+        fallers: bool = False,
+        ) -> list[RankMove]:
+    """Finds the games that moved furthest between two crawl dates.
+
+    Only games ranked on both dates are considered.
+
+    Args:
+        db (Session): The db session to read with.
+        from_date (date): The earlier crawl date.
+        to_date (date): The later crawl date.
+        limit (int, optional): How many games to return. Defaults to 20.
+        fallers (bool, optional): If True, return the biggest fallers instead of the biggest climbers.
+            Defaults to False.
+
+    Returns:
+        list[RankMove]: The biggest moves, biggest first.
+    """
+    before = aliased(RankSnapshot)
+    after = aliased(RankSnapshot)
+    change = before.rank - after.rank
+    query = (
+        select(before.game_id, before.rank, after.rank)
+        .join(after, after.game_id == before.game_id)
+        .where(before.crawl_date == from_date, after.crawl_date == to_date)
+        .order_by(change if fallers else change.desc(), before.game_id)
+        .limit(limit)
+    )
+    moves = [RankMove(game_id=game_id, from_rank=from_rank, to_rank=to_rank) for game_id, from_rank, to_rank in db.execute(query)]
+    return [move for move in moves if (move.change < 0 if fallers else move.change > 0)]
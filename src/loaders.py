@@ -0,0 +1,204 @@
+# src/loaders.py
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import Game, GameMechanicRecord, GameStatisticsRecord
+from ranking_batch import RankingBatch
+from schemas import GameMechanic, GameRankCreate, GameStatistics
+from utils.streaming import batched
+
+# Keeps each `id IN (...)` lookup under SQLite's limit on bound parameters.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+@dataclass
+class UpsertStats:
+    """Counts of what an incremental load did to the Games table."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __iadd__(self, other: "UpsertStats") -> "UpsertStats":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        return self
+
+
+def _existing_games(db: Session, game_ids: list[int]) -> dict[int, tuple[int | None, str | None]]:
+    existing = {}
+    for chunk in batched(game_ids, _LOOKUP_CHUNK_SIZE):
+        for game_id, rank, name in db.execute(select(Game.id, Game.rank, Game.name).where(Game.id.in_(chunk))):
+            existing[game_id] = (rank, name)
+    return existing
+
+
+def upsert_game_batch(db: Session, games: Iterable[GameRankCreate]) -> UpsertStats:
+    """Inserts new games and updates games whose rank or name changed, leaving the rest untouched.
+
+    The current rows are looked up first so only new and changed games are written, with a single
+    executemany of `INSERT ... ON CONFLICT(id) DO UPDATE`. Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        games (Iterable[GameRankCreate]): The games to load. If an id appears twice the last one wins.
+
+    Returns:
+        UpsertStats: How many games were inserted, updated and left unchanged.
+    """
+    latest = {game.id: game for game in games}
+    if not latest:
+        return UpsertStats()
+
+    existing = _existing_games(db, list(latest))
+    stats = UpsertStats()
+    to_write = []
+    for game_id, game in latest.items():
+        current = existing.get(game_id)
+        if current is None:
+            stats.inserted += 1
+        elif current == (game.rank, game.name):
+            stats.unchanged += 1
+            continue
+        else:
+            stats.updated += 1
+        to_write.append({"id": game.id, "rank": game.rank, "name": game.name})
+
+    if to_write:
+        statement = sqlite_insert(Game)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Game.id],
+            set_={"rank": statement.excluded.rank, "name": statement.excluded.name},
+            # Guards against rewriting rows that changed back since they were looked up.
+            where=(
+                Game.rank.is_distinct_from(statement.excluded.rank)
+                | Game.name.is_distinct_from(statement.excluded.name)
+            ),
+        )
+        db.execute(statement, to_write)
+    return stats
+
+
+def upsert_games(db: Session, games: Iterable[GameRankCreate], batch_size: int = 5000) -> UpsertStats:
+    """Incrementally loads games into the Games table, committing after every batch.
+
+    Args:
+        db (Session): The db session to write with.
+        games (Iterable[GameRankCreate]): The games to load.
+        batch_size (int, optional): How many games to look up and write per commit. Defaults to 5000.
+
+    Returns:
+        UpsertStats: The totals across every batch.
+    """
+    stats = UpsertStats()
+    for batch in batched(games, batch_size):
+        stats += upsert_game_batch(db, batch)
+        db.commit()
+    return stats
+
+
+def insert_ranking_batch(db: Session, batch: RankingBatch) -> int:
+    """Inserts a batch of new games into the Games table with one DB-API `executemany`.
+
+    The batch's (id, rank, name) rows are streamed straight to the driver, skipping the
+    per-row dicts an ORM bulk insert builds. Fails on ids that already exist. Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        batch (RankingBatch): The games to insert.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    if len(batch) == 0:
+        return 0
+    connection = db.connection()
+    if connection.dialect.paramstyle != "qmark":
+        # Drivers with named parameters get the rows as dicts instead.
+        connection.execute(insert(Game), list(batch.as_mappings()))
+        return len(batch)
+    statement = insert(Game).compile(dialect=connection.dialect, column_keys=["id", "rank", "name"])
+    cursor = connection.connection.cursor()
+    try:
+        cursor.executemany(str(statement), batch)
+    finally:
+        cursor.close()
+    return len(batch)
+
+
+def upsert_game_statistics(db: Session, statistics: Iterable[GameStatistics], fetched_on: date | None = None) -> int:
+    """Inserts or replaces the statistics of each game with one `INSERT ... ON CONFLICT(id) DO UPDATE`.
+
+    Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        statistics (Iterable[GameStatistics]): The statistics to load. If an id appears twice the last one wins.
+        fetched_on (date | None, optional): When the statistics were fetched. Defaults to today.
+
+    Returns:
+        int: The number of games written.
+    """
+    fetched_on = fetched_on or date.today()
+    rows = list({game.id: {**game.model_dump(), "fetched_on": fetched_on} for game in statistics}.values())
+    if not rows:
+        return 0
+    statement = sqlite_insert(GameStatisticsRecord)
+    columns = [column.name for column in GameStatisticsRecord.__table__.columns if column.name != "id"]
+    statement = statement.on_conflict_do_update(
+        index_elements=[GameStatisticsRecord.id],
+        set_={column: statement.excluded[column] for column in columns},
+    )
+    db.execute(statement, rows)
+    return len(rows)
+
+
+def mark_details_fetched(db: Session, game_ids: Iterable[int], fetched_on: date | None = None) -> int:
+    """Records that games' details were fetched without touching their statistics.
+
+    Used for games whose details failed validation, so the refresh scheduler waits out their TTL
+    instead of fetching them again every run. Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        game_ids (Iterable[int]): The games.
+        fetched_on (date | None, optional): When the details were fetched. Defaults to today.
+
+    Returns:
+        int: The number of games marked.
+    """
+    fetched_on = fetched_on or date.today()
+    rows = [{"id": game_id, "fetched_on": fetched_on} for game_id in dict.fromkeys(game_ids)]
+    if not rows:
+        return 0
+    statement = sqlite_insert(GameStatisticsRecord)
+    statement = statement.on_conflict_do_update(
+        index_elements=[GameStatisticsRecord.id],
+        set_={"fetched_on": statement.excluded.fetched_on},
+    )
+    db.execute(statement, rows)
+    return len(rows)
+
+
+def replace_game_mechanics(db: Session, game_ids: Iterable[int], mechanics: Iterable[GameMechanic]) -> int:
+    """Replaces the mechanics of the given games, so mechanics BGG has since removed are dropped.
+
+    Does not commit.
+
+    Args:
+        db (Session): The db session to write with.
+        game_ids (Iterable[int]): The games whose mechanics are replaced, including games left with none.
+        mechanics (Iterable[GameMechanic]): The games' current mechanics.
+
+    Returns:
+        int: The number of mechanics written.
+    """
+    for chunk in batched(list(game_ids), _LOOKUP_CHUNK_SIZE):
+        db.execute(delete(GameMechanicRecord).where(GameMechanicRecord.id.in_(chunk)))
+    rows = list({(mechanic.id, mechanic.mechanic_name): mechanic.model_dump() for mechanic in mechanics}.values())
+    if rows:
+        db.execute(insert(GameMechanicRecord), rows)
+    return len(rows)
@@ -1,6 +1,8 @@
 # src/models.py
-from sqlalchemy import Column, Integer, String
+from datetime import date
+from sqlalchemy import Column, Float, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.types import TypeDecorator
 
 class Base(DeclarativeBase):
     pass
@@ -14,4 +16,80 @@ class Game(Base):
 
     def __repr__(self):
         return f"<Game(id={self.id}, name='{self.name}')"
-    
\ No newline at end of file
+
+
+class CompactDate(TypeDecorator):
+    """Stores a date as a YYYYMMDD integer, which SQLite packs into 4 bytes instead of 10 bytes of text."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: date | None, dialect) -> int | None:
+        if value is None:
+            return None
+        return value.year * 10000 + value.month * 100 + value.day
+
+    def process_result_value(self, value: int | None, dialect) -> date | None:
+        if value is None:
+            return None
+        return date(value // 10000, value // 100 % 100, value % 100)
+
+
+class RankSnapshot(Base):
+    """One game's rank on one crawl date.
+
+    A WITHOUT ROWID table clustered on (game_id, crawl_date), so a game's history is a single
+    range scan, with a (crawl_date, rank) index for the top N games on a given date.
+    """
+    __tablename__ = "RankHistory"
+    __table_args__ = (
+        Index("ix_RankHistory_crawl_date_rank", "crawl_date", "rank"),
+        {"sqlite_with_rowid": False},
+    )
+
+    game_id = Column(Integer, primary_key=True)
+    crawl_date = Column(CompactDate, primary_key=True)
+    rank = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<RankSnapshot(game_id={self.game_id}, crawl_date={self.crawl_date}, rank={self.rank})"
+
+
+class GameStatisticsRecord(Base):
+    """A game's details from the XML API, one row per game, with the columns of GameStatistics.
+
+    `fetched_on` is when the details were last fetched, which the refresh scheduler ages them by.
+    A game whose details failed validation keeps a row with only `fetched_on` set.
+    """
+    __tablename__ = "GameStatistics"
+
+    id = Column(Integer, primary_key=True)
+    description = Column(String)
+    year_published = Column(Integer)
+    min_players = Column(Integer)
+    max_players = Column(Integer)
+    suggested_num_player = Column(Integer)
+    min_age = Column(Integer)
+    average_rating = Column(Float)
+    average_weight = Column(Float)
+    fetched_on = Column(CompactDate)
+
+    def __repr__(self):
+        return f"<GameStatisticsRecord(id={self.id}, average_rating={self.average_rating})"
+
+
+class GameMechanicRecord(Base):
+    """One mechanic of one game, with the same columns as GameMechanic.
+
+    A WITHOUT ROWID table clustered on (id, mechanic_name), so a game's mechanics are a single range scan.
+    """
+    __tablename__ = "GameMechanics"
+    __table_args__ = (
+        Index("ix_GameMechanics_mechanic_name", "mechanic_name"),
+        {"sqlite_with_rowid": False},
+    )
+
+    id = Column(Integer, primary_key=True)
+    mechanic_name = Column(String, primary_key=True)
+
+    def __repr__(self):
+        return f"<GameMechanicRecord(id={self.id}, mechanic_name='{self.mechanic_name}')"
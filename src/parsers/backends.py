@@ -0,0 +1,10 @@
+# src/parsers/backends.py
+# The parser backend names, apart from the parsers so choosing a backend imports neither bs4 nor lxml.
+
+# The available parser backends:
+#   "bs4"      - a full BeautifulSoup tree built with html.parser (the original behaviour).
+#   "strainer" - a BeautifulSoup tree restricted to <a> and <td> tags, built with lxml if installed.
+#   "stream"   - a single pass over html.parser events that never builds a tree.
+#   "lxml"     - lxml's C parser queried with XPath, no BeautifulSoup at all. Needs lxml installed.
+PARSER_BACKENDS = ("bs4", "strainer", "stream", "lxml")
+DEFAULT_PARSER_BACKEND = "bs4"
@@ -1,10 +1,134 @@
 # src/parsers/html_parsers.py
-from bs4 import BeautifulSoup
-from schemas import GameRankCreate
-from utils.logging_config import setup_logging
+from bs4 import BeautifulSoup, SoupStrainer
+from dataclasses import dataclass
+from functools import lru_cache
+from parsers.backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS
+from parsers.stream_parser import RankingPageEventParser
+from schemas import GameRankBatch, GameRankCreate, validate_game_rank_columns
+from utils.logging_config import get_logger
+from utils.metrics import PARSE_SECONDS, ROWS_REJECTED, ROWS_VALIDATED, metrics, timed
 import re
 
-logger = setup_logging()
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError: # lxml is optional, only the "lxml" backend needs it.
+    lxml_etree = lxml_html = None
+
+STRAINER_FEATURES = "html.parser" if lxml_html is None else "lxml"
+
+logger = get_logger(__name__)
+
+_LXML_PRIMARY_LINKS = "//a[contains(concat(' ', normalize-space(@class), ' '), ' primary ')]"
+_LXML_RANK_CELLS = "//td[contains(concat(' ', normalize-space(@class), ' '), ' collection_rank ')]"
+_LXML_LAST_PAGE_LINK = "//a[@title='last page']"
+# What BGG puts in the rank cell of a game that has no rank yet.
+UNRANKED_RANK_TEXT = "N/A"
+
+@dataclass(frozen=True)
+class ParsedRankingPage:
+    """Everything the pipeline reads from a ranking page, pulled out of a single tree or event stream.
+
+    `parse_ranking_page` only collects the raw text of the three elements we care about. Turning it
+    into ids, names, ranks and the last page number is left to the properties, so a page with a
+    malformed row still gives its last page number and the other way around.
+
+    Attributes:
+        game_links (tuple[tuple[str | None, str], ...]): The href and text of each `a.primary`.
+        rank_texts (tuple[str, ...]): The text of each `td.collection_rank`.
+        last_page_text (str | None): The text of the first "last page" link, if any, e.g. "[1727]".
+    """
+    game_links: tuple[tuple[str | None, str], ...] = ()
+    rank_texts: tuple[str, ...] = ()
+    last_page_text: str | None = None
+
+    @property
+    def game_ids_and_names(self) -> list[tuple[int, str]]:
+        """The game id and name of each game link, in page order."""
+        if len(self.game_links) == 0:
+            raise ValueError("HTML content has no a tags with class=primary")
+        game_ids_and_names = []
+        for href, game_name in self.game_links:
+            if type(href) != str:
+                raise ValueError(f"href returns as {type(href)}. Check type.")
+            game_ids_and_names.append((int(href.split("/")[2]), game_name)) # Extract game ID from the href
+        return game_ids_and_names
+
+    @property
+    def game_ranks(self) -> list[int | None]:
+        """The rank of each game, in the same order as `game_ids_and_names`. None for unranked games."""
+        if len(self.rank_texts) == 0:
+            raise ValueError("HTML content has no td tags with class=collection_rank")
+        return [
+            None if text.strip() == UNRANKED_RANK_TEXT else int(re.sub("[\n\t]", "", text))
+            for text in self.rank_texts
+        ]
+
+    @property
+    def last_page_number(self) -> int:
+        """The last page number of the bgg browse pages."""
+        if self.last_page_text is None:
+            raise ValueError("Could not find the last page number in the HTML content")
+        return int(self.last_page_text[1:-1])
+
+    @property
+    def page_size(self) -> int:
+        """How many rows the page holds, valid or not. Unmatched trailing links or ranks are not counted."""
+        return min(len(self.game_links), len(self.rank_texts))
+
+    @property
+    def estimated_total_games(self) -> int:
+        """How many games the browse pages list, assuming every page holds as many as this one.
+
+        BGG does not print the total, so this is an upper bound: the last page is usually part full.
+        """
+        return self.last_page_number * self.page_size
+
+    def games(self) -> list[GameRankCreate]:
+        """Validates every ranked row, raising on the first that fails. Unranked rows are left out.
+
+        Returns:
+            games (list[GameRankCreate]): A list of pydantic validation objects which contains a games id, rank and name.
+        """
+        return [
+            GameRankCreate(id=game_id, rank=rank, name=game_name)
+            for (game_id, game_name), rank in zip(self.game_ids_and_names, self.game_ranks)
+            if rank is not None
+        ]
+
+    def batch(self) -> GameRankBatch:
+        """Validates the whole page's rows at once, reporting the rows that fail, e.g. a rank that is not a
+        number, in the batch's rejections. Unranked rows are left out and counted in the batch's `unranked`.
+
+        Returns:
+            batch (GameRankBatch): The valid games as columns, plus the rejected rows.
+        """
+        game_ids_and_names = self.game_ids_and_names
+        if len(self.rank_texts) == 0:
+            raise ValueError("HTML content has no td tags with class=collection_rank")
+        # Like zip, ignore any unmatched trailing ids or ranks.
+        rows = min(len(game_ids_and_names), len(self.rank_texts))
+        rank_texts = [text.strip() for text in self.rank_texts[:rows]]
+        ranked = [i for i, text in enumerate(rank_texts) if text != UNRANKED_RANK_TEXT]
+        batch = validate_game_rank_columns(
+            ids=[game_ids_and_names[i][0] for i in ranked],
+            # The rank text is turned into an int by the validation, so one malformed rank rejects its row, not the page.
+            ranks=[rank_texts[i] for i in ranked],
+            names=[game_ids_and_names[i][1] for i in ranked],
+        )
+        # Point the rejections back at the rows of the page.
+        for rejection in batch.rejections:
+            rejection.index = ranked[rejection.index]
+        batch.unranked = rows - len(ranked)
+        return batch
+
+
+def _soup_game_links(soup: BeautifulSoup) -> tuple[tuple[str | None, str], ...]:
+    return tuple((tag.get("href"), tag.text) for tag in soup.find_all("a", class_="primary"))
+
+
+def _soup_rank_texts(soup: BeautifulSoup) -> tuple[str, ...]:
+    return tuple(tag.text for tag in soup.find_all("td", class_="collection_rank"))
+
 
 def extract_game_ids_and_names(soup: BeautifulSoup) -> list[tuple[int, str]]:
     """Takes a BeautifulSoup object and extracts the game ids and names
@@ -15,87 +139,186 @@ def extract_game_ids_and_names(soup: BeautifulSoup) -> list[tuple[int, str]]:
     Returns:
         game_ids_and_names (list[tuple[int, str]]): A list of tuples containing the game id and name in that order
     """
-    a_tags = soup.find_all("a", class_="primary")
-    game_ids_and_names = []
-    if len(a_tags) == 0:
-        raise ValueError("HTML content has no a tags with class=primary")
-    else:
-        for tag in a_tags:
-            href = tag.get("href")
-            if type(href) != str:
-                raise ValueError(f"href returns as {type(href)}. Check type.")
-            else:
-                game_id = int(href.split("/")[2]) # Extract game ID from the href
-                game_name = tag.text # Extract game name from text
-                game_ids_and_names.append((game_id, game_name))
-        return game_ids_and_names
+    return ParsedRankingPage(game_links=_soup_game_links(soup)).game_ids_and_names
 
 
-def extract_game_ranks(soup: BeautifulSoup) -> list[int]:
+def extract_game_ranks(soup: BeautifulSoup) -> list[int | None]:
     """Takes a BeautifulSoup object and extracts the game ranks in the same order as the game ids and names
     
     Args:
         soup (BeautifulSoup): The BeautifulSoup object set to html.parser
 
     Returns:
-        game_ids_and_names (list[int]): A list of ints containing the ranks on the parsed html page
+        game_ids_and_names (list[int | None]): A list of ints containing the ranks on the parsed html page,
+            None for unranked games
+    """
+    return ParsedRankingPage(rank_texts=_soup_rank_texts(soup)).game_ranks
+
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}, expected one of {PARSER_BACKENDS}")
+
+
+def make_soup(html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> BeautifulSoup:
+    """Builds the BeautifulSoup object for one of the soup based backends.
+
+    Args:
+        html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): Either "bs4" or "strainer". Defaults to "bs4".
+
+    Returns:
+        soup (BeautifulSoup): The parsed html.
+    """
+    if backend == "strainer":
+        return BeautifulSoup(html_content, STRAINER_FEATURES, parse_only=SoupStrainer(["a", "td"]))
+    if backend == "bs4":
+        return BeautifulSoup(html_content, "html.parser")
+    raise ValueError(f"Parser backend {backend!r} does not build a BeautifulSoup object")
+
+
+def _lxml_tree(html_content: str):
+    if lxml_html is None:
+        raise ValueError("The lxml parser backend needs lxml to be installed")
+    try:
+        return lxml_html.fromstring(html_content)
+    except lxml_etree.ParserError as e:
+        raise ValueError(f"HTML content could not be parsed by lxml: {e}")
+
+
+# Page 1 is read for its last page number and page size before the crawl fans out, and then parsed
+# again for its rows, so the last few pages parsed are kept rather than building their tree twice.
+@lru_cache(maxsize=4)
+def _parse_ranking_page(html_content: str, backend: str) -> ParsedRankingPage:
+    if backend == "stream":
+        parser = RankingPageEventParser()
+        parser.feed(html_content)
+        parser.close()
+        return ParsedRankingPage(tuple(parser.game_links), tuple(parser.rank_texts), parser.last_page_text)
+
+    if backend == "lxml":
+        tree = _lxml_tree(html_content)
+        last_page_links = tree.xpath(_LXML_LAST_PAGE_LINK)
+        return ParsedRankingPage(
+            game_links=tuple((tag.get("href"), tag.text_content()) for tag in tree.xpath(_LXML_PRIMARY_LINKS)),
+            rank_texts=tuple(tag.text_content() for tag in tree.xpath(_LXML_RANK_CELLS)),
+            last_page_text=last_page_links[0].text_content() if last_page_links else None,
+        )
+
+    soup = make_soup(html_content, backend=backend)
+    last_page_link = soup.find("a", {"title": "last page"})
+    return ParsedRankingPage(
+        game_links=_soup_game_links(soup),
+        rank_texts=_soup_rank_texts(soup),
+        last_page_text=None if last_page_link is None else last_page_link.text,
+    )
+
+
+def parse_ranking_page(html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> ParsedRankingPage:
+    """Parses a ranking page once, for its rows, its last page number and the rest of its metadata.
+
+    Every other parser entry point reads the page through this, so each backend builds one tree
+    (or makes one pass over the parser events) per page however many things are read from it.
+
+    Args:
+        html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
+
+    Returns:
+        page (ParsedRankingPage): The page's game links, ranks and last page link.
+
+    Raises:
+        ValueError: If the backend is unknown or, for "lxml", the html cannot be parsed at all.
     """
-    td_tags = soup.find_all("td", class_="collection_rank")
-    game_ranks = []
-    if len(td_tags) == 0:
-        raise ValueError("HTML content has no td tags with class=primary")
-    else:
-        for tag in td_tags:
-            game_ranks.append(int(re.sub("[\n\t]", "", tag.text)))
-        return game_ranks
+    _check_backend(backend)
+    return _parse_ranking_page(html_content, backend)
 
 
+def extract_game_ids_names_and_ranks(
+        html_content: str,
+        backend: str = DEFAULT_PARSER_BACKEND,
+        ) -> tuple[list[tuple[int, str]], list[int | None]]:
+    """Takes html content in string format and extracts the game ids, names and ranks with the chosen backend.
+
+    Args:
+        html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
+
+    Returns:
+        game_ids_and_names, game_ranks (tuple[list[tuple[int, str]], list[int | None]]): The game ids and names, and
+            the ranks in the same order, None for unranked games.
+
+    Raises:
+        ValueError: If the page is missing the game links or ranks.
+    """
+    page = parse_ranking_page(html_content, backend=backend)
+    return page.game_ids_and_names, page.game_ranks
+
 
-def parse_html_ranking_page(html_content: str) -> list[GameRankCreate] | None:
-    """Takes html content in string format, and using BS4, extracts the game id, name and rank.
+def parse_html_ranking_page_strict(html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> list[GameRankCreate]:
+    """Takes html content in string format and extracts the game id, name and rank.
+    Unlike `parse_html_ranking_page`, failures are raised to the caller rather than logged.
     
     Args:
         html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
 
     Returns:
         games (list[GameRankCreate]): A list of pydantic validation objects which contains a games id, rank and name.
+
+    Raises:
+        ValueError: If the page is missing the expected tags or a row fails validation.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
+    return parse_ranking_page(html_content, backend=backend).games()
+
+
+def parse_html_ranking_page_batch(html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> GameRankBatch:
+    """Takes html content in string format and validates the whole page's game ids, ranks and names at once.
+    Rows that fail validation are reported in the batch's rejections instead of failing the page.
+
+    Args:
+        html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
+
+    Returns:
+        batch (GameRankBatch): The valid games as columns, plus the rejected rows.
+
+    Raises:
+        ValueError: If the page is missing the expected tags.
+    """
+    with timed(PARSE_SECONDS, {"backend": backend}):
+        batch = parse_ranking_page(html_content, backend=backend).batch()
+    metrics.counter(ROWS_VALIDATED, {"dataset": "rankings"}).inc(len(batch))
+    metrics.counter(ROWS_REJECTED, {"dataset": "rankings"}).inc(len(batch.rejections))
+    return batch
+
+
+def parse_html_ranking_page(html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> list[GameRankCreate] | None:
+    """Takes html content in string format and extracts the game id, name and rank.
+    
+    Args:
+        html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
+
+    Returns:
+        games (list[GameRankCreate]): A list of pydantic validation objects which contains a games id, rank and name.
+    """
+    _check_backend(backend)
     try:
-        game_ids_and_names = extract_game_ids_and_names(soup=soup)
-        game_ranks = extract_game_ranks(soup=soup)
-        if game_ids_and_names != None and game_ranks != None:
-            games = []
-            for (game_id, game_name), rank in zip(game_ids_and_names, game_ranks):
-                games.append(
-                    GameRankCreate(
-                        id=game_id,
-                        rank=rank,
-                        name=game_name
-                    )
-                )
-            return games
-        else:
-            raise ValueError("HTML content failed to parse.")
+        return parse_html_ranking_page_strict(html_content, backend=backend)
     except ValueError as e:
-        logger.error("HTML content failed to parse with error: \n {e}")
+        logger.error(f"HTML content failed to parse with error: \n {e}")
 
 
-def get_html_last_page_number(html_content:str) -> int | None:
-    """Takes html content in string format, and using BS4, extracts the last page number.
+def get_html_last_page_number(html_content:str, backend: str = DEFAULT_PARSER_BACKEND) -> int | None:
+    """Takes html content in string format and extracts the last page number.
     
     Args:
         html_content (str): The html content from BGG that needs to be parsed.
+        backend (str, optional): One of PARSER_BACKENDS. Defaults to "bs4".
 
     Returns:
         page_number (int): The last page number of the bgg browse pages.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
-    last_page_link = soup.find("a", {"title": "last page"})
-    if last_page_link is None:
-        raise ValueError("Could not find the last page number in the HTML content")
-    else:
-        page_number_as_str = last_page_link.text
-        page_number = int(page_number_as_str[1:-1])
-        return page_number
-
+    return parse_ranking_page(html_content, backend=backend).last_page_number
@@ -0,0 +1,196 @@
+# src/parsers/parallel_parsers.py
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from parsers.html_parsers import DEFAULT_PARSER_BACKEND, parse_html_ranking_page_batch
+from parsers.parse_cache import ParseResultCache
+from ranking_batch import RankingBatch
+from schemas import RowRejection
+from utils.metrics import PARSE_CACHE_LOOKUPS, PARSE_SECONDS, ROWS_REJECTED, ROWS_VALIDATED, metrics
+from utils.streaming import batched
+
+# The error of a page that was never fetched, so there was nothing to parse.
+PAGE_NOT_FETCHED = "Page was not fetched"
+
+# Workers are started from a clean server process rather than forked from the pipeline, which has
+# the prefetch thread and the HTTP client's connection pool running, and whose held locks a forked
+# child would inherit. Windows has no forkserver, so it spawns.
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+@dataclass
+class PageParseResult:
+    """The outcome of parsing one ranking page.
+
+    Attributes:
+        page_number (int): The page the result belongs to.
+        games (RankingBatch): The parsed games, in compact columns that are cheap to send between
+            processes. Empty if the page failed.
+        error (str | None): Why the page failed to parse, or None if it succeeded.
+        rejections (list[RowRejection]): The rows on the page that failed validation.
+        parse_seconds (float): How long the page took to parse, so a worker's timings reach the parent's metrics.
+        cache_hit (bool | None): Whether the games came from the parse cache, or None if no cache was used.
+        unranked (int): How many rows on the page were left out because the game has no rank yet.
+        cached_bytes (int): The bytes written to the parse cache, so the parent can keep its size in check.
+    """
+    page_number: int
+    games: RankingBatch = field(default_factory=RankingBatch)
+    error: str | None = None
+    rejections: list[RowRejection] = field(default_factory=list)
+    parse_seconds: float = 0.0
+    cache_hit: bool | None = None
+    unranked: int = 0
+    cached_bytes: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def parse_page(
+        page_number: int,
+        html_content: str | None,
+        backend: str = DEFAULT_PARSER_BACKEND,
+        parse_cache: ParseResultCache | None = None,
+        enforce_cache_limit: bool = True,
+        ) -> PageParseResult:
+    """Parses a single page, capturing any failure in the result instead of raising it.
+
+    Args:
+        page_number (int): The page number of the html content.
+        html_content (str | None): The raw html of the page, or None if it was never fetched.
+        backend (str, optional): The parser backend to use. Defaults to "bs4".
+        parse_cache (ParseResultCache | None, optional): If set, an unchanged page's games are read
+            from the cache instead of being parsed again. Defaults to None.
+        enforce_cache_limit (bool, optional): Whether to evict from the parse cache when it grows past
+            its `max_bytes`. Workers pass False and the parent evicts instead. Defaults to True.
+
+    Returns:
+        PageParseResult: The parsed games or the error for this page.
+    """
+    if html_content is None:
+        return PageParseResult(page_number=page_number, error=PAGE_NOT_FETCHED)
+    start = time.perf_counter()
+    if parse_cache is not None:
+        cached = parse_cache.get(html_content, backend)
+        if cached is not None:
+            metrics.counter(ROWS_VALIDATED, {"dataset": "rankings"}).inc(len(cached))
+            return PageParseResult(
+                page_number=page_number,
+                games=cached,
+                parse_seconds=time.perf_counter() - start,
+                cache_hit=True,
+            )
+    try:
+        batch = parse_html_ranking_page_batch(html_content, backend=backend)
+        games = RankingBatch.from_columns(batch.ids, batch.ranks, batch.names)
+        cached_bytes = 0
+        if parse_cache is not None and not batch.rejections and not batch.unranked:
+            cached_bytes = parse_cache.put(html_content, games, backend, enforce_limit=enforce_cache_limit)
+        return PageParseResult(
+            page_number=page_number,
+            games=games,
+            rejections=batch.rejections,
+            parse_seconds=time.perf_counter() - start,
+            cache_hit=False if parse_cache is not None else None,
+            unranked=batch.unranked,
+            cached_bytes=cached_bytes,
+        )
+    except Exception as e:
+        return PageParseResult(page_number=page_number, error=f"{type(e).__name__}: {e}")
+
+
+def _record_worker_results(
+        results: list[PageParseResult],
+        backend: str,
+        parse_cache: ParseResultCache | None,
+        ) -> list[PageParseResult]:
+    # Metrics recorded in a worker process stay there, so the parent records them from the results.
+    # Each worker has its own copy of the cache, so the parent also counts what they wrote to it.
+    for result in results:
+        if parse_cache is not None and result.cached_bytes:
+            parse_cache.added(result.cached_bytes)
+        if result.cache_hit is not None:
+            metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "hit" if result.cache_hit else "miss"}).inc()
+        if result.ok:
+            metrics.histogram(PARSE_SECONDS, {"backend": backend}).observe(result.parse_seconds)
+            metrics.counter(ROWS_VALIDATED, {"dataset": "rankings"}).inc(len(result.games))
+            metrics.counter(ROWS_REJECTED, {"dataset": "rankings"}).inc(len(result.rejections))
+    return results
+
+
+def _parse_chunk(
+        chunk: list[tuple[int, str | None]],
+        backend: str = DEFAULT_PARSER_BACKEND,
+        parse_cache: ParseResultCache | None = None,
+        enforce_cache_limit: bool = True,
+        ) -> list[PageParseResult]:
+    return [
+        parse_page(page_number, html_content, backend=backend, parse_cache=parse_cache, enforce_cache_limit=enforce_cache_limit)
+        for page_number, html_content in chunk
+    ]
+
+
+def parse_html_ranking_pages_parallel(
+        pages: Iterable[tuple[int, str | None]],
+        max_workers: int | None = None,
+        chunk_size: int = 4,
+        max_pending_chunks: int | None = None,
+        backend: str = DEFAULT_PARSER_BACKEND,
+        parse_cache: ParseResultCache | None = None,
+        ) -> Iterator[PageParseResult]:
+    """Parses ranking pages across a pool of worker processes.
+
+    Pages are sent to the workers in chunks of `chunk_size` to amortise the cost of pickling,
+    and at most `max_pending_chunks` chunks are in flight at once, so `pages` may be a lazy
+    stream and memory stays bounded. Results are yielded in the same order as `pages`. `pages`
+    is closed when parsing ends, fails or is stopped early, so a prefetching source stops fetching.
+
+    Args:
+        pages (Iterable[tuple[int, str | None]]): The page number and raw html of each page.
+        max_workers (int | None, optional): The number of worker processes. 0 parses in the
+            current process. Defaults to None, one worker per CPU.
+        chunk_size (int, optional): How many pages each task parses. Defaults to 4.
+        max_pending_chunks (int | None, optional): The maximum number of chunks submitted but not
+            yet yielded. Defaults to None, twice the number of workers.
+        backend (str, optional): The parser backend to use. Defaults to "bs4".
+        parse_cache (ParseResultCache | None, optional): If set, unchanged pages are read from this
+            cache instead of being parsed. Every worker shares the cache's folder, and the parent evicts
+            from it when the workers' writes take it past its `max_bytes`. Defaults to None.
+
+    Returns:
+        Iterator[PageParseResult]: One result per page, in page order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    try:
+        if max_workers == 0:
+            for chunk in batched(pages, chunk_size):
+                yield from _parse_chunk(chunk, backend=backend, parse_cache=parse_cache)
+            return
+
+        parse_chunk = partial(_parse_chunk, backend=backend, parse_cache=parse_cache, enforce_cache_limit=False)
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_pending_chunks is None:
+            max_pending_chunks = 2 * max_workers
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD)) as executor:
+            pending: deque[Future[list[PageParseResult]]] = deque()
+            for chunk in batched(pages, chunk_size):
+                pending.append(executor.submit(parse_chunk, chunk))
+                if len(pending) >= max_pending_chunks:
+                    yield from _record_worker_results(pending.popleft().result(), backend, parse_cache)
+            while pending:
+                yield from _record_worker_results(pending.popleft().result(), backend, parse_cache)
+    finally:
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
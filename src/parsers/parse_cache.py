@@ -0,0 +1,206 @@
+# src/parsers/parse_cache.py
+import hashlib
+import os
+import threading
+import zlib
+from pathlib import Path
+from parsers.html_parsers import DEFAULT_PARSER_BACKEND, parse_html_ranking_page_batch
+from ranking_batch import RankingBatch
+from schemas import GameRankBatch
+from utils.logging_config import get_logger
+from utils.metrics import PARSE_CACHE_LOOKUPS, ROWS_VALIDATED, metrics
+
+logger = get_logger(__name__)
+
+# Bump whenever a change to the ranking page parsers could change the rows they extract, so
+# results cached by the old parsers are never served.
+PARSER_VERSION = 1
+
+
+class ParseResultCache:
+    """A size-bounded on-disk cache of parsed ranking pages, keyed by a hash of the page's html.
+
+    Most browse pages do not change from one day to the next, so their rows are looked up by the
+    BLAKE2b hash of the html instead of being parsed again. Each page's rows are stored as a
+    zlib-compressed RankingBatch of a few KiB, under a folder per parser version and backend, as
+    the backends may not extract exactly the same rows from a malformed page:
+
+        <root>/v<PARSER_VERSION>/<backend>/<hash[:2]>/<hash>.rkb.z
+
+    Hits refresh the file's modification time, so eviction drops the least recently used pages
+    first once the cache grows past `max_bytes`. Only pages that parsed without rejected or
+    unranked rows are cached, so rejections and unranked games are always reported. The cache holds
+    no open files or locks and can be shared by parser worker processes.
+    """
+
+    def __init__(
+            self,
+            root: str | Path = "data/parse_cache",
+            max_bytes: int | None = 256 * 1024**2,
+            parser_version: int = PARSER_VERSION,
+            compression_level: int = 6,
+            ) -> None:
+        """Initialises the ParseResultCache.
+
+        Args:
+            root (str | Path, optional): The folder the cache lives in. Defaults to "data/parse_cache".
+            max_bytes (int | None, optional): The most bytes of cached pages to keep. The least recently
+                used pages are evicted first when over it. Defaults to 256 MiB. None disables the limit.
+            parser_version (int, optional): The parser version the cached rows belong to. Defaults to PARSER_VERSION.
+            compression_level (int, optional): The zlib compression level. Defaults to 6.
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+        self.compression_level = compression_level
+        # The size of the cache as last measured plus what this instance has added since.
+        self._size_bytes: int | None = None
+
+    # ------------ Paths ------------
+    @property
+    def version_dir(self) -> Path:
+        return self.root / f"v{self.parser_version}"
+
+    @staticmethod
+    def content_key(html_content: str) -> str:
+        """The hash the page's rows are stored under."""
+        return hashlib.blake2b(html_content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _entry_path(self, key: str, backend: str = DEFAULT_PARSER_BACKEND) -> Path:
+        return self.version_dir / backend / key[:2] / f"{key}.rkb.z"
+
+    # ------------ Reading and writing ------------
+    def get(self, html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> RankingBatch | None:
+        """Looks up the rows parsed from a page.
+
+        Args:
+            html_content (str): The page's html.
+            backend (str, optional): The parser backend the rows were parsed with. Defaults to "bs4".
+
+        Returns:
+            RankingBatch | None: The page's rows, or None if they are not cached.
+        """
+        path = self._entry_path(self.content_key(html_content), backend)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "miss"}).inc()
+            return None
+        try:
+            batch = RankingBatch.from_bytes(zlib.decompress(data))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping the corrupt parse cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "miss"}).inc()
+            return None
+        metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "hit"}).inc()
+        try:
+            os.utime(path)
+        except FileNotFoundError: # Evicted by another process since it was read.
+            pass
+        return batch
+
+    def put(
+            self,
+            html_content: str,
+            batch: RankingBatch,
+            backend: str = DEFAULT_PARSER_BACKEND,
+            enforce_limit: bool = True,
+            ) -> int:
+        """Stores the rows parsed from a page, evicting the least recently used pages if over `max_bytes`.
+
+        Args:
+            html_content (str): The page's html.
+            batch (RankingBatch): The rows parsed from it.
+            backend (str, optional): The parser backend the rows were parsed with. Defaults to "bs4".
+            enforce_limit (bool, optional): Whether to check `max_bytes` now. Parser workers pass False
+                and leave it to the parent, which adds up what they wrote with `added`. Defaults to True.
+
+        Returns:
+            int: The bytes written.
+        """
+        path = self._entry_path(self.content_key(html_content), backend)
+        data = zlib.compress(batch.to_bytes(), self.compression_level)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread as well as per process, as the cache may be shared by threads.
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        if enforce_limit:
+            self.added(len(data))
+        return len(data)
+
+    def added(self, size: int) -> None:
+        """Counts bytes written to the cache, evicting the least recently used pages if over `max_bytes`.
+
+        The cache's size is measured on the first call and then kept up to date, so only the first
+        write of an instance lists the cache's files.
+
+        Args:
+            size (int): The bytes written.
+        """
+        if self.max_bytes is None:
+            return
+        if self._size_bytes is None:
+            self._size_bytes = self.size_bytes()
+        else:
+            self._size_bytes += size
+        if self._size_bytes > self.max_bytes:
+            self.evict()
+
+    def parse_ranking_page_batch(self, html_content: str, backend: str = DEFAULT_PARSER_BACKEND) -> GameRankBatch:
+        """Parses a ranking page like `parse_html_ranking_page_batch`, unless its rows are cached.
+
+        Args:
+            html_content (str): The html content from BGG that needs to be parsed.
+            backend (str, optional): The parser backend to use on a miss. Defaults to "bs4".
+
+        Returns:
+            batch (GameRankBatch): The valid games as columns, plus the rejected rows.
+
+        Raises:
+            ValueError: If the page is not cached and is missing the expected tags.
+        """
+        cached = self.get(html_content, backend)
+        if cached is not None:
+            metrics.counter(ROWS_VALIDATED, {"dataset": "rankings"}).inc(len(cached))
+            return GameRankBatch(ids=cached.ids.tolist(), ranks=cached.ranks.tolist(), names=cached.names)
+        batch = parse_html_ranking_page_batch(html_content, backend=backend)
+        if not batch.rejections and not batch.unranked:
+            self.put(html_content, RankingBatch.from_columns(batch.ids, batch.ranks, batch.names), backend)
+        return batch
+
+    # ------------ Eviction ------------
+    def size_bytes(self) -> int:
+        """The total size of the cached pages of every parser version, in bytes."""
+        if not self.root.is_dir():
+            return 0
+        return sum(path.stat().st_size for path in self.root.glob("v*/*/*/*.rkb.z"))
+
+    def evict(self) -> int:
+        """Drops the pages cached by other parser versions, then the least recently used pages until under `max_bytes`.
+
+        Returns:
+            int: The number of pages evicted.
+        """
+        entries = []
+        for path in self.root.glob("v*/*/*/*.rkb.z"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError: # Evicted by another process.
+                continue
+            entries.append((path.parents[2] != self.version_dir, stat.st_mtime, stat.st_size, path))
+        # Other versions' pages first, then the oldest.
+        entries.sort(key=lambda entry: (not entry[0], entry[1]))
+        size = sum(entry[2] for entry in entries)
+        evicted = 0
+        for stale_version, _, entry_size, path in entries:
+            if not stale_version and (self.max_bytes is None or size <= self.max_bytes):
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            evicted += 1
+        self._size_bytes = size
+        if evicted:
+            logger.info(f"EVICTED {evicted} PAGES FROM THE PARSE CACHE")
+        return evicted
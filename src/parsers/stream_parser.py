@@ -0,0 +1,74 @@
+# src/parsers/stream_parser.py
+from html.parser import HTMLParser
+
+
+class RankingPageEventParser(HTMLParser):
+    """Pulls the game links, ranks and last page link out of a ranking page in one pass.
+
+    Rather than building a tree, this listens to the tag and text events of the standard
+    library's `html.parser` and only buffers text while inside one of the three elements
+    we care about: `a.primary`, `td.collection_rank` and `a[title="last page"]`.
+
+    Only the raw text is collected; `ParsedRankingPage` turns it into ids, names and ranks.
+
+    Attributes:
+        game_links (list[tuple[str | None, str]]): The href and text of each `a.primary`.
+        rank_texts (list[str]): The text of each `td.collection_rank`.
+        last_page_text (str | None): The text of the first "last page" link, if any.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.game_links: list[tuple[str | None, str]] = []
+        self.rank_texts: list[str] = []
+        self.last_page_text: str | None = None
+        self._capture: str | None = None
+        self._capture_tag = ""
+        self._capture_href: str | None = None
+        self._depth = 0
+        self._buffer: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._capture is not None:
+            if tag == self._capture_tag:
+                self._depth += 1
+            return
+        if tag != "a" and tag != "td":
+            return
+
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+        if tag == "a" and "primary" in classes:
+            self._start_capture("name", tag)
+            self._capture_href = attributes.get("href")
+        elif tag == "td" and "collection_rank" in classes:
+            self._start_capture("rank", tag)
+        elif tag == "a" and attributes.get("title") == "last page" and self.last_page_text is None:
+            self._start_capture("last_page", tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._capture is None or tag != self._capture_tag:
+            return
+        if self._depth > 0:
+            self._depth -= 1
+            return
+
+        text = "".join(self._buffer)
+        if self._capture == "name":
+            self.game_links.append((self._capture_href, text))
+        elif self._capture == "rank":
+            self.rank_texts.append(text)
+        else:
+            self.last_page_text = text
+        self._capture = None
+        self._capture_href = None
+
+    def handle_data(self, data: str) -> None:
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    def _start_capture(self, capture: str, tag: str) -> None:
+        self._capture = capture
+        self._capture_tag = tag
+        self._depth = 0
+        self._buffer = []
@@ -0,0 +1,142 @@
+# src/parsers/xml_parsers.py
+import io
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO
+from pydantic import ValidationError
+from schemas import GameMechanic, GameStatistics
+from utils.logging_config import get_logger
+from utils.metrics import PARSE_SECONDS, ROWS_REJECTED, ROWS_VALIDATED, metrics, timed
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class GameDetails:
+    """The details of one game parsed from an XML API `thing` response.
+
+    Attributes:
+        game_id (int): The game.
+        statistics (GameStatistics | None): The game's statistics, or None if they failed validation.
+        mechanics (list[GameMechanic]): One row per mechanic of the game.
+        error (str | None): Why the statistics failed validation, or None if they passed.
+    """
+    game_id: int
+    statistics: GameStatistics | None = None
+    mechanics: list[GameMechanic] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _value(item: ET.Element, tag: str, default: str | None = None) -> str | None:
+    element = item.find(tag)
+    return default if element is None else element.get("value", default)
+
+
+def _int_value(item: ET.Element, tag: str) -> int | None:
+    value = _value(item, tag)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float_value(item: ET.Element, tag: str) -> float | None:
+    value = _value(item, tag)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def suggested_num_players(item: ET.Element) -> int | None:
+    """Finds the player count most voted "Best" in an item's suggested_numplayers poll.
+
+    Args:
+        item (ET.Element): The `item` element.
+
+    Returns:
+        int | None: The best player count, or None if nobody has voted. Counts like "4+" are ignored.
+    """
+    best_count, best_votes = None, 0
+    for results in item.iterfind("poll[@name='suggested_numplayers']/results"):
+        num_players = results.get("numplayers", "")
+        if not num_players.isdigit():
+            continue
+        for result in results.iterfind("result[@value='Best']"):
+            votes = int(result.get("numvotes", "0") or 0)
+            if votes > best_votes:
+                best_count, best_votes = int(num_players), votes
+    return best_count
+
+
+def parse_thing_item(item: ET.Element) -> GameDetails:
+    """Turns one `item` element of a `thing?stats=1` response into a game's statistics and mechanics.
+
+    Args:
+        item (ET.Element): The `item` element.
+
+    Returns:
+        GameDetails: The validated statistics and mechanics. Statistics that fail validation are
+            left out and the reason recorded in `error`, the mechanics are kept either way.
+    """
+    game_id = int(item.get("id"))
+    mechanics = []
+    for link in item.iterfind("link[@type='boardgamemechanic']"):
+        try:
+            mechanics.append(GameMechanic(id=game_id, mechanic_name=link.get("value")))
+        except ValidationError as e:
+            logger.error(f"Mechanic of game {game_id} failed validation: {e}")
+
+    description = item.findtext("description")
+    try:
+        statistics = GameStatistics(
+            id=game_id,
+            description="" if description is None else description.strip(),
+            year_published=_int_value(item, "yearpublished"),
+            min_players=_int_value(item, "minplayers"),
+            max_players=_int_value(item, "maxplayers"),
+            suggested_num_player=suggested_num_players(item),
+            min_age=_int_value(item, "minage"),
+            average_rating=_float_value(item, "statistics/ratings/average"),
+            average_weight=_float_value(item, "statistics/ratings/averageweight"),
+        )
+    except ValidationError as e:
+        fields = ", ".join(str(error["loc"][0]) if error["loc"] else error["msg"] for error in e.errors())
+        return GameDetails(game_id=game_id, mechanics=mechanics, error=f"Statistics failed validation: {fields}")
+    return GameDetails(game_id=game_id, statistics=statistics, mechanics=mechanics)
+
+
+def iter_thing_items(source: bytes | BinaryIO) -> Iterator[GameDetails]:
+    """Streams the games out of an XML API `thing?stats=1` response with iterparse.
+
+    Each `item` is parsed as soon as its closing tag is read and then cleared, so memory stays
+    bounded by one item however many ids the response holds.
+
+    Args:
+        source (bytes | BinaryIO): The XML document or a binary file-like object to read it from.
+
+    Returns:
+        Iterator[GameDetails]: The details of each game, in document order.
+
+    Raises:
+        ValueError: If the XML is malformed.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        for _, element in ET.iterparse(source, events=("end",)):
+            if element.tag != "item":
+                continue
+            if element.get("type", "boardgame") in ("boardgame", "boardgameexpansion"):
+                with timed(PARSE_SECONDS, {"backend": "xml"}):
+                    details = parse_thing_item(element)
+                metrics.counter(ROWS_VALIDATED if details.ok else ROWS_REJECTED, {"dataset": "statistics"}).inc()
+                yield details
+            element.clear()
+    except ET.ParseError as e:
+        raise ValueError(f"XML content could not be parsed: {e}")
@@ -1,82 +1,1067 @@
 # src/pipeline.py
-from database import engine, Base, SessionLocal
-from models import Game
-from schemas import GameRankCreate
-from sources.html_pages import HTMLPages
-from parsers.html_parsers import parse_html_ranking_page, get_html_last_page_number
-from utils.logging_config import setup_logging
+# Each stage imports the heavy modules it needs when it runs: the db modules pull in SQLAlchemy, the
+# sources httpx and the parsers bs4 and lxml. Fetching and parsing, e.g. an Airflow fetch task or
+# `bgg-pipeline crawl`, never load SQLAlchemy, and loading and exporting, e.g. the DAG's load task or
+# `bgg-pipeline load`, never load httpx, bs4 or lxml.
+from __future__ import annotations
+from crawl_bounds import BoundedRankingCrawl, CrawlBounds
+from ranking_batch import RankingBatch
+from schemas import GameRank, GameRankCreate, RowRejection
+from sources.page_cache import RawPageCache
+from exports.parquet_export import RankingsParquetWriter, export_rankings
+from parsers.backends import DEFAULT_PARSER_BACKEND
+from utils.logging_config import get_logger, setup_logging
+from utils.metrics import DB_COMMIT_SECONDS, STAGE_SECONDS, record_run, timed
+from utils.streaming import prefetch, batched
+import os
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import nullcontext
+from datetime import date
 from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from parsers.html_parsers import ParsedRankingPage
+    from parsers.parallel_parsers import PageParseResult
+    from parsers.parse_cache import ParseResultCache
+    from sources.html_pages import HTMLPages
+    from sources.xml_api import XMLAPIThings
 
-logger = setup_logging()
 
+logger = get_logger(__name__)
 
-def gather_game_id_names_ranks_from_html_pages() -> list[GameRankCreate]:
+
+def gather_game_id_names_ranks_from_html_pages(
+        max_concurrency: int | None = None,
+        requests_per_s: float = 0.5,
+        max_requests_per_s: float | None = None,
+        burst: int = 1,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        cache: RawPageCache | None = None,
+        replay: bool = False,
+        crawl_date: date | None = None,
+        checkpoint_path: str | None = None,
+        parse_cache: ParseResultCache | None = None,
+        bounds: CrawlBounds | None = None,
+        ) -> RankingBatch:
     """
     Brings together the html pages source and the parsers to gather the game ids, names and ranks from the browse page on bgg's website.
 
+    Args:
+        max_concurrency (int | None, optional): If set, pages after page 1 are fetched concurrently
+            with AsyncHTMLPages using this many requests in flight, or by this many threads sharing
+            the cache when one is given. AsyncHTMLPages tries each page once, so the pages it misses
+            are fetched again through HTMLPages and its retry policies. Ignored with `checkpoint_path`,
+            which crawls serially. Defaults to None, a serial crawl.
+        requests_per_s (float, optional): With `max_concurrency`, the request budget shared by every
+            request in flight, threads and AsyncHTMLPages alike. Defaults to 0.5, the pace of a serial crawl.
+        max_requests_per_s (float | None, optional): With `max_concurrency`, the highest budget the
+            limiter may adapt up to while the server keeps answering. Defaults to None, `requests_per_s`.
+        burst (int, optional): With `max_concurrency`, how many requests may go out back to back.
+            Defaults to 1.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        cache (RawPageCache | None, optional): A raw page cache to read pages from and store them in.
+            Defaults to None.
+        replay (bool, optional): If True, run purely from `cache` without touching the network.
+            Defaults to False.
+        crawl_date (date | None, optional): The crawl to read from or store into. Defaults to today.
+        checkpoint_path (str | None, optional): If set, the crawl is checkpointed to this manifest and
+            resumed from it when unfinished. Needs `cache`. Defaults to None.
+        parse_cache (ParseResultCache | None, optional): If set, pages unchanged since they were last
+            parsed are read from this cache instead of being parsed again. Defaults to None.
+        bounds (CrawlBounds | None, optional): Where the crawl may stop before the last page, e.g. after
+            the top N games. Defaults to None, every page.
+
     Returns:
-        collected_game_ids_names_ranks (list[GameRankCreate]): Returns a list of GameRankCreate objects, which is a pydantic validator.
+        collected_game_ids_names_ranks (RankingBatch): The validated games of every page that parsed, in compact columns.
     """
-    html_pages = HTMLPages()
-    page_1 = html_pages.fetch_ranking_page(page=1)
+    from parsers.html_parsers import parse_ranking_page
+    from sources.crawl_checkpoint import ResumableCrawl
+    from sources.html_pages import AsyncHTMLPages, HTMLPages
+    from utils.throttler import AdaptiveTokenBucket
 
-    if page_1 == None:
-        logger.error("PAGE 1 HAS NOT BEEN FETCHED CORRECTLY!")
-        raise ValueError("Page 1 has not been fetched correctly!")
+    html_pages_options = {}
+    if max_concurrency is not None:
+        # The fixed delay RateLimiter sleeps holding its lock, which would serialise the threads.
+        html_pages_options = {
+            "limiter": AdaptiveTokenBucket(rate_per_s=requests_per_s, capacity=burst, max_rate_per_s=max_requests_per_s),
+            "max_keepalive_connections": max(max_concurrency, 4),
+        }
+    with HTMLPages(cache=cache, crawl_date=crawl_date, replay=replay, **html_pages_options) as html_pages:
+        page_1 = html_pages.fetch_ranking_page(page=1)
+
+        if page_1 == None:
+            logger.error("PAGE 1 HAS NOT BEEN FETCHED CORRECTLY!")
+            raise ValueError("Page 1 has not been fetched correctly!")
     
-    else:
-        max_page_number = get_html_last_page_number(page_1)
+        else:
+            # Page 1 is parsed once for its last page number, its page size and its rows.
+            parsed_page_1 = parse_ranking_page(page_1, backend=parser_backend)
+            max_page_number = parsed_page_1.last_page_number
+
+            if max_page_number != None:
+                crawl = BoundedRankingCrawl(bounds or CrawlBounds())
+                max_page_number = bounded_last_page(parsed_page_1, crawl.bounds)
+                resumable_crawl = None
+                if checkpoint_path is not None:
+                    # Page 1 is served from the cache on this pass, so the crawl covers every page.
+                    resumable_crawl = ResumableCrawl(html_pages, checkpoint_path)
+                    collected_pages = resumable_crawl.iter_ranking_pages(start=1, stop=max_page_number)
+                elif max_concurrency is None:
+                    # Fetched lazily, so a crawl that stops early at its bounds fetches no more pages.
+                    collected_pages = chain([(1, page_1)], html_pages.iter_ranking_pages(start=2, stop=max_page_number))
+                else:
+                    if cache is not None:
+                        # AsyncHTMLPages does not use the cache, so a cached crawl is fetched by threads instead.
+                        fetched_pages = html_pages.fetch_ranking_pages(start=2, stop=max_page_number, max_workers=max_concurrency)
+                    else:
+                        async_html_pages = AsyncHTMLPages(
+                            requests_per_s=requests_per_s,
+                            max_requests_per_s=max_requests_per_s,
+                            burst=burst,
+                            max_concurrency=max_concurrency,
+                        )
+                        fetched_pages = async_html_pages.fetch_ranking_pages(start=2, stop=max_page_number)
+                        missed_pages = [page for page, html in enumerate(fetched_pages, start=2) if html is None]
+                        if missed_pages:
+                            logger.warning(f"RETRYING {len(missed_pages)} PAGES THE CONCURRENT FETCH MISSED")
+                        for page in missed_pages:
+                            fetched_pages[page - 2] = html_pages.fetch_ranking_page(page=page)
+                    fetched_pages.insert(0, page_1)
+                    collected_pages = enumerate(fetched_pages, start=1)
+
+                # bring these together
+                collected_game_ids_names_ranks = RankingBatch.from_games(parse_ranking_page_stream(
+                    collected_pages,
+                    parser_backend=parser_backend,
+                    parse_cache=parse_cache,
+                    crawl=crawl,
+                ))
+                if resumable_crawl is not None and crawl.finished:
+                    resumable_crawl.finish()
+
+                return collected_game_ids_names_ranks
+            else:
+                logger.error("COUILD NOT FIND A MAX PAGE NUMBER FROM PAGE 1!")
+                raise ValueError("Could not find a max page number from page 1!")
+
+
+def stream_ranking_pages(
+        html_pages: HTMLPages,
+        start: int,
+        stop: int,
+        max_buffered_pages: int = 8,
+        ) -> Iterator[tuple[int, str | None]]:
+    """
+    Fetch stage of the streaming pipeline. Pages are fetched in a background thread so the
+    network I/O overlaps with parsing and writing further down the stream.
+
+    Args:
+        html_pages (HTMLPages): The source to fetch the pages with.
+        start (int): The starting page number (inclusive).
+        stop (int): The ending page number (inclusive).
+        max_buffered_pages (int, optional): How many fetched pages may wait to be parsed before
+            fetching pauses. Defaults to 8.
+
+    Returns:
+        Iterator[tuple[int, str | None]]: The page number and raw HTML of each page, in page order.
+    """
+    return prefetch(html_pages.iter_ranking_pages(start=start, stop=stop), max_buffered=max_buffered_pages)
+
+
+def with_first_page(page_1: str | None, pages: Iterator[tuple[int, str | None]]) -> Iterator[tuple[int, str | None]]:
+    """
+    Puts page 1 in front of the pages after it. Unlike `chain`, closing the stream closes `pages`.
+
+    Args:
+        page_1 (str | None): The raw HTML of page 1.
+        pages (Iterator[tuple[int, str | None]]): The page number and raw HTML of the pages after page 1.
+
+    Returns:
+        Iterator[tuple[int, str | None]]: Page 1 and then `pages`.
+    """
+    yield 1, page_1
+    yield from pages
+
+
+def parse_ranking_page_stream(
+        pages: Iterable[tuple[int, str | None]],
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        parse_cache: ParseResultCache | None = None,
+        crawl: BoundedRankingCrawl | None = None,
+        ) -> Iterator[GameRank]:
+    """
+    Parse and validate stage of the streaming pipeline. Each page is validated as one batch.
+    Pages that failed to fetch or parse, and rows that failed validation, are logged and skipped.
+    Breaks in the ranks between pages are logged, and the stream ends once `crawl` reaches its
+    bounds, so a lazy `pages` fetches no further pages.
+
+    Args:
+        pages (Iterable[tuple[int, str | None]]): The page number and raw HTML of each page.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        parse_cache (ParseResultCache | None, optional): If set, pages unchanged since they were last
+            parsed are read from this cache instead of being parsed again. Defaults to None.
+        crawl (BoundedRankingCrawl | None, optional): Follows the crawl's ranks and bounds. Defaults to
+            None, a new BoundedRankingCrawl with no bounds.
+
+    Returns:
+        Iterator[GameRank]: The validated games, one page at a time.
+    """
+    from parsers.html_parsers import parse_html_ranking_page_batch
+
+    crawl = crawl if crawl is not None else BoundedRankingCrawl()
+    parse_batch = parse_cache.parse_ranking_page_batch if parse_cache is not None else parse_html_ranking_page_batch
+    for page_number, page in pages:
+        if page is None:
+            logger.error(f"PAGE {page_number} WAS NOT FETCHED, SKIPPING IT")
+            continue
+        try:
+            batch = parse_batch(page, backend=parser_backend)
+        except ValueError as e:
+            logger.error(f"PAGE {page_number} FAILED TO PARSE, SKIPPING IT: {e}")
+        else:
+            log_rejections(page_number, batch.rejections)
+            yield from crawl.accept_page(page_number, list(batch), unranked=batch.unranked)
+        if crawl.finished:
+            # Stops a prefetching source from fetching further pages.
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+            return
+
+
+def log_rejections(page_number: int, rejections: list[RowRejection]) -> None:
+    """
+    Logs the rows of a page that failed validation.
+
+    Args:
+        page_number (int): The page the rows came from.
+        rejections (list[RowRejection]): The rejected rows.
+    """
+    for rejection in rejections:
+        logger.error(f"PAGE {page_number} ROW {rejection.index} FAILED VALIDATION, SKIPPING IT: {rejection.row} {rejection.errors}")
+
+
+def collect_parse_results(
+        results: Iterable[PageParseResult],
+        crawl: BoundedRankingCrawl | None = None,
+        ) -> Iterator[GameRank]:
+    """
+    Turns the per-page results of the parallel parse stage back into a stream of games, logging
+    and skipping the pages that failed.
+
+    Args:
+        results (Iterable[PageParseResult]): The result of parsing each page.
+        crawl (BoundedRankingCrawl | None, optional): Follows the crawl's ranks and bounds, ending the
+            stream once they are reached. Defaults to None, a new BoundedRankingCrawl with no bounds.
+
+    Returns:
+        Iterator[GameRank]: The validated games, one page at a time.
+    """
+    crawl = crawl if crawl is not None else BoundedRankingCrawl()
+    for result in results:
+        if not result.ok:
+            logger.error(f"PAGE {result.page_number} FAILED TO PARSE, SKIPPING IT: {result.error}")
+        else:
+            log_rejections(result.page_number, result.rejections)
+            yield from crawl.accept_page(result.page_number, list(result.games), unranked=result.unranked)
+        if crawl.finished:
+            close = getattr(results, "close", None)
+            if close is not None:
+                close()
+            return
+
+
+def bounded_last_page(page_1: ParsedRankingPage, bounds: CrawlBounds) -> int:
+    """
+    Works out the last page a crawl needs from page 1's last page link and how many games it holds.
 
-        if max_page_number != None:
-            collected_pages = html_pages.fetch_ranking_pages(start=2, stop=max_page_number)
-            collected_pages.insert(0, page_1)
+    Args:
+        page_1 (ParsedRankingPage): Page 1, parsed.
+        bounds (CrawlBounds): The crawl's bounds.
 
-            collected_game_ids_names_ranks = []
+    Returns:
+        int: The last page to fetch.
+
+    Raises:
+        ValueError: If page 1 has no last page link.
+    """
+    last_page = page_1.last_page_number
+    if bounds.top_n is None:
+        return last_page
+    bounded_page = bounds.last_page(page_1.page_size, last_page)
+    logger.info(f"CRAWLING {bounded_page} OF {last_page} PAGES FOR THE TOP {bounds.top_n} GAMES")
+    return bounded_page
+
+
+def write_game_ranks_in_batches(
+        game_ranks: Iterable[GameRank],
+        batch_size: int = 1000,
+        incremental: bool = False,
+        history_date: date | None = None,
+        exporter: RankingsParquetWriter | None = None,
+        crawled: RankingBatch | None = None,
+        ) -> int:
+    """
+    Write stage of the streaming pipeline. Games are inserted and committed every `batch_size`
+    rows, so only one batch is ever held in memory. Batches committed before a failure are kept.
+
+    Args:
+        game_ranks (Iterable[GameRank]): The validated games to insert.
+        batch_size (int, optional): How many rows to insert per commit. Defaults to 1000.
+        incremental (bool, optional): If True, upsert the games so only new or changed rows are
+            written, instead of a plain insert. Defaults to False.
+        history_date (date | None, optional): If set, each batch is also recorded in the rank history
+            under this crawl date. Defaults to None.
+        exporter (RankingsParquetWriter | None, optional): If set, each batch is also written to this
+            open Parquet export. Defaults to None.
+        crawled (RankingBatch | None, optional): If set, each committed batch is also appended to this
+            batch. Defaults to None.
+
+    Returns:
+        rows_written (int): The number of rows committed to the db.
+    """
+    from database import get_session
+    from history import record_snapshot
+    from loaders import UpsertStats, insert_ranking_batch, upsert_game_batch
+
+    rows_written = 0
+    stats = UpsertStats()
+    db = get_session()
+    try:
+        for batch in batched(game_ranks, batch_size):
+            ranking_batch = RankingBatch.from_games(batch)
+            with timed(DB_COMMIT_SECONDS, {"table": "games"}):
+                if incremental:
+                    stats += upsert_game_batch(db, batch)
+                else:
+                    insert_ranking_batch(db, ranking_batch)
+                if history_date is not None:
+                    record_snapshot(db, history_date, batch)
+                db.commit()
+            if exporter is not None:
+                exporter.write_batch(ranking_batch)
+            if crawled is not None:
+                crawled.extend(ranking_batch)
+            rows_written += len(batch)
+            logger.info(f"COMMITTED BATCH OF {len(batch)} GAMES ({rows_written} IN TOTAL)")
+        if incremental:
+            logger.info(f"UPSERT RESULT: {stats.inserted} INSERTED, {stats.updated} UPDATED, {stats.unchanged} UNCHANGED")
+        return rows_written
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"STREAMING INSERT FAILED AFTER {rows_written} ROWS WITH FOLLOWING ERROR: \n{e}")
+        raise e
+
+    finally:
+        db.close()
+
+
+def streaming_pipeline(
+        batch_size: int = 1000,
+        max_buffered_pages: int = 8,
+        parse_workers: int | None = None,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        cache: RawPageCache | None = None,
+        replay: bool = False,
+        crawl_date: date | None = None,
+        incremental: bool = False,
+        record_history: bool = False,
+        export_dir: str | None = None,
+        checkpoint_path: str | None = None,
+        parse_cache: ParseResultCache | None = None,
+        bounds: CrawlBounds | None = None,
+        crawled: RankingBatch | None = None,
+        ) -> int:
+    """
+    Runs the fetch -> parse -> validate -> write stages as a stream. Memory stays proportional to
+    `batch_size` and `max_buffered_pages` rather than to the number of pages crawled.
+
+    Args:
+        batch_size (int, optional): How many rows to insert per commit. Defaults to 1000.
+        max_buffered_pages (int, optional): How many fetched pages may wait to be parsed.
+            Defaults to 8.
+        parse_workers (int | None, optional): If set, pages are parsed across this many worker
+            processes. Defaults to None, parsing in the current process.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        cache (RawPageCache | None, optional): A raw page cache to read pages from and store them in.
+            Defaults to None.
+        replay (bool, optional): If True, run purely from `cache`. Defaults to False.
+        crawl_date (date | None, optional): The crawl to read from or store into. Defaults to today.
+        incremental (bool, optional): If True, upsert rather than insert the games. Defaults to False.
+        record_history (bool, optional): If True, also record the ranks in the rank history under the
+            crawl date. Defaults to False.
+        export_dir (str | None, optional): If set, the rankings are also exported to Parquet under
+            this folder, partitioned by crawl date. Defaults to None.
+        checkpoint_path (str | None, optional): If set, the crawl is checkpointed to this manifest and
+            resumed from it when unfinished. Needs `cache`. Defaults to None.
+        parse_cache (ParseResultCache | None, optional): If set, pages unchanged since they were last
+            parsed are read from this cache instead of being parsed again. Defaults to None.
+        bounds (CrawlBounds | None, optional): Where the crawl may stop before the last page, e.g. after
+            the top N games. Fetching stops soon after the bounds are reached. Defaults to None, every page.
+        crawled (RankingBatch | None, optional): If set, every game written is also appended to this
+            batch, e.g. to plan a detail refresh from the crawl. Defaults to None.
+
+    Returns:
+        rows_written (int): The number of rows committed to the db.
+    """
+    from parsers.html_parsers import parse_ranking_page
+    from parsers.parallel_parsers import parse_html_ranking_pages_parallel
+    from sources.crawl_checkpoint import ResumableCrawl
+    from sources.html_pages import HTMLPages
+
+    with HTMLPages(cache=cache, crawl_date=crawl_date, replay=replay) as html_pages:
+        page_1 = html_pages.fetch_ranking_page(page=1)
 
-            for page in collected_pages:
-                collected_game_ids_names_ranks.append(parse_html_ranking_page(page))
-            
-            # bring these together
-            collected_game_ids_names_ranks = list(chain.from_iterable(collected_game_ids_names_ranks))
+        if page_1 == None:
+            logger.error("PAGE 1 HAS NOT BEEN FETCHED CORRECTLY!")
+            raise ValueError("Page 1 has not been fetched correctly!")
 
-            return collected_game_ids_names_ranks
+        parsed_page_1 = parse_ranking_page(page_1, backend=parser_backend)
+        crawl = BoundedRankingCrawl(bounds or CrawlBounds())
+        max_page_number = bounded_last_page(parsed_page_1, crawl.bounds)
+        resumable_crawl = None
+        if checkpoint_path is not None:
+            resumable_crawl = ResumableCrawl(html_pages, checkpoint_path)
+            pages = prefetch(resumable_crawl.iter_ranking_pages(start=1, stop=max_page_number), max_buffered=max_buffered_pages)
         else:
-            logger.error("COUILD NOT FIND A MAX PAGE NUMBER FROM PAGE 1!")
-            raise ValueError("Could not find a max page number from page 1!")
+            pages = with_first_page(
+                page_1,
+                stream_ranking_pages(html_pages, start=2, stop=max_page_number, max_buffered_pages=max_buffered_pages),
+            )
+        if parse_workers is None:
+            game_ranks = parse_ranking_page_stream(pages, parser_backend=parser_backend, parse_cache=parse_cache, crawl=crawl)
+        else:
+            game_ranks = collect_parse_results(parse_html_ranking_pages_parallel(
+                pages,
+                max_workers=parse_workers,
+                backend=parser_backend,
+                parse_cache=parse_cache,
+            ), crawl=crawl)
+        exporter = None
+        if export_dir is not None:
+            exporter = RankingsParquetWriter(html_pages.crawl_date, root=export_dir)
+        with exporter or nullcontext():
+            rows_written = write_game_ranks_in_batches(
+                game_ranks,
+                batch_size=batch_size,
+                incremental=incremental,
+                history_date=html_pages.crawl_date if record_history else None,
+                exporter=exporter,
+                crawled=crawled,
+            )
+        if resumable_crawl is not None and crawl.finished:
+            # Stops the prefetch thread first, so none of its checkpoint saves land after the last one.
+            pages.close()
+            resumable_crawl.finish()
+        return rows_written
 
 
-def main_pipeline() -> None:
-    # Initialise the database
-    Base.metadata.create_all(bind=engine)
+def load_game_ranks(
+        game_ranks: RankingBatch | list[GameRankCreate],
+        incremental: bool = False,
+        record_history: bool = False,
+        crawl_date: date | None = None,
+        batch_size: int = 1000,
+        ) -> None:
+    """
+    Loads gathered game ids, names and ranks into the db.
 
-    # Collect and process game ids, names and ranks
-    logger.info("STARTING TO GATHER GAME IDS, NAMES AND RANKS")
-    collected_game_ids_names_ranks = gather_game_id_names_ranks_from_html_pages()
-    logger.info("COMPLETED GATHERING GAME IDS, NAMES AND RANKS")
+    Args:
+        game_ranks (RankingBatch | list[GameRankCreate]): The validated games.
+        incremental (bool, optional): If True, upsert the games so a re-run only touches rows whose
+            rank or name changed, instead of a bulk insert that fails on existing ids. Defaults to False.
+        record_history (bool, optional): If True, also record the ranks in the rank history under
+            `crawl_date`. Defaults to False.
+        crawl_date (date | None, optional): The date of the crawl. Defaults to today.
+        batch_size (int, optional): How many rows to upsert per commit. Defaults to 1000.
+    """
+    from database import get_session
+    from history import record_snapshot
+    from loaders import insert_ranking_batch, upsert_games
 
     logger.info("GETTING LOCAL DB SESSION")
-    db = SessionLocal()
+    db = get_session()
     try:
-        games = [
-            {
-                "id": item.id,
-                "name": item.name,
-                "rank": item.rank
-            } for item in collected_game_ids_names_ranks
-        ]
-        logger.info("INSERTING GAME IDS, NAMES AND RANKS INTO DB")
-        db.bulk_insert_mappings(Game, games) # type: ignore
-        logger.info("COMMITING TO DB")
-        db.commit()
+        with timed(DB_COMMIT_SECONDS, {"table": "games"}):
+            if incremental:
+                logger.info("UPSERTING GAME IDS, NAMES AND RANKS INTO DB")
+                stats = upsert_games(db, game_ranks, batch_size=batch_size)
+                logger.info(f"UPSERT RESULT: {stats.inserted} INSERTED, {stats.updated} UPDATED, {stats.unchanged} UNCHANGED")
+            else:
+                if not isinstance(game_ranks, RankingBatch):
+                    game_ranks = RankingBatch.from_games(game_ranks)
+                logger.info("INSERTING GAME IDS, NAMES AND RANKS INTO DB")
+                insert_ranking_batch(db, game_ranks)
+            if record_history:
+                logger.info("RECORDING RANK HISTORY SNAPSHOT")
+                record_snapshot(db, crawl_date or date.today(), game_ranks)
+            logger.info("COMMITING TO DB")
+            db.commit()
 
     except Exception as e:
         db.rollback()
-        logger.error(f"BULK INSERT OF GAME IDS, NAMES AND RANKS FAILED WITH FOLLOWING ERROR: \n{e}")
+        logger.error(f"LOADING GAME IDS, NAMES AND RANKS FAILED WITH FOLLOWING ERROR: \n{e}")
         raise e
     
     finally:
         db.close()
 
 
-main_pipeline()
\ No newline at end of file
+def load_game_details(
+        game_ids: Iterable[int],
+        xml_api: XMLAPIThings | None = None,
+        commit_every: int = 500,
+        fetched_on: date | None = None,
+        ) -> int:
+    """
+    Fetches the statistics and mechanics of games from the XML API and loads them into the db.
+
+    Games whose details are rejected, or that the API does not return, are only marked as fetched,
+    so the refresh scheduler waits out their TTL instead of asking for them on every run.
+
+    Args:
+        game_ids (Iterable[int]): The games to fetch.
+        xml_api (XMLAPIThings | None, optional): The XML API source. Defaults to a new XMLAPIThings.
+        commit_every (int, optional): How many games to write per commit. Defaults to 500.
+        fetched_on (date | None, optional): The date to record the details as fetched on. Defaults to today.
+
+    Returns:
+        int: The number of games whose statistics were loaded.
+    """
+    from database import get_session
+    from loaders import mark_details_fetched, replace_game_mechanics, upsert_game_statistics
+    from sources.xml_api import XMLAPIThings
+
+    logger.info("GETTING LOCAL DB SESSION")
+    db = get_session()
+    games_loaded = 0
+    try:
+        with xml_api if xml_api is not None else XMLAPIThings() as source:
+            logger.info("STARTING TO LOAD GAME STATISTICS AND MECHANICS INTO DB")
+            for batch in batched(source.iter_game_details(game_ids), commit_every):
+                rejected = [details for details in batch if not details.ok]
+                for details in rejected:
+                    logger.error(f"GAME {details.game_id} REJECTED: {details.error}")
+                with timed(DB_COMMIT_SECONDS, {"table": "game_statistics"}):
+                    games_loaded += upsert_game_statistics(
+                        db,
+                        (details.statistics for details in batch if details.ok),
+                        fetched_on=fetched_on,
+                    )
+                    mark_details_fetched(db, (details.game_id for details in rejected), fetched_on=fetched_on)
+                    # A rejected game keeps the mechanics it already has.
+                    replace_game_mechanics(
+                        db,
+                        (details.game_id for details in batch if details.ok),
+                        (mechanic for details in batch if details.ok for mechanic in details.mechanics),
+                    )
+                    db.commit()
+        logger.info(f"COMPLETED LOADING STATISTICS OF {games_loaded} GAMES INTO DB")
+        return games_loaded
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"LOADING GAME STATISTICS AND MECHANICS FAILED WITH FOLLOWING ERROR: \n{e}")
+        raise e
+
+    finally:
+        db.close()
+
+
+def refresh_game_details(
+        game_ranks: Iterable,
+        previous_ranks: dict[int, int | None],
+        crawl_date: date | None = None,
+        rank_change_threshold: int = 100,
+        limit: int | None = None,
+        xml_api: XMLAPIThings | None = None,
+        ) -> int:
+    """
+    Fetches the details of the games the latest crawl changed, or whose details went stale.
+
+    Only the games of the crawl are considered, so games in the Games table that a bounded or
+    partial crawl did not reach are not judged by their old ranks.
+
+    Args:
+        game_ranks (Iterable): The games the crawl gathered, anything with id and rank, e.g. a RankingBatch.
+        previous_ranks (dict[int, int | None]): The ranks in the Games table from before the crawl was loaded.
+        crawl_date (date | None, optional): The date of the crawl. Defaults to today.
+        rank_change_threshold (int, optional): How many places a game must move to be refetched. Defaults to 100.
+        limit (int | None, optional): The most games to fetch. Defaults to None.
+        xml_api (XMLAPIThings | None, optional): The XML API source. Defaults to a new XMLAPIThings.
+
+    Returns:
+        int: The number of games whose statistics were loaded.
+    """
+    from database import get_session
+    from refresh_scheduler import schedule_detail_refresh
+
+    logger.info("PLANNING GAME DETAIL REFRESH")
+    db = get_session()
+    try:
+        tasks = schedule_detail_refresh(
+            db,
+            game_ranks,
+            previous_ranks=previous_ranks,
+            today=crawl_date,
+            rank_change_threshold=rank_change_threshold,
+            limit=limit,
+        )
+    finally:
+        db.close()
+    reasons = Counter(task.reason.name for task in tasks)
+    logger.info(f"{len(tasks)} GAMES NEED DETAILS: {dict(reasons)}")
+    return load_game_details((task.game_id for task in tasks), xml_api=xml_api, fetched_on=crawl_date)
+
+
+# ------------ Sharded stages, run as separate tasks by the Airflow DAG ------------
+DEFAULT_STAGING_DIR = "data/staging"
+
+
+def discover_last_page(
+        cache_dir: str | None = None,
+        crawl_date: date | None = None,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        html_pages: HTMLPages | None = None,
+        top_n: int | None = None,
+        ) -> int:
+    """
+    Fetches page 1 into the raw page store and finds the last ranking page from it.
+
+    Args:
+        cache_dir (str | None, optional): The raw page store shared by every task. Defaults to the default RawPageCache.
+        crawl_date (date | None, optional): The crawl the pages belong to. Defaults to today.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        html_pages (HTMLPages | None, optional): The source to fetch with. Defaults to a new HTMLPages on the store.
+        top_n (int | None, optional): If set, only the pages holding the best `top_n` games are crawled,
+            so the last of those is returned. Defaults to None.
+
+    Returns:
+        int: The last page number.
+    """
+    from parsers.html_parsers import parse_ranking_page
+    from sources.html_pages import HTMLPages
+
+    cache = RawPageCache(root=cache_dir) if cache_dir is not None else RawPageCache()
+    with html_pages if html_pages is not None else HTMLPages(cache=cache, crawl_date=crawl_date) as source:
+        page_1 = source.fetch_ranking_page(page=1)
+    if page_1 is None:
+        logger.error("PAGE 1 HAS NOT BEEN FETCHED CORRECTLY!")
+        raise ValueError("Page 1 has not been fetched correctly!")
+    parsed_page_1 = parse_ranking_page(page_1, backend=parser_backend)
+    max_page_number = parsed_page_1.last_page_number
+    if max_page_number is None:
+        logger.error("COUILD NOT FIND A MAX PAGE NUMBER FROM PAGE 1!")
+        raise ValueError("Could not find a max page number from page 1!")
+    logger.info(f"FOUND {max_page_number} RANKING PAGES")
+    return bounded_last_page(parsed_page_1, CrawlBounds(top_n=top_n))
+
+
+def plan_page_shards(last_page: int, shard_size: int = 50) -> list[tuple[int, int]]:
+    """
+    Splits pages 1 to `last_page` into contiguous shards.
+
+    Args:
+        last_page (int): The last page number.
+        shard_size (int, optional): The most pages per shard. Defaults to 50.
+
+    Returns:
+        list[tuple[int, int]]: The first and last page (inclusive) of each shard, in page order.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+    return [(start, min(start + shard_size - 1, last_page)) for start in range(1, last_page + 1, shard_size)]
+
+
+def fetch_page_shard(
+        start: int,
+        stop: int,
+        cache_dir: str | None = None,
+        crawl_date: date | None = None,
+        html_pages: HTMLPages | None = None,
+        fetch_workers: int | None = None,
+        ) -> int:
+    """
+    Fetches a shard of ranking pages into the raw page store.
+
+    Pages already stored for the crawl are not fetched again, so a retried shard only fetches the
+    pages its last attempt missed.
+
+    Args:
+        start (int): The first page of the shard (inclusive).
+        stop (int): The last page of the shard (inclusive).
+        cache_dir (str | None, optional): The raw page store shared by every task. Defaults to the default RawPageCache.
+        crawl_date (date | None, optional): The crawl the pages belong to. Defaults to today.
+        html_pages (HTMLPages | None, optional): The source to fetch with. Defaults to a new HTMLPages on the store.
+        fetch_workers (int | None, optional): If set, the pages are fetched by this many threads sharing
+            one client and rate limiter. Defaults to None, one page after another.
+
+    Returns:
+        int: The number of pages in the shard.
+
+    Raises:
+        RuntimeError: If any page failed, so the task is retried.
+    """
+    from sources.html_pages import HTMLPages
+
+    cache = RawPageCache(root=cache_dir) if cache_dir is not None else RawPageCache()
+    with html_pages if html_pages is not None else HTMLPages(cache=cache, crawl_date=crawl_date) as source:
+        results = source.fetch_ranking_page_results(start, stop, max_workers=fetch_workers)
+    failed_pages = [page for page, result in enumerate(results, start=start) if not result.ok]
+    if failed_pages:
+        logger.error(f"PAGES {failed_pages} OF SHARD {start}-{stop} FAILED TO FETCH")
+        raise RuntimeError(f"{len(failed_pages)} pages of shard {start}-{stop} failed to fetch: {failed_pages}")
+    logger.info(f"FETCHED SHARD {start}-{stop} INTO THE RAW PAGE STORE")
+    return stop - start + 1
+
+
+def shard_path(staging_dir: str, crawl_date: date, start: int, stop: int) -> Path:
+    """The file a parsed shard is staged in: <staging_dir>/<crawl_date>/pages-<start>-<stop>.rankings"""
+    return Path(staging_dir) / crawl_date.isoformat() / f"pages-{start:05d}-{stop:05d}.rankings"
+
+
+def parse_page_shard(
+        start: int,
+        stop: int,
+        staging_dir: str = DEFAULT_STAGING_DIR,
+        cache_dir: str | None = None,
+        crawl_date: date | None = None,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        parse_cache_dir: str | None = None,
+        top_n: int | None = None,
+        ) -> str:
+    """
+    Parses a shard of pages from the raw page store and stages the games for the load.
+
+    The pages are replayed from the store without touching the network, and the games written as a
+    serialised RankingBatch.
+
+    Args:
+        start (int): The first page of the shard (inclusive).
+        stop (int): The last page of the shard (inclusive).
+        staging_dir (str, optional): Where parsed shards are staged. Defaults to "data/staging".
+        cache_dir (str | None, optional): The raw page store shared by every task. Defaults to the default RawPageCache.
+        crawl_date (date | None, optional): The crawl the pages belong to. Defaults to today.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        parse_cache_dir (str | None, optional): If set, pages unchanged since an earlier crawl are read
+            from the parse cache in this folder instead of being parsed again. Defaults to None.
+        top_n (int | None, optional): If set, games ranked worse than `top_n` are left out, like the
+            in-process crawl, since the last page fetched usually holds some. Defaults to None.
+
+    Returns:
+        str: The path of the staged shard.
+    """
+    from parsers.parse_cache import ParseResultCache
+    from sources.html_pages import HTMLPages
+
+    crawl_date = crawl_date or date.today()
+    cache = RawPageCache(root=cache_dir) if cache_dir is not None else RawPageCache()
+    parse_cache = ParseResultCache(root=parse_cache_dir) if parse_cache_dir is not None else None
+    with HTMLPages(cache=cache, crawl_date=crawl_date, replay=True) as html_pages:
+        batch = RankingBatch.from_games(parse_ranking_page_stream(
+            html_pages.iter_ranking_pages(start, stop),
+            parser_backend=parser_backend,
+            parse_cache=parse_cache,
+            crawl=BoundedRankingCrawl(CrawlBounds(top_n=top_n)),
+        ))
+    path = shard_path(staging_dir, crawl_date, start, stop)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(batch.to_bytes())
+    os.replace(tmp_path, path)
+    logger.info(f"PARSED {len(batch)} GAMES FROM SHARD {start}-{stop} INTO {path}")
+    return str(path)
+
+
+def merge_page_shards(shard_paths: Iterable[str]) -> RankingBatch:
+    """
+    Merges staged shards into one batch, in the order given.
+
+    A game can appear on two pages when ranks shift while the crawl runs, in which case its first
+    appearance is kept.
+
+    Args:
+        shard_paths (Iterable[str]): The staged shards, in page order.
+
+    Returns:
+        RankingBatch: Every game once.
+    """
+    merged = RankingBatch()
+    seen = set()
+    for path in shard_paths:
+        batch = RankingBatch.from_bytes(Path(path).read_bytes())
+        if seen.isdisjoint(batch.ids):
+            merged.extend(batch)
+            seen.update(batch.ids)
+            continue
+        for game in batch:
+            if game.id not in seen:
+                merged.append(*game)
+                seen.add(game.id)
+    return merged
+
+
+def load_page_shards(
+        shard_paths: Iterable[str],
+        incremental: bool = True,
+        record_history: bool = False,
+        crawl_date: date | None = None,
+        batch_size: int = 1000,
+        export_dir: str | None = None,
+        ) -> int:
+    """
+    Merges the staged shards and loads them into the db in one task.
+
+    Args:
+        shard_paths (Iterable[str]): The staged shards, in page order.
+        incremental (bool, optional): If True, upsert the games so a retried load is safe. Defaults to True.
+        record_history (bool, optional): If True, also record the ranks in the rank history. Defaults to False.
+        crawl_date (date | None, optional): The date of the crawl. Defaults to today.
+        batch_size (int, optional): How many rows to upsert per commit. Defaults to 1000.
+        export_dir (str | None, optional): If set, the rankings are also exported to Parquet under this folder.
+            Defaults to None.
+
+    Returns:
+        int: The number of games loaded.
+    """
+    from database import get_engine, init_db
+
+    init_db(get_engine())
+    game_ranks = merge_page_shards(shard_paths)
+    logger.info(f"MERGED {len(game_ranks)} GAMES FROM STAGED SHARDS")
+    load_game_ranks(
+        game_ranks,
+        incremental=incremental,
+        record_history=record_history,
+        crawl_date=crawl_date,
+        batch_size=batch_size,
+    )
+    if export_dir is not None:
+        logger.info("EXPORTING GAME IDS, NAMES AND RANKS TO PARQUET")
+        export_rankings(game_ranks, crawl_date or date.today(), root=export_dir)
+    return len(game_ranks)
+
+
+def export_loaded_rankings(export_dir: str, crawl_date: date | None = None) -> int:
+    """
+    Exports the rankings as they are loaded in the Games table to Parquet.
+
+    Args:
+        export_dir (str): The export root.
+        crawl_date (date | None, optional): The crawl date partition to export into. Defaults to today.
+
+    Returns:
+        int: The number of games exported.
+    """
+    from sqlalchemy import select
+    from database import get_session
+    from models import Game
+
+    db = get_session()
+    try:
+        game_ranks = RankingBatch.from_games(
+            GameRank(*row) for row in db.execute(select(Game.id, Game.rank, Game.name).order_by(Game.rank))
+        )
+    finally:
+        db.close()
+    export_rankings(game_ranks, crawl_date or date.today(), root=export_dir)
+    return len(game_ranks)
+
+
+def main_pipeline(
+        streaming: bool = False,
+        batch_size: int = 1000,
+        parse_workers: int | None = None,
+        max_concurrency: int | None = None,
+        requests_per_s: float = 0.5,
+        max_requests_per_s: float | None = None,
+        burst: int = 1,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        cache_dir: str | None = None,
+        replay: bool = False,
+        crawl_date: date | None = None,
+        incremental: bool = False,
+        record_history: bool = False,
+        bulk_load: bool = False,
+        export_dir: str | None = None,
+        checkpoint_path: str | None = None,
+        refresh_details: bool = False,
+        details_limit: int | None = None,
+        xml_api_token: str | None = None,
+        metrics_dir: str | None = None,
+        parse_cache_dir: str | None = None,
+        top_n: int | None = None,
+        max_rank: int | None = None,
+        stop_on_unranked_page: bool = False,
+        ) -> None:
+    """
+    Gathers the game ids, names and ranks and inserts them into the db.
+
+    Args:
+        streaming (bool, optional): If True, run the stages as a stream with periodic commits
+            instead of collecting every page before a single insert. Defaults to False.
+        batch_size (int, optional): How many rows to insert per commit when streaming or upserting.
+            Defaults to 1000.
+        parse_workers (int | None, optional): If set, pages are parsed across this many worker processes.
+            Only the streaming pipeline parses in workers, so this needs `streaming`. Defaults to None.
+        max_concurrency (int | None, optional): If set, pages are fetched this many at a time, see
+            `gather_game_id_names_ranks_from_html_pages`. Only the collecting pipeline fetches
+            concurrently, so this cannot be used with `streaming`. Defaults to None, one page at a time.
+        requests_per_s (float, optional): With `max_concurrency`, the request budget shared by every
+            request in flight. Defaults to 0.5.
+        max_requests_per_s (float | None, optional): With `max_concurrency`, the highest budget the
+            limiter may adapt up to. Defaults to None, `requests_per_s`.
+        burst (int, optional): With `max_concurrency`, how many requests may go out back to back. Defaults to 1.
+        parser_backend (str, optional): The html parser backend to use. Defaults to "bs4".
+        cache_dir (str | None, optional): If set, raw pages are cached in this folder and revalidated
+            on later runs. Defaults to None, no cache.
+        replay (bool, optional): If True, re-parse the pages cached for `crawl_date` without touching
+            the network. Uses the default cache folder if `cache_dir` is not set. Defaults to False.
+        crawl_date (date | None, optional): The crawl to read from or store into. Defaults to today.
+        incremental (bool, optional): If True, upsert the games so a re-run only touches rows whose
+            rank or name changed, instead of a bulk insert that fails on existing ids. Defaults to False.
+        record_history (bool, optional): If True, also record the ranks in the rank history under the
+            crawl date. Defaults to False.
+        bulk_load (bool, optional): If True, drop the rank history's secondary index and skip SQLite's
+            syncs to disk while loading, see `bulk_load_mode`. Worth it for large first-time loads,
+            mostly with `record_history`. Defaults to False.
+        export_dir (str | None, optional): If set, the rankings are also exported to Parquet under
+            this folder, partitioned by crawl date, for column-wise analysis. Defaults to None.
+        checkpoint_path (str | None, optional): If set, the crawl's progress is checkpointed to this
+            manifest and an unfinished crawl found there is resumed, with its crawl date, instead of
+            started again. Fetched pages are kept in the raw page cache, the default one if `cache_dir`
+            is not set. Pair with `incremental` so rows loaded before an interruption are not
+            inserted twice. Defaults to None.
+        refresh_details (bool, optional): If True, afterwards fetch the statistics and mechanics of the
+            crawled games that are new, moved in the rankings or have stale details from the XML API.
+            Defaults to False.
+        details_limit (int | None, optional): The most games to fetch details of per run, most urgent
+            first. Defaults to None.
+        xml_api_token (str | None, optional): The XML API application token. Defaults to None.
+        metrics_dir (str | None, optional): If set, the run's fetch, parse, validation, db and stage
+            timings are written here as a JSON summary and a Prometheus textfile. Defaults to None.
+        parse_cache_dir (str | None, optional): If set, the games parsed from each page are cached in
+            this folder, so pages unchanged since an earlier run are not parsed again. Defaults to None.
+        top_n (int | None, optional): If set, only crawl the best `top_n` games, fetching just the pages
+            that hold them, e.g. 10 pages for the top 1,000. Defaults to None.
+        max_rank (int | None, optional): If set, skip games ranked worse than this and stop after the
+            page that reaches it. Defaults to None.
+        stop_on_unranked_page (bool, optional): If True, stop after the first page holding unranked games.
+            Defaults to False.
+    """
+    if parse_workers is not None and not streaming:
+        raise ValueError("parse_workers needs streaming, the collecting pipeline parses in the current process")
+    if max_concurrency is not None and streaming:
+        raise ValueError("max_concurrency cannot be used with streaming, the streaming pipeline fetches one page at a time")
+
+    from database import bulk_load_mode, get_engine, get_session, init_db
+    from parsers.parse_cache import ParseResultCache
+    from refresh_scheduler import current_ranks
+    from sources.crawl_checkpoint import ResumableCrawl
+    from sources.xml_api import XMLAPIThings
+
+    with record_run(metrics_dir):
+        # Initialise the database
+        engine = get_engine()
+        init_db(engine)
+        load_context = bulk_load_mode(engine) if bulk_load else nullcontext()
+
+        cache = None
+        if cache_dir is not None:
+            cache = RawPageCache(root=cache_dir)
+        elif replay or checkpoint_path is not None:
+            cache = RawPageCache()
+
+        parse_cache = ParseResultCache(root=parse_cache_dir) if parse_cache_dir is not None else None
+        bounds = CrawlBounds(top_n=top_n, max_rank=max_rank, stop_on_unranked_page=stop_on_unranked_page)
+
+        if checkpoint_path is not None and crawl_date is None:
+            resume_point = ResumableCrawl.resume_point(checkpoint_path)
+            if resume_point is not None:
+                crawl_date = resume_point.crawl_date
+
+        previous_ranks = None
+        if refresh_details:
+            db = get_session()
+            try:
+                previous_ranks = current_ranks(db)
+            finally:
+                db.close()
+
+        if streaming:
+            # Kept only to plan the detail refresh from what was crawled.
+            crawled = RankingBatch() if refresh_details else None
+            logger.info("STARTING TO STREAM GAME IDS, NAMES AND RANKS INTO DB")
+            with load_context, timed(STAGE_SECONDS, {"stage": "stream"}):
+                rows_written = streaming_pipeline(
+                    batch_size=batch_size,
+                    parse_workers=parse_workers,
+                    parser_backend=parser_backend,
+                    cache=cache,
+                    replay=replay,
+                    crawl_date=crawl_date,
+                    incremental=incremental,
+                    record_history=record_history,
+                    export_dir=export_dir,
+                    checkpoint_path=checkpoint_path,
+                    parse_cache=parse_cache,
+                    bounds=bounds,
+                    crawled=crawled,
+                )
+            logger.info(f"COMPLETED STREAMING {rows_written} GAME IDS, NAMES AND RANKS INTO DB")
+            if cache is not None and not replay:
+                cache.evict()
+        else:
+            # Collect and process game ids, names and ranks
+            logger.info("STARTING TO GATHER GAME IDS, NAMES AND RANKS")
+            with timed(STAGE_SECONDS, {"stage": "gather"}):
+                collected_game_ids_names_ranks = gather_game_id_names_ranks_from_html_pages(
+                    max_concurrency=max_concurrency,
+                    requests_per_s=requests_per_s,
+                    max_requests_per_s=max_requests_per_s,
+                    burst=burst,
+                    parser_backend=parser_backend,
+                    cache=cache,
+                    replay=replay,
+                    crawl_date=crawl_date,
+                    checkpoint_path=checkpoint_path,
+                    parse_cache=parse_cache,
+                    bounds=bounds,
+                )
+            logger.info("COMPLETED GATHERING GAME IDS, NAMES AND RANKS")
+            crawled = collected_game_ids_names_ranks
+            if cache is not None and not replay:
+                cache.evict()
+
+            with load_context, timed(STAGE_SECONDS, {"stage": "load"}):
+                load_game_ranks(
+                    collected_game_ids_names_ranks,
+                    incremental=incremental,
+                    record_history=record_history,
+                    crawl_date=crawl_date,
+                    batch_size=batch_size,
+                )
+
+            if export_dir is not None:
+                logger.info("EXPORTING GAME IDS, NAMES AND RANKS TO PARQUET")
+                with timed(STAGE_SECONDS, {"stage": "export"}):
+                    export_rankings(collected_game_ids_names_ranks, crawl_date or date.today(), root=export_dir)
+
+        if refresh_details:
+            with timed(STAGE_SECONDS, {"stage": "refresh_details"}):
+                refresh_game_details(
+                    crawled,
+                    previous_ranks,
+                    crawl_date=crawl_date,
+                    limit=details_limit,
+                    xml_api=XMLAPIThings(api_token=xml_api_token),
+                )
+
+
+if __name__ == "__main__":
+    setup_logging()
+    main_pipeline()
@@ -0,0 +1,236 @@
+# src/ranking_batch.py
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Any
+from schemas import GameRank
+
+
+# The header of a serialised batch: a magic number, then the row count and the byte length of the names.
+_HEADER = struct.Struct("<4sqq")
+_MAGIC = b"RKB1"
+
+
+class RankingBatch:
+    """A compact, columnar container of game ranks.
+
+    Ids and ranks are held in typed int64 arrays and names are packed into a single UTF-8 buffer
+    with an int64 offsets array, the same layout as an Arrow large_string column. A row costs about
+    24 bytes plus the length of its name, instead of the hundreds of bytes of a model or dict, and
+    the columns can be handed to Arrow or NumPy without copying.
+
+    Iterating yields GameRank tuples in (id, rank, name) order, so a batch can be passed straight to
+    a DB-API cursor's `executemany` for an `INSERT ... (id, rank, name) VALUES (?, ?, ?)`.
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.ranks = array("q")
+        self.name_offsets = array("q", [0])
+        self.name_data = bytearray()
+
+    @classmethod
+    def from_games(cls, games: Iterable[Any]) -> "RankingBatch":
+        """Builds a batch from anything with id, rank and name attributes, e.g. GameRank or GameRankCreate.
+
+        Args:
+            games (Iterable[Any]): The games.
+
+        Returns:
+            RankingBatch: The games in columnar form.
+        """
+        batch = cls()
+        batch.extend(games)
+        return batch
+
+    @classmethod
+    def from_columns(cls, ids: Iterable[int], ranks: Iterable[int], names: Iterable[str]) -> "RankingBatch":
+        """Builds a batch from already validated columns, e.g. those of a GameRankBatch.
+
+        Args:
+            ids (Iterable[int]): The id of each game.
+            ranks (Iterable[int]): The rank of each game, in the same order.
+            names (Iterable[str]): The name of each game, in the same order.
+
+        Returns:
+            RankingBatch: The games in columnar form.
+
+        Raises:
+            ValueError: If the columns are not the same length.
+        """
+        batch = cls()
+        batch.ids.extend(ids)
+        batch.ranks.extend(ranks)
+        for name in names:
+            batch._append_name(name)
+        if not len(batch.ids) == len(batch.ranks) == len(batch.name_offsets) - 1:
+            raise ValueError("ids, ranks and names must be the same length")
+        return batch
+
+    # ------------ Building ------------
+    def _append_name(self, name: str) -> None:
+        self.name_data += name.encode("utf-8")
+        self.name_offsets.append(len(self.name_data))
+
+    def append(self, game_id: int, rank: int, name: str) -> None:
+        """Adds one game to the end of the batch."""
+        self.ids.append(game_id)
+        self.ranks.append(rank)
+        self._append_name(name)
+
+    def extend(self, games: Iterable[Any]) -> None:
+        """Adds games with id, rank and name attributes to the end of the batch."""
+        if isinstance(games, RankingBatch):
+            self.ids.extend(games.ids)
+            self.ranks.extend(games.ranks)
+            base = len(self.name_data)
+            self.name_offsets.extend(offset + base for offset in games.name_offsets[1:])
+            self.name_data += games.name_data
+            return
+        for game in games:
+            self.append(game.id, game.rank, game.name)
+
+    # ------------ Reading ------------
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def name(self, index: int) -> str:
+        """Decodes the name of the game at `index`."""
+        return self.name_data[self.name_offsets[index]:self.name_offsets[index + 1]].decode("utf-8")
+
+    @property
+    def names(self) -> list[str]:
+        """The decoded name column."""
+        return [self.name(index) for index in range(len(self))]
+
+    def __getitem__(self, index: int) -> GameRank:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RankingBatch index out of range")
+        return GameRank(self.ids[index], self.ranks[index], self.name(index))
+
+    def __iter__(self) -> Iterator[GameRank]:
+        data, offsets = self.name_data, self.name_offsets
+        for index, (game_id, rank) in enumerate(zip(self.ids, self.ranks)):
+            yield GameRank(game_id, rank, data[offsets[index]:offsets[index + 1]].decode("utf-8"))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RankingBatch):
+            return NotImplemented
+        return (
+            self.ids == other.ids
+            and self.ranks == other.ranks
+            and self.name_offsets == other.name_offsets
+            and self.name_data == other.name_data
+        )
+
+    def __repr__(self) -> str:
+        return f"<RankingBatch(rows={len(self)}, nbytes={self.nbytes})>"
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes held by the columns themselves, excluding fixed object overheads."""
+        return (
+            len(self.ids) * self.ids.itemsize
+            + len(self.ranks) * self.ranks.itemsize
+            + len(self.name_offsets) * self.name_offsets.itemsize
+            + len(self.name_data)
+        )
+
+    def as_mappings(self) -> Iterator[dict[str, Any]]:
+        """Yields each game as a dict, for APIs that need named parameters, e.g. SQLAlchemy's `execute`."""
+        for game in self:
+            yield game._asdict()
+
+    # ------------ Serialisation ------------
+    def to_bytes(self) -> bytes:
+        """Serialises the batch as its raw little-endian columns behind a small header.
+
+        Nothing is encoded per row, so writing and reading a batch costs little more than a memcpy.
+
+        Returns:
+            bytes: The serialised batch.
+        """
+        columns = [array("q", self.ids), array("q", self.ranks), array("q", self.name_offsets)]
+        if sys.byteorder == "big":
+            for column in columns:
+                column.byteswap()
+        header = _HEADER.pack(_MAGIC, len(self), len(self.name_data))
+        return b"".join([header, *(column.tobytes() for column in columns), bytes(self.name_data)])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RankingBatch":
+        """Reads a batch serialised with `to_bytes`.
+
+        Args:
+            data (bytes): The serialised batch.
+
+        Returns:
+            RankingBatch: The batch.
+
+        Raises:
+            ValueError: If `data` is not a serialised batch or is truncated.
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Data is too short to be a serialised RankingBatch")
+        magic, rows, name_bytes = _HEADER.unpack_from(data)
+        expected = _HEADER.size + (3 * rows + 1) * 8 + name_bytes
+        if magic != _MAGIC or len(data) != expected:
+            raise ValueError("Data is not a serialised RankingBatch")
+        batch = cls()
+        batch.name_offsets = array("q")
+        position = _HEADER.size
+        for column, length in ((batch.ids, rows), (batch.ranks, rows), (batch.name_offsets, rows + 1)):
+            column.frombytes(data[position:position + length * 8])
+            if sys.byteorder == "big":
+                column.byteswap()
+            position += length * 8
+        batch.name_data = bytearray(data[position:])
+        return batch
+
+    # ------------ Conversion ------------
+    def to_arrow(self):
+        """Converts the batch to a pyarrow Table with id, rank and name columns without copying the data.
+
+        The table shares memory with the batch, so the batch must not be appended to while it is in use.
+
+        Returns:
+            pyarrow.Table: The table, with int64 id and rank columns and a large_string name column.
+        """
+        import pyarrow as pa
+
+        rows = len(self)
+        ids = pa.Array.from_buffers(pa.int64(), rows, [None, pa.py_buffer(self.ids)])
+        ranks = pa.Array.from_buffers(pa.int64(), rows, [None, pa.py_buffer(self.ranks)])
+        names = pa.Array.from_buffers(
+            pa.large_string(),
+            rows,
+            [None, pa.py_buffer(self.name_offsets), pa.py_buffer(self.name_data)],
+        )
+        return pa.table({"id": ids, "rank": ranks, "name": names})
+
+    def to_pandas(self):
+        """Converts the batch to a pandas DataFrame with id, rank and name columns.
+
+        With pyarrow installed the frame is backed by Arrow and shares memory with the batch.
+        Otherwise the id and rank columns are NumPy views of the batch and only the names are copied.
+
+        Returns:
+            pandas.DataFrame: The frame.
+
+        Raises:
+            ImportError: If pandas is not installed.
+        """
+        import numpy as np
+        import pandas as pd
+
+        try:
+            return self.to_arrow().to_pandas(types_mapper=pd.ArrowDtype)
+        except ImportError:
+            return pd.DataFrame({
+                "id": np.frombuffer(self.ids, dtype=np.int64),
+                "rank": np.frombuffer(self.ranks, dtype=np.int64),
+                "name": self.names,
+            })
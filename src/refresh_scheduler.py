@@ -0,0 +1,181 @@
+# src/refresh_scheduler.py
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from enum import IntEnum
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Game, GameStatisticsRecord
+
+
+class RefreshReason(IntEnum):
+    """Why a game's details need fetching. Lower values are fetched first."""
+    NEW = 0
+    MISSING = 1
+    RANK_MOVED = 2
+    STALE = 3
+
+
+@dataclass(frozen=True)
+class StalenessTier:
+    """How long the details of games down to a rank stay fresh.
+
+    Attributes:
+        max_rank (int | None): The worst rank in the tier, or None for every remaining game.
+        ttl_days (int): How many days the details of games in the tier stay fresh.
+    """
+    max_rank: int | None
+    ttl_days: int
+
+
+# The top of the rankings changes most and is looked at most, so it is refreshed more often.
+DEFAULT_STALENESS_TIERS = (
+    StalenessTier(max_rank=100, ttl_days=1),
+    StalenessTier(max_rank=1000, ttl_days=7),
+    StalenessTier(max_rank=10000, ttl_days=30),
+    StalenessTier(max_rank=None, ttl_days=90),
+)
+
+
+@dataclass(frozen=True)
+class RefreshTask:
+    """One game whose details should be fetched.
+
+    Attributes:
+        game_id (int): The game.
+        reason (RefreshReason): Why it needs fetching.
+        rank (int | None): Its current rank.
+        previous_rank (int | None): Its rank before the latest crawl, or None if it is new.
+        fetched_on (date | None): When its details were last fetched, or None if they never were.
+    """
+    game_id: int
+    reason: RefreshReason
+    rank: int | None
+    previous_rank: int | None = None
+    fetched_on: date | None = None
+
+    @property
+    def priority(self) -> tuple[int, int, int]:
+        """Sorts by reason, then best ranked first with unranked games last."""
+        return (self.reason, self.rank is None, self.rank or 0)
+
+
+def ttl_for_rank(rank: int | None, tiers: Sequence[StalenessTier] = DEFAULT_STALENESS_TIERS) -> timedelta | None:
+    """Finds how long the details of a game at `rank` stay fresh.
+
+    Args:
+        rank (int | None): The game's rank, or None if it is unranked.
+        tiers (Sequence[StalenessTier], optional): The tiers, best ranks first. Defaults to DEFAULT_STALENESS_TIERS.
+
+    Returns:
+        timedelta | None: The TTL of the first tier the rank falls into, or None if no tier covers it,
+            in which case the details never go stale.
+    """
+    for tier in tiers:
+        if tier.max_rank is None or (rank is not None and rank <= tier.max_rank):
+            return timedelta(days=tier.ttl_days)
+    return None
+
+
+def plan_detail_refresh(
+        game_ranks: Iterable,
+        previous_ranks: Mapping[int, int | None],
+        fetched_on: Mapping[int, date | None],
+        today: date | None = None,
+        rank_change_threshold: int = 100,
+        tiers: Sequence[StalenessTier] = DEFAULT_STALENESS_TIERS,
+        limit: int | None = None,
+        ) -> list[RefreshTask]:
+    """Decides which games need their details fetched, most urgent first.
+
+    A game is fetched if it is new to the Games table, has never had its details fetched, moved
+    more than `rank_change_threshold` places since the previous crawl, or its details are older
+    than the TTL of its rank's tier. Everything else is left alone, so the cost of a refresh
+    tracks how much changed rather than how many games there are.
+
+    Args:
+        game_ranks (Iterable): The latest crawl, anything with id and rank, e.g. a RankingBatch.
+        previous_ranks (Mapping[int, int | None]): Each game's rank in the Games table before the crawl was loaded.
+        fetched_on (Mapping[int, date | None]): When each game's details were last fetched.
+        today (date | None, optional): The date to age the details against. Defaults to today.
+        rank_change_threshold (int, optional): How many places a game must move to be refetched. Defaults to 100.
+        tiers (Sequence[StalenessTier], optional): The staleness TTL of each rank tier. Defaults to DEFAULT_STALENESS_TIERS.
+        limit (int | None, optional): The most games to return, e.g. a daily request budget. Defaults to None.
+
+    Returns:
+        list[RefreshTask]: The games to fetch: new games, then games with no details, then movers,
+            then stale games, each best ranked first.
+    """
+    today = today or date.today()
+    tasks = []
+    for game in game_ranks:
+        game_id, rank = game.id, game.rank
+        last_fetched = fetched_on.get(game_id)
+        previous_rank = previous_ranks.get(game_id)
+        if game_id not in previous_ranks:
+            reason = RefreshReason.NEW
+        elif last_fetched is None:
+            reason = RefreshReason.MISSING
+        elif rank is not None and previous_rank is not None and abs(rank - previous_rank) > rank_change_threshold:
+            reason = RefreshReason.RANK_MOVED
+        else:
+            ttl = ttl_for_rank(rank, tiers)
+            if ttl is None or today - last_fetched < ttl:
+                continue
+            reason = RefreshReason.STALE
+        tasks.append(RefreshTask(
+            game_id=game_id,
+            reason=reason,
+            rank=rank,
+            previous_rank=previous_rank,
+            fetched_on=last_fetched,
+        ))
+    tasks.sort(key=lambda task: task.priority)
+    return tasks if limit is None else tasks[:limit]
+
+
+def current_ranks(db: Session) -> dict[int, int | None]:
+    """Reads the rank of every game in the Games table, e.g. before a crawl overwrites them."""
+    return {game_id: rank for game_id, rank in db.execute(select(Game.id, Game.rank))}
+
+
+def detail_fetch_dates(db: Session) -> dict[int, date | None]:
+    """Reads when each game's details were last fetched."""
+    query = select(GameStatisticsRecord.id, GameStatisticsRecord.fetched_on)
+    return {game_id: fetched_on for game_id, fetched_on in db.execute(query)}
+
+
+def schedule_detail_refresh(
+        db: Session,
+        game_ranks: Iterable,
+        previous_ranks: Mapping[int, int | None] | None = None,
+        today: date | None = None,
+        rank_change_threshold: int = 100,
+        tiers: Sequence[StalenessTier] = DEFAULT_STALENESS_TIERS,
+        limit: int | None = None,
+        ) -> list[RefreshTask]:
+    """Plans a detail refresh for the latest crawl against what the db holds.
+
+    Args:
+        db (Session): The db session to read with.
+        game_ranks (Iterable): The latest crawl, anything with id and rank, e.g. a RankingBatch.
+        previous_ranks (Mapping[int, int | None] | None, optional): The ranks from before the crawl was
+            loaded, from `current_ranks`. Defaults to the Games table as it is now, so call this before
+            loading the crawl or pass them in.
+        today (date | None, optional): The date to age the details against. Defaults to today.
+        rank_change_threshold (int, optional): How many places a game must move to be refetched. Defaults to 100.
+        tiers (Sequence[StalenessTier], optional): The staleness TTL of each rank tier. Defaults to DEFAULT_STALENESS_TIERS.
+        limit (int | None, optional): The most games to return. Defaults to None.
+
+    Returns:
+        list[RefreshTask]: The games to fetch, most urgent first.
+    """
+    return plan_detail_refresh(
+        game_ranks,
+        previous_ranks if previous_ranks is not None else current_ranks(db),
+        detail_fetch_dates(db),
+        today=today,
+        rank_change_threshold=rank_change_threshold,
+        tiers=tiers,
+        limit=limit,
+    )
@@ -0,0 +1,291 @@
+# src/sources/crawl_checkpoint.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from sources.html_pages import HTMLPages
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CrawlCheckpoint:
+    """The progress of one crawl, saved so an interrupted crawl can pick up where it stopped.
+
+    Attributes:
+        crawl_id (str): A unique id for the crawl.
+        crawl_date (date): The crawl the pages belong to in the raw page cache.
+        start (int): The first page of the crawl.
+        stop (int): The last page of the crawl.
+        completed (set[int]): The pages fetched and stored in the raw page cache.
+        failed (dict[int, str]): The pages whose last attempt failed, and why.
+        attempts (dict[int, int]): How many times each unfinished page has been tried.
+        permanently_failed (set[int]): The failed pages whose failure is not worth retrying, e.g. a 404.
+        finished (bool): Whether the crawl ran to the end, with or without failed pages.
+    """
+    crawl_id: str
+    crawl_date: date
+    start: int
+    stop: int
+    completed: set[int] = field(default_factory=set)
+    failed: dict[int, str] = field(default_factory=dict)
+    attempts: dict[int, int] = field(default_factory=dict)
+    permanently_failed: set[int] = field(default_factory=set)
+    finished: bool = False
+
+    @classmethod
+    def new(cls, crawl_date: date, start: int, stop: int) -> "CrawlCheckpoint":
+        """Starts the checkpoint of a new crawl."""
+        return cls(crawl_id=f"{crawl_date.isoformat()}-{uuid.uuid4().hex[:8]}", crawl_date=crawl_date, start=start, stop=stop)
+
+    @property
+    def pending(self) -> list[int]:
+        """The pages not yet fetched, failed pages included, in page order."""
+        return [page for page in range(self.start, self.stop + 1) if page not in self.completed]
+
+    def mark_completed(self, page: int) -> None:
+        self.completed.add(page)
+        self.failed.pop(page, None)
+        self.attempts.pop(page, None)
+        self.permanently_failed.discard(page)
+
+    def mark_failed(self, page: int, error: str, retryable: bool = True) -> None:
+        self.failed[page] = error
+        self.attempts[page] = self.attempts.get(page, 0) + 1
+        if retryable:
+            self.permanently_failed.discard(page)
+        else:
+            self.permanently_failed.add(page)
+
+    # ------------ Persistence ------------
+    def save(self, path: str | Path) -> None:
+        """Writes the checkpoint to a JSON manifest, atomically so a crash never leaves a torn file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "crawl_id": self.crawl_id,
+            "crawl_date": self.crawl_date.isoformat(),
+            "start": self.start,
+            "stop": self.stop,
+            "completed": sorted(self.completed),
+            "failed": {str(page): error for page, error in sorted(self.failed.items())},
+            "attempts": {str(page): attempts for page, attempts in sorted(self.attempts.items())},
+            "permanently_failed": sorted(self.permanently_failed),
+            "finished": self.finished,
+        }
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(record, indent=1), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CrawlCheckpoint | None":
+        """Reads a checkpoint manifest.
+
+        Args:
+            path (str | Path): The manifest written by `save`.
+
+        Returns:
+            CrawlCheckpoint | None: The checkpoint, or None if there is no manifest at `path`.
+        """
+        try:
+            record = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        return cls(
+            crawl_id=record["crawl_id"],
+            crawl_date=date.fromisoformat(record["crawl_date"]),
+            start=record["start"],
+            stop=record["stop"],
+            completed=set(record["completed"]),
+            failed={int(page): error for page, error in record["failed"].items()},
+            attempts={int(page): attempts for page, attempts in record["attempts"].items()},
+            permanently_failed=set(record.get("permanently_failed", [])),
+            finished=record["finished"],
+        )
+
+
+class ResumableCrawl:
+    """Fetches ranking pages with HTMLPages while checkpointing which pages are done.
+
+    Fetched pages live in the HTMLPages raw page cache and the checkpoint manifest records which
+    pages made it there, so a crawl interrupted at page 1,200 resumes at page 1,201 with pages
+    1 to 1,200 read back from disk. Pages that failed transiently are retried in further rounds
+    with a bounded, exponential backoff between rounds; pages that failed for good, e.g. a 404,
+    are not.
+
+    The manifest is rewritten after every failure but only every `save_every_pages` completed pages
+    or `save_every_s` seconds, so a long crawl does not rewrite it once per page. Completed pages
+    an interruption kept out of the manifest are in the raw page cache, so resuming reads them
+    back from disk instead of fetching them again.
+    """
+
+    def __init__(
+            self,
+            html_pages: HTMLPages,
+            checkpoint_path: str | Path,
+            max_attempts: int = 3,
+            backoff_s: float = 5.0,
+            max_backoff_s: float = 60.0,
+            save_every_pages: int = 50,
+            save_every_s: float = 5.0,
+            sleep: Callable[[float], None] = time.sleep,
+            clock: Callable[[], float] = time.monotonic,
+            ) -> None:
+        """Initialises the ResumableCrawl.
+
+        Args:
+            html_pages (HTMLPages): The source to fetch pages with. Must have a raw page cache.
+            checkpoint_path (str | Path): Where the checkpoint manifest is kept.
+            max_attempts (int, optional): How many times to try a page before giving up on it. Defaults to 3.
+            backoff_s (float, optional): The wait before the first retry round. Doubles every round.
+                Defaults to 5.0.
+            max_backoff_s (float, optional): The longest wait between retry rounds. Defaults to 60.0.
+            save_every_pages (int, optional): How many completed pages to record before saving the
+                manifest. Defaults to 50.
+            save_every_s (float, optional): The longest to go without saving a completed page. Defaults to 5.0.
+            sleep (Callable[[float], None], optional): The sleep function. Defaults to time.sleep.
+            clock (Callable[[], float], optional): A monotonic clock. Defaults to time.monotonic.
+        """
+        if html_pages.cache is None:
+            raise ValueError("A resumable crawl needs HTMLPages with a RawPageCache to keep the fetched pages in")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if save_every_pages < 1:
+            raise ValueError("save_every_pages must be at least 1")
+        self.html_pages = html_pages
+        self.checkpoint_path = Path(checkpoint_path)
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.save_every_pages = save_every_pages
+        self.save_every_s = save_every_s
+        self._sleep = sleep
+        self._clock = clock
+        self.checkpoint: CrawlCheckpoint | None = None
+        # The crawl may run in a prefetch thread while `finish` is called from the consumer.
+        self._lock = threading.Lock()
+        self._unsaved_pages = 0
+        self._last_save = clock()
+
+    @staticmethod
+    def resume_point(checkpoint_path: str | Path) -> CrawlCheckpoint | None:
+        """Returns the checkpoint of an unfinished crawl at `checkpoint_path`, if there is one.
+
+        Args:
+            checkpoint_path (str | Path): Where the checkpoint manifest is kept.
+
+        Returns:
+            CrawlCheckpoint | None: The checkpoint to resume, or None to start a new crawl.
+        """
+        checkpoint = CrawlCheckpoint.load(checkpoint_path)
+        if checkpoint is None or checkpoint.finished:
+            return None
+        return checkpoint
+
+    def _start(self, start: int, stop: int) -> CrawlCheckpoint:
+        checkpoint = self.resume_point(self.checkpoint_path)
+        if checkpoint is not None and checkpoint.crawl_date == self.html_pages.crawl_date:
+            logger.info(
+                f"RESUMING CRAWL {checkpoint.crawl_id}: {len(checkpoint.completed)} PAGES DONE, "
+                f"{len(checkpoint.pending)} PENDING"
+            )
+            # The last page can move between runs as games are added, so widen the crawl if needed.
+            checkpoint.start = min(checkpoint.start, start)
+            checkpoint.stop = max(checkpoint.stop, stop)
+            checkpoint.attempts = {}
+            return checkpoint
+        checkpoint = CrawlCheckpoint.new(self.html_pages.crawl_date, start, stop)
+        logger.info(f"STARTING CRAWL {checkpoint.crawl_id} OF PAGES {start} TO {stop}")
+        return checkpoint
+
+    def _save(self) -> None:
+        # Called holding the lock.
+        self.checkpoint.save(self.checkpoint_path)
+        self._unsaved_pages = 0
+        self._last_save = self._clock()
+
+    def _fetch(self, page: int) -> str | None:
+        try:
+            result = self.html_pages.fetch_ranking_page_result(page=page)
+        except Exception as e:
+            with self._lock:
+                self.checkpoint.mark_failed(page, f"{type(e).__name__}: {e}")
+                self._save()
+            return None
+        with self._lock:
+            if result.text is not None:
+                self.checkpoint.mark_completed(page)
+                self._unsaved_pages += 1
+                if self._unsaved_pages >= self.save_every_pages or self._clock() - self._last_save >= self.save_every_s:
+                    self._save()
+            else:
+                self.checkpoint.mark_failed(page, result.error or "Page was not fetched", retryable=result.retryable)
+                self._save()
+        return result.text
+
+    def _retry_pages(self) -> list[int]:
+        return [
+            page for page in sorted(self.checkpoint.failed)
+            if page not in self.checkpoint.permanently_failed and self.checkpoint.attempts[page] < self.max_attempts
+        ]
+
+    def iter_ranking_pages(self, start: int, stop: int) -> Iterator[tuple[int, str | None]]:
+        """Fetches pages `start` to `stop`, resuming the checkpointed crawl if one is unfinished.
+
+        Completed pages are read back from the raw page cache. The first pass yields pages in page
+        order; pages that failed transiently are retried in later rounds and yielded as they succeed,
+        so they come after later pages and the pages are not guaranteed to be in page order.
+
+        Args:
+            start (int): The starting page number (inclusive).
+            stop (int): The ending page number (inclusive).
+
+        Returns:
+            Iterator[tuple[int, str | None]]: The page number and raw HTML of each page. The content
+                is None for pages that still failed after `max_attempts` tries or failed for good.
+        """
+        self.checkpoint = self._start(start, stop)
+        with self._lock:
+            self._save()
+
+        try:
+            for page in range(self.checkpoint.start, self.checkpoint.stop + 1):
+                html_content = self._fetch(page)
+                if html_content is not None:
+                    yield page, html_content
+
+            retry_round = 0
+            while retry_pages := self._retry_pages():
+                delay_s = min(self.backoff_s * 2**retry_round, self.max_backoff_s)
+                logger.info(f"RETRYING {len(retry_pages)} FAILED PAGES IN {delay_s:.1f}s")
+                self._sleep(delay_s)
+                for page in retry_pages:
+                    html_content = self._fetch(page)
+                    if html_content is not None:
+                        yield page, html_content
+                retry_round += 1
+
+            for page, error in sorted(self.checkpoint.failed.items()):
+                logger.error(f"PAGE {page} FAILED AFTER {self.checkpoint.attempts[page]} ATTEMPTS: {error}")
+                yield page, None
+            with self._lock:
+                self.checkpoint.finished = True
+        finally:
+            # Also on the way out of a crawl closed early, so the pages it completed are recorded.
+            with self._lock:
+                self._save()
+
+    def finish(self) -> None:
+        """Marks the crawl finished before its last page, e.g. when it stopped early at its bounds,
+        so the next run starts a new crawl instead of resuming this one."""
+        with self._lock:
+            if self.checkpoint is not None and not self.checkpoint.finished:
+                logger.info(f"FINISHING CRAWL {self.checkpoint.crawl_id} EARLY WITH {len(self.checkpoint.pending)} PAGES UNFETCHED")
+                self.checkpoint.finished = True
+                self._save()
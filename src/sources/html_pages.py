@@ -1,15 +1,37 @@
 # src/sources/html_pages.py
+import asyncio
 import httpx
-from utils.logging_config import setup_logging
-from utils.throttler import RateLimiter
+import importlib.util
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from sources.page_cache import RawPageCache
+from utils.logging_config import get_logger
+from utils.metrics import FETCH_BYTES, FETCH_SECONDS, LIMITER_WAIT_SECONDS, PAGES_FETCHED, metrics, timed
+from utils.retry import CircuitBreaker, FetchResult, RetryPolicy, fetch_with_retry
+from utils.throttler import RateLimiter, AdaptiveTokenBucket
+
+logger = get_logger(__name__)
+
+
+def accept_encoding() -> str:
+    """The Accept-Encoding to send: gzip and deflate, plus brotli when httpx can decode it."""
+    encodings = ["gzip", "deflate"]
+    if importlib.util.find_spec("brotli") is not None or importlib.util.find_spec("brotlicffi") is not None:
+        encodings.append("br")
+    return ", ".join(encodings)
 
-logger = setup_logging()
 
 class HTMLPages:
     """Fetches HTML ranking pages without parsing the HTML.
 
     This class provides the methods to download raw HTML from BoardGameGeeek (BGG)
-    ranking pages, with built-in rate limiting to avoid overwhelming the server
+    ranking pages, with built-in rate limiting to avoid overwhelming the server.
+    Every request goes through one long-lived `httpx.Client`, so connections are kept
+    alive and reused across pages. Use it as a context manager, or call `close`, to
+    release the connections.
     """
 
     def __init__(
@@ -17,6 +39,19 @@ class HTMLPages:
             base_url: str = "https://boardgamegeek.com",
             user_agent: str = "bgg-kaggle-scrapper/0.1",
             delay_s: float = 2.0,
+            limiter: RateLimiter | AdaptiveTokenBucket | None = None,
+            cache: RawPageCache | None = None,
+            crawl_date: date | None = None,
+            replay: bool = False,
+            retry_policies: Mapping[int | str, RetryPolicy] | None = None,
+            circuit_breaker: CircuitBreaker | None = None,
+            sleep: Callable[[float], None] = time.sleep,
+            connect_timeout_s: float = 10.0,
+            read_timeout_s: float = 30.0,
+            http2: bool = False,
+            max_keepalive_connections: int = 4,
+            headers: Mapping[str, str] | None = None,
+            transport: httpx.BaseTransport | None = None,
             ) -> None:
         """Initialises the HTMLPages fetcher.
 
@@ -27,10 +62,156 @@ class HTMLPages:
                 Defaults to "bgg-kaggle-scraper/0.1".
             delay_s (float, optional): The delay in seconds between consecutive 
                 requests to avoid overloading the server. Defaults to 2.0.
+            limiter (RateLimiter | AdaptiveTokenBucket | None, optional): A limiter to use
+                instead of a fixed `delay_s` RateLimiter. An AdaptiveTokenBucket is told about
+                every response so it can speed up or back off. Defaults to None.
+            cache (RawPageCache | None, optional): A raw page cache. Pages already cached for
+                `crawl_date` are served from it, other pages are revalidated against their last
+                cached copy with a conditional GET, and every fetched page is stored. Defaults to None.
+            crawl_date (date | None, optional): The crawl the pages belong to in the cache.
+                Defaults to today.
+            replay (bool, optional): If True, pages only come from the cache and the network is
+                never used. Requires `cache`. Defaults to False.
+            retry_policies (Mapping[int | str, RetryPolicy] | None, optional): How to retry each status
+                code and transport errors. Defaults to DEFAULT_RETRY_POLICIES.
+            circuit_breaker (CircuitBreaker | None, optional): Pauses the crawl while the upstream is
+                degraded. Defaults to a new CircuitBreaker.
+            sleep (Callable[[float], None], optional): The sleep used between retries. Defaults to time.sleep.
+            connect_timeout_s (float, optional): The timeout for opening a connection. Defaults to 10.0.
+            read_timeout_s (float, optional): The timeout for reading, writing and waiting on the pool.
+                Defaults to 30.0.
+            http2 (bool, optional): If True, use HTTP/2 where the server supports it. Needs the `h2`
+                package (httpx[http2]). Defaults to False.
+            max_keepalive_connections (int, optional): How many idle connections to keep open.
+                Defaults to 4.
+            headers (Mapping[str, str] | None, optional): Extra headers sent with every request, on top
+                of the User-Agent and Accept-Encoding. Defaults to None.
+            transport (httpx.BaseTransport | None, optional): A custom transport for the client, mainly
+                used for testing. Defaults to None.
         """
+        if replay and cache is None:
+            raise ValueError("Replay mode needs a RawPageCache")
         self.base_url = base_url.rstrip("/")
         self.user_agent = user_agent
-        self.limiter = RateLimiter(delay_s=delay_s)
+        self.limiter = limiter if limiter is not None else RateLimiter(delay_s=delay_s)
+        self.cache = cache
+        self.crawl_date = crawl_date or date.today()
+        self.replay = replay
+        self.retry_policies = retry_policies
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker(sleep=sleep)
+        self._sleep = sleep
+        self.timeout = httpx.Timeout(read_timeout_s, connect=connect_timeout_s)
+        self.http2 = http2
+        self.limits = httpx.Limits(max_keepalive_connections=max_keepalive_connections)
+        self.headers = {"User-Agent": user_agent, "Accept-Encoding": accept_encoding(), **(headers or {})}
+        self._transport = transport
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        """The pooled client, opened on first use so a replay never opens one."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    limits=self.limits,
+                    http2=self.http2,
+                    transport=self._transport,
+                )
+            return self._client
+
+    def close(self) -> None:
+        """Closes the client and its pooled connections. A later request opens a new client."""
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def __enter__(self) -> "HTMLPages":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def fetch_ranking_page_result(self, page: int) -> FetchResult:
+        """Fetches a single ranking page from BoardGameGeek, retrying transient failures.
+
+        Args:
+            page (int): The page number of the rankings to fetch.
+
+        Returns:
+            FetchResult: The page's raw HTML in `text`, or why it could not be fetched.
+        """
+        url = f"{self.base_url}/browse/boardgame/page/{page}"
+        previous = None
+        headers = {}
+        if self.cache is not None:
+            cached_page = self.cache.get(url, self.crawl_date)
+            if cached_page is not None or self.replay:
+                if cached_page is None:
+                    logger.error(f"The following URL is not in the cache for {self.crawl_date}: {url}")
+                    return FetchResult(url=url, error="Page is not in the cache")
+                metrics.counter(PAGES_FETCHED, {"source": "cache"}).inc()
+                return FetchResult(url=url, text=cached_page)
+            previous = self.cache.latest_entry(url, on_or_before=self.crawl_date)
+            if previous is not None:
+                headers = RawPageCache.conditional_headers(previous)
+
+        def send() -> httpx.Response:
+            with timed(LIMITER_WAIT_SECONDS):
+                self.limiter.wait()
+            with timed(FETCH_SECONDS, {"endpoint": "ranking"}):
+                response = self.client.get(url, headers=headers)
+            metrics.counter(FETCH_BYTES, {"endpoint": "ranking"}).inc(response.num_bytes_downloaded or len(response.content))
+            if isinstance(self.limiter, AdaptiveTokenBucket):
+                self.limiter.on_response(response.status_code, response.headers.get("Retry-After"))
+            return response
+
+        def fetch() -> FetchResult:
+            result = fetch_with_retry(
+                send,
+                url,
+                policies=self.retry_policies,
+                circuit_breaker=self.circuit_breaker,
+                success_status_codes=frozenset({200, 304}) if headers else frozenset({200}),
+                sleep=self._sleep,
+            )
+            if not result.ok:
+                logger.error(f"The following URL failed to return status code 200: {url} ({result.error} after {result.attempts} attempts)")
+            return result
+
+        result = fetch()
+        if not result.ok:
+            return result
+
+        response = result.response
+        if response.status_code == 304:
+            text = self.cache.read(previous)
+            if text is not None:
+                metrics.counter(PAGES_FETCHED, {"source": "revalidated"}).inc()
+                self.cache.revalidated(previous, self.crawl_date)
+                result.text = text
+                return result
+            # The body the validators point at has been evicted, so ask for the whole page again.
+            logger.warning(f"The cached body of {url} is gone, fetching it without validators")
+            headers = {}
+            result = fetch()
+            if not result.ok:
+                return result
+            response = result.response
+        metrics.counter(PAGES_FETCHED, {"source": "network"}).inc()
+        if self.cache is not None:
+            self.cache.put(
+                url,
+                self.crawl_date,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        result.text = response.text
+        return result
 
     def fetch_ranking_page(self, page: int) -> str | None:
         """Fetches a single ranking page from BoardGameGeek.
@@ -41,29 +222,65 @@ class HTMLPages:
         Returns:
             str: The raw HTML content of the requested page.
         """
-        url = f"{self.base_url}/browse/boardgame/page/{page}"
-        self.limiter.wait()
-        response = httpx.get(url)
-        if response.status_code != 200:
-            logger.error(f"The following URL failed to return status code 200: {url}")
-        else:
-            return response.text
+        return self.fetch_ranking_page_result(page).text
 
-    def fetch_ranking_pages(self, start:int, stop: int) -> list[str]:
-        """Fetches multiple ranking pages from BoardGameGeek.
+    def iter_ranking_pages(self, start: int, stop: int) -> Iterator[tuple[int, str | None]]:
+        """Lazily fetches multiple ranking pages from BoardGameGeek, one at a time.
 
         Args:
             start (int): The starting page number (inclusive).
             stop (int): The ending page number (inclusive).
 
         Returns:
-            List[str]: A list of raw HTML content for each requested page.
+            Iterator[tuple[int, str | None]]: The page number and raw HTML content of each page,
+                in page order. The content is None if the page failed to fetch.
         """
-        html_pages = []
         for page_number in range(start, stop+1):
-            html_pages.append(self.fetch_ranking_page(page = page_number))
-        return html_pages
-    
+            yield page_number, self.fetch_ranking_page(page = page_number)
+
+    def fetch_ranking_page_results(self, start: int, stop: int, max_workers: int | None = None) -> list[FetchResult]:
+        """Fetches multiple ranking pages from BoardGameGeek, keeping why each failed page failed.
+
+        With `max_workers`, the pages are fetched by a pool of threads for callers that cannot use
+        asyncio, e.g. classic Airflow operators and notebooks. Every thread shares this instance's
+        client, limiter, circuit breaker and cache, so the request rate stays within the same budget
+        as a serial crawl and only the waiting on round trips overlaps. Set `limiter` to an
+        AdaptiveTokenBucket with a burst, and `max_keepalive_connections` to at least `max_workers`,
+        to get more than one request in flight.
+
+        Args:
+            start (int): The starting page number (inclusive).
+            stop (int): The ending page number (inclusive).
+            max_workers (int | None, optional): How many threads fetch pages at once. Defaults to
+                None, fetching one page after another in the calling thread.
+
+        Returns:
+            list[FetchResult]: The result of each requested page, in page order.
+        """
+        page_numbers = range(start, stop + 1)
+        if max_workers is None:
+            return [self.fetch_ranking_page_result(page=page_number) for page_number in page_numbers]
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="html-pages") as executor:
+            return list(executor.map(self.fetch_ranking_page_result, page_numbers))
+
+    def fetch_ranking_pages(self, start:int, stop: int, max_workers: int | None = None) -> list[str | None]:
+        """Fetches multiple ranking pages from BoardGameGeek.
+
+        Args:
+            start (int): The starting page number (inclusive).
+            stop (int): The ending page number (inclusive).
+            max_workers (int | None, optional): If set, the pages are fetched by this many threads
+                sharing one client and limiter, see `fetch_ranking_page_results`. Defaults to None,
+                a serial crawl.
+
+        Returns:
+            List[str | None]: The raw HTML content for each requested page, in page order.
+                Pages that failed to fetch are None.
+        """
+        return [result.text for result in self.fetch_ranking_page_results(start, stop, max_workers=max_workers)]
+
     @staticmethod
     def save_html_file(file_name: str, html_content: str, save_location:str = "data/raw_html"):
         """A static method to save a HTML file to a location
@@ -77,3 +294,148 @@ class HTMLPages:
         with open(f"{save_location}/{file_name}", "w", encoding="utf-8") as file:
             file.write(html_content)
 
+
+class AsyncHTMLPages:
+    """Fetches HTML ranking pages concurrently without parsing the HTML.
+
+    All requests go through a single pooled `httpx.AsyncClient`. Up to `max_concurrency`
+    requests are kept in flight, while a shared token bucket keeps the overall request
+    rate within budget, so the crawl is bound by the politeness budget rather than by
+    round-trip latency. The budget starts at `requests_per_s`, creeps up towards
+    `max_requests_per_s` while the server is happy and halves on 429/503 responses.
+
+    Unlike HTMLPages there is no raw page cache, retry policy or circuit breaker: each page gets
+    one attempt and a failed page comes back as None, for the caller to fetch again.
+    """
+
+    def __init__(
+            self,
+            base_url: str = "https://boardgamegeek.com",
+            user_agent: str = "bgg-kaggle-scrapper/0.1",
+            requests_per_s: float = 0.5,
+            max_requests_per_s: float | None = None,
+            burst: int = 1,
+            max_concurrency: int = 4,
+            timeout_s: float = 30.0,
+            transport: httpx.AsyncBaseTransport | None = None,
+            ) -> None:
+        """Initialises the AsyncHTMLPages fetcher.
+
+        Args:
+            base_url (str, optional): The base URL for BoardGameGeek.
+                Defaults to "https://boardgamegeek.com".
+            user_agent (str, optional): The User-Agent string to use in requests.
+                Defaults to "bgg-kaggle-scraper/0.1".
+            requests_per_s (float, optional): The global request budget shared by every
+                in-flight request. Defaults to 0.5, the same pace as HTMLPages' 2 s delay.
+            max_requests_per_s (float | None, optional): The highest budget the limiter may
+                adapt up to. Defaults to None, meaning `requests_per_s`.
+            burst (int, optional): How many requests may go out back to back.
+                Defaults to 1.
+            max_concurrency (int, optional): The maximum number of requests in flight.
+                Defaults to 4.
+            timeout_s (float, optional): The timeout in seconds for each request.
+                Defaults to 30.0.
+            transport (httpx.AsyncBaseTransport | None, optional): A custom transport for
+                the client, mainly used for testing. Defaults to None.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.max_concurrency = max_concurrency
+        self.timeout_s = timeout_s
+        self.limiter = AdaptiveTokenBucket(
+            rate_per_s=requests_per_s,
+            capacity=burst,
+            max_rate_per_s=max_requests_per_s,
+        )
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout_s,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            transport=self._transport,
+        )
+
+    async def __aenter__(self) -> "AsyncHTMLPages":
+        self._client = self._build_client()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_ranking_page(self, page: int) -> str | None:
+        """Fetches a single ranking page from BoardGameGeek.
+
+        Must be called inside `async with AsyncHTMLPages(...)` so the pooled client is open.
+
+        Args:
+            page (int): The page number of the rankings to fetch.
+
+        Returns:
+            str | None: The raw HTML content of the requested page, or None if it failed.
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncHTMLPages must be used as an async context manager")
+        url = f"{self.base_url}/browse/boardgame/page/{page}"
+        with timed(LIMITER_WAIT_SECONDS):
+            await self.limiter.acquire_async()
+        try:
+            with timed(FETCH_SECONDS, {"endpoint": "ranking"}):
+                response = await self._client.get(url)
+        except httpx.HTTPError as e:
+            logger.error(f"The following URL failed with a transport error: {url} ({e})")
+            return None
+        metrics.counter(FETCH_BYTES, {"endpoint": "ranking"}).inc(response.num_bytes_downloaded or len(response.content))
+        self.limiter.on_response(response.status_code, response.headers.get("Retry-After"))
+        if response.status_code != 200:
+            logger.error(f"The following URL failed to return status code 200: {url}")
+            return None
+        metrics.counter(PAGES_FETCHED, {"source": "network"}).inc()
+        return response.text
+
+    async def fetch_ranking_pages_async(self, start: int, stop: int) -> list[str | None]:
+        """Fetches multiple ranking pages concurrently.
+
+        Opens a pooled client for the duration of the call if one is not already open.
+
+        Args:
+            start (int): The starting page number (inclusive).
+            stop (int): The ending page number (inclusive).
+
+        Returns:
+            list[str | None]: The raw HTML content for each requested page, in page order.
+                Pages that failed to fetch are None.
+        """
+        if self._client is None:
+            async with self:
+                return await self.fetch_ranking_pages_async(start=start, stop=stop)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(page_number: int) -> str | None:
+            async with semaphore:
+                return await self.fetch_ranking_page(page=page_number)
+
+        return list(await asyncio.gather(*(fetch(n) for n in range(start, stop + 1))))
+
+    def fetch_ranking_pages(self, start: int, stop: int) -> list[str | None]:
+        """Synchronous wrapper around `fetch_ranking_pages_async`, matching HTMLPages.
+
+        Args:
+            start (int): The starting page number (inclusive).
+            stop (int): The ending page number (inclusive).
+
+        Returns:
+            list[str | None]: The raw HTML content for each requested page, in page order.
+        """
+        return asyncio.run(self.fetch_ranking_pages_async(start=start, stop=stop))
@@ -0,0 +1,324 @@
+# src/sources/page_cache.py
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedPage:
+    """A raw page held in the RawPageCache.
+
+    Attributes:
+        url (str): The URL the page was fetched from.
+        crawl_date (date): The crawl the page belongs to.
+        content_sha256 (str): The hash of the page content, which names the stored blob.
+        etag (str | None): The ETag header the server sent with the page.
+        last_modified (str | None): The Last-Modified header the server sent with the page.
+        fetched_at (str): When the page was stored, as an ISO 8601 timestamp.
+    """
+    url: str
+    crawl_date: date
+    content_sha256: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: str = ""
+
+
+class RawPageCache:
+    """A content-addressed, compressed on-disk cache of raw HTML pages.
+
+    Page bodies are gzipped and stored once under the sha256 of their content, so a page that
+    has not changed between crawls takes no extra space. Each (URL, crawl date) pair has a
+    small JSON index entry pointing at its body and recording the ETag/Last-Modified headers
+    needed to revalidate it with a conditional GET. A copy of each URL's newest entry is kept as
+    a pointer, so finding what to revalidate a page against is one read rather than a walk over
+    every crawl's index. Layout:
+
+        <root>/objects/<sha[:2]>/<sha>.html.gz
+        <root>/index/<crawl_date>/<sha256(url)>.json
+        <root>/latest/<sha256(url)>.json
+    """
+
+    def __init__(
+            self,
+            root: str | Path = "data/raw_html_cache",
+            ttl_days: int | None = 30,
+            max_bytes: int | None = 2 * 1024**3,
+            compression_level: int = 6,
+            ) -> None:
+        """Initialises the RawPageCache.
+
+        Args:
+            root (str | Path, optional): The folder the cache lives in. Defaults to "data/raw_html_cache".
+            ttl_days (int | None, optional): Crawls older than this many days are evicted.
+                Defaults to 30. None keeps crawls forever.
+            max_bytes (int | None, optional): The most compressed bytes to keep. The oldest crawls are
+                evicted first when over it. Defaults to 2 GiB. None disables the limit.
+            compression_level (int, optional): The gzip compression level. Defaults to 6.
+        """
+        self.root = Path(root)
+        self.ttl_days = ttl_days
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+
+    # ------------ Paths ------------
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _index_dir(self, crawl_date: date) -> Path:
+        return self.root / "index" / crawl_date.isoformat()
+
+    def _index_path(self, url: str, crawl_date: date) -> Path:
+        return self._index_dir(crawl_date) / f"{self._url_key(url)}.json"
+
+    def _latest_path(self, url: str) -> Path:
+        return self.root / "latest" / f"{self._url_key(url)}.json"
+
+    def _object_path(self, content_sha256: str) -> Path:
+        return self.root / "objects" / content_sha256[:2] / f"{content_sha256}.html.gz"
+
+    @staticmethod
+    def _write_atomically(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread too, as a threaded crawl may store two pages with the same content at once.
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    # ------------ Reading ------------
+    def crawl_dates(self) -> list[date]:
+        """Lists the crawl dates held in the cache, oldest first."""
+        index_root = self.root / "index"
+        if not index_root.is_dir():
+            return []
+        return sorted(date.fromisoformat(path.name) for path in index_root.iterdir() if path.is_dir())
+
+    def get_entry(self, url: str, crawl_date: date) -> CachedPage | None:
+        """Looks up the index entry for a URL in a given crawl.
+
+        Args:
+            url (str): The URL of the page.
+            crawl_date (date): The crawl to look in.
+
+        Returns:
+            CachedPage | None: The entry, or None if the page is not cached for that crawl.
+        """
+        return self._read_entry(self._index_path(url, crawl_date))
+
+    @staticmethod
+    def _read_entry(path: Path) -> CachedPage | None:
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        entry["crawl_date"] = date.fromisoformat(entry["crawl_date"])
+        return CachedPage(**entry)
+
+    def latest_entry(self, url: str, on_or_before: date | None = None) -> CachedPage | None:
+        """Finds the most recent cached copy of a URL, e.g. to revalidate it.
+
+        The URL's latest pointer answers this in one read. Only when the pointer is missing, points
+        at an evicted crawl or is newer than `on_or_before`, e.g. when re-running an older crawl,
+        are the crawls searched newest first.
+
+        Args:
+            url (str): The URL of the page.
+            on_or_before (date | None, optional): Ignore crawls after this date. Defaults to None.
+
+        Returns:
+            CachedPage | None: The newest entry, or None if the URL has never been cached.
+        """
+        latest = self._read_entry(self._latest_path(url))
+        if latest is not None and (on_or_before is None or latest.crawl_date <= on_or_before):
+            entry = self.get_entry(url, latest.crawl_date)
+            if entry is not None:
+                return entry
+        for crawl_date in reversed(self.crawl_dates()):
+            if on_or_before is not None and crawl_date > on_or_before:
+                continue
+            entry = self.get_entry(url, crawl_date)
+            if entry is not None:
+                return entry
+        return None
+
+    def read(self, entry: CachedPage) -> str | None:
+        """Reads the page body an entry points at.
+
+        Args:
+            entry (CachedPage): The index entry.
+
+        Returns:
+            str | None: The raw HTML, or None if the body has been evicted.
+        """
+        try:
+            with gzip.open(self._object_path(entry.content_sha256), "rt", encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def get(self, url: str, crawl_date: date) -> str | None:
+        """Returns the raw HTML cached for a URL in a given crawl.
+
+        Args:
+            url (str): The URL of the page.
+            crawl_date (date): The crawl to look in.
+
+        Returns:
+            str | None: The raw HTML, or None if the page is not cached for that crawl.
+        """
+        entry = self.get_entry(url, crawl_date)
+        return None if entry is None else self.read(entry)
+
+    @staticmethod
+    def conditional_headers(entry: CachedPage) -> dict[str, str]:
+        """Builds If-None-Match/If-Modified-Since headers to revalidate a cached page.
+
+        Args:
+            entry (CachedPage): The cached copy to revalidate, usually from `latest_entry`.
+
+        Returns:
+            dict[str, str]: The headers for a conditional GET. Empty if the page had no validators.
+        """
+        headers = {}
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # ------------ Writing ------------
+    def put(
+            self,
+            url: str,
+            crawl_date: date,
+            html_content: str,
+            etag: str | None = None,
+            last_modified: str | None = None,
+            ) -> CachedPage:
+        """Stores a page for a crawl. Identical bodies are only stored once.
+
+        Args:
+            url (str): The URL of the page.
+            crawl_date (date): The crawl the page belongs to.
+            html_content (str): The raw HTML.
+            etag (str | None, optional): The response's ETag header. Defaults to None.
+            last_modified (str | None, optional): The response's Last-Modified header. Defaults to None.
+
+        Returns:
+            CachedPage: The new index entry.
+        """
+        body = html_content.encode("utf-8")
+        content_sha256 = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(content_sha256)
+        if not object_path.exists():
+            self._write_atomically(object_path, gzip.compress(body, compresslevel=self.compression_level, mtime=0))
+        return self._put_entry(CachedPage(
+            url=url,
+            crawl_date=crawl_date,
+            content_sha256=content_sha256,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+        ))
+
+    def revalidated(self, previous: CachedPage, crawl_date: date) -> CachedPage:
+        """Records that a previously cached page is still current (the server answered 304).
+
+        Args:
+            previous (CachedPage): The entry that was revalidated.
+            crawl_date (date): The crawl the page now also belongs to.
+
+        Returns:
+            CachedPage: The new index entry, pointing at the same body.
+        """
+        return self._put_entry(CachedPage(
+            url=previous.url,
+            crawl_date=crawl_date,
+            content_sha256=previous.content_sha256,
+            etag=previous.etag,
+            last_modified=previous.last_modified,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+        ))
+
+    def _put_entry(self, entry: CachedPage) -> CachedPage:
+        data = json.dumps({**entry.__dict__, "crawl_date": entry.crawl_date.isoformat()}).encode("utf-8")
+        self._write_atomically(self._index_path(entry.url, entry.crawl_date), data)
+        latest_path = self._latest_path(entry.url)
+        latest = self._read_entry(latest_path)
+        if latest is None or latest.crawl_date <= entry.crawl_date:
+            self._write_atomically(latest_path, data)
+        return entry
+
+    # ------------ Eviction ------------
+    def size_bytes(self) -> int:
+        """The total size of the stored page bodies, in bytes."""
+        objects_root = self.root / "objects"
+        if not objects_root.is_dir():
+            return 0
+        return sum(path.stat().st_size for path in objects_root.glob("*/*.html.gz"))
+
+    def evict(self, today: date | None = None) -> int:
+        """Drops crawls older than `ttl_days`, then the oldest crawls until under `max_bytes`.
+
+        Bodies no longer referenced by any crawl are deleted. The newest crawl is never evicted
+        for size, so a cache smaller than one crawl still keeps that crawl.
+
+        Args:
+            today (date | None, optional): The date to measure the TTL from. Defaults to today.
+
+        Returns:
+            int: The number of crawls evicted.
+        """
+        today = today or date.today()
+        crawl_dates = self.crawl_dates()
+        evicted = 0
+
+        if self.ttl_days is not None:
+            cutoff = today - timedelta(days=self.ttl_days)
+            for crawl_date in [d for d in crawl_dates if d < cutoff]:
+                shutil.rmtree(self._index_dir(crawl_date))
+                crawl_dates.remove(crawl_date)
+                evicted += 1
+        self._delete_unreferenced_objects()
+
+        if self.max_bytes is not None:
+            while len(crawl_dates) > 1 and self.size_bytes() > self.max_bytes:
+                shutil.rmtree(self._index_dir(crawl_dates.pop(0)))
+                evicted += 1
+                self._delete_unreferenced_objects()
+
+        if evicted:
+            self._delete_stale_pointers(set(crawl_dates))
+            logger.info(f"EVICTED {evicted} CRAWLS FROM THE RAW PAGE CACHE")
+        return evicted
+
+    def _delete_stale_pointers(self, crawl_dates: set[date]) -> None:
+        latest_root = self.root / "latest"
+        if not latest_root.is_dir():
+            return
+        for latest_path in latest_root.glob("*.json"):
+            entry = self._read_entry(latest_path)
+            if entry is not None and entry.crawl_date not in crawl_dates:
+                latest_path.unlink(missing_ok=True)
+
+    def _delete_unreferenced_objects(self) -> None:
+        referenced = set()
+        index_root = self.root / "index"
+        if index_root.is_dir():
+            for index_path in index_root.glob("*/*.json"):
+                referenced.add(json.loads(index_path.read_text(encoding="utf-8"))["content_sha256"])
+        objects_root = self.root / "objects"
+        if objects_root.is_dir():
+            for object_path in objects_root.glob("*/*.html.gz"):
+                if object_path.name.removesuffix(".html.gz") not in referenced:
+                    object_path.unlink()
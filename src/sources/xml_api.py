@@ -0,0 +1,173 @@
+# src/sources/xml_api.py
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+import httpx
+from parsers.xml_parsers import GameDetails, iter_thing_items
+from sources.html_pages import accept_encoding
+from utils.logging_config import get_logger
+from utils.metrics import FETCH_BYTES, FETCH_SECONDS, LIMITER_WAIT_SECONDS, metrics, timed
+from utils.retry import CircuitBreaker, FetchResult, RetryPolicy, fetch_with_retry
+from utils.streaming import batched
+from utils.throttler import RateLimiter, AdaptiveTokenBucket
+
+logger = get_logger(__name__)
+
+# The most ids BGG accepts in one `thing` request.
+MAX_THING_IDS = 20
+# The error of a game the API returned no <item> for, e.g. one that has been deleted.
+MISSING_ITEM_ERROR = "The XML API returned no item for the game"
+
+
+class XMLAPIThings:
+    """Fetches game details from the BoardGameGeek XML API's `thing` endpoint.
+
+    Up to `batch_size` games are requested at once with `thing?id=a,b,c&stats=1`, so a
+    refresh of N games costs N / batch_size requests instead of N. Requests share one
+    long-lived `httpx.Client` and go through the same rate limiting, retries and circuit
+    breaker as HTMLPages. Use it as a context manager, or call `close`, to release the
+    connections.
+    """
+
+    def __init__(
+            self,
+            base_url: str = "https://boardgamegeek.com/xmlapi2",
+            user_agent: str = "bgg-kaggle-scrapper/0.1",
+            api_token: str | None = None,
+            batch_size: int = MAX_THING_IDS,
+            delay_s: float = 5.0,
+            limiter: RateLimiter | AdaptiveTokenBucket | None = None,
+            retry_policies: Mapping[int | str, RetryPolicy] | None = None,
+            circuit_breaker: CircuitBreaker | None = None,
+            sleep: Callable[[float], None] = time.sleep,
+            connect_timeout_s: float = 10.0,
+            read_timeout_s: float = 60.0,
+            transport: httpx.BaseTransport | None = None,
+            ) -> None:
+        """Initialises the XMLAPIThings fetcher.
+
+        Args:
+            base_url (str, optional): The base URL of the XML API. Defaults to "https://boardgamegeek.com/xmlapi2".
+            user_agent (str, optional): The User-Agent string to use in requests. Defaults to "bgg-kaggle-scraper/0.1".
+            api_token (str | None, optional): The application token BGG issues for the XML API, sent
+                as a Bearer token. Defaults to None.
+            batch_size (int, optional): How many ids to request at once, at most 20. Defaults to 20.
+            delay_s (float, optional): The delay in seconds between consecutive requests. Defaults to 5.0.
+            limiter (RateLimiter | AdaptiveTokenBucket | None, optional): A limiter to use instead of a
+                fixed `delay_s` RateLimiter. Defaults to None.
+            retry_policies (Mapping[int | str, RetryPolicy] | None, optional): How to retry each status
+                code and transport errors. Defaults to DEFAULT_RETRY_POLICIES.
+            circuit_breaker (CircuitBreaker | None, optional): Pauses requests while the API is degraded.
+                Defaults to a new CircuitBreaker.
+            sleep (Callable[[float], None], optional): The sleep used between retries. Defaults to time.sleep.
+            connect_timeout_s (float, optional): The timeout for opening a connection. Defaults to 10.0.
+            read_timeout_s (float, optional): The timeout for reading, writing and waiting on the pool.
+                Defaults to 60.0.
+            transport (httpx.BaseTransport | None, optional): A custom transport for the client, mainly
+                used for testing. Defaults to None.
+        """
+        if not 1 <= batch_size <= MAX_THING_IDS:
+            raise ValueError(f"batch_size must be between 1 and {MAX_THING_IDS}")
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.limiter = limiter if limiter is not None else RateLimiter(delay_s=delay_s)
+        self.retry_policies = retry_policies
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker(sleep=sleep)
+        self._sleep = sleep
+        self.timeout = httpx.Timeout(read_timeout_s, connect=connect_timeout_s)
+        self.headers = {"User-Agent": user_agent, "Accept-Encoding": accept_encoding()}
+        if api_token:
+            self.headers["Authorization"] = f"Bearer {api_token}"
+        self._transport = transport
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        """The pooled client, opened on first use."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(headers=self.headers, timeout=self.timeout, transport=self._transport)
+            return self._client
+
+    def close(self) -> None:
+        """Closes the client and its pooled connections. A later request opens a new client."""
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def __enter__(self) -> "XMLAPIThings":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def thing_url(self, game_ids: Sequence[int]) -> str:
+        return f"{self.base_url}/thing?id={','.join(str(game_id) for game_id in game_ids)}&stats=1"
+
+    def fetch_things_result(self, game_ids: Sequence[int]) -> FetchResult:
+        """Fetches the XML of up to `batch_size` games in one request, retrying transient failures.
+
+        Args:
+            game_ids (Sequence[int]): The ids of the games.
+
+        Returns:
+            FetchResult: The response holding the XML, or why it could not be fetched.
+        """
+        if not 1 <= len(game_ids) <= self.batch_size:
+            raise ValueError(f"Between 1 and {self.batch_size} ids can be fetched at once")
+        url = self.thing_url(game_ids)
+
+        def send() -> httpx.Response:
+            with timed(LIMITER_WAIT_SECONDS):
+                self.limiter.wait()
+            with timed(FETCH_SECONDS, {"endpoint": "thing"}):
+                response = self.client.get(url)
+            metrics.counter(FETCH_BYTES, {"endpoint": "thing"}).inc(response.num_bytes_downloaded or len(response.content))
+            if isinstance(self.limiter, AdaptiveTokenBucket):
+                self.limiter.on_response(response.status_code, response.headers.get("Retry-After"))
+            return response
+
+        result = fetch_with_retry(
+            send,
+            url,
+            policies=self.retry_policies,
+            circuit_breaker=self.circuit_breaker,
+            sleep=self._sleep,
+        )
+        if not result.ok:
+            logger.error(f"The following URL failed to return status code 200: {url} ({result.error} after {result.attempts} attempts)")
+        return result
+
+    def iter_game_details(self, game_ids: Iterable[int]) -> Iterator[GameDetails]:
+        """Fetches and parses the details of every game, `batch_size` games per request.
+
+        Each response is parsed with iterparse as it is consumed, so only one batch of XML is held
+        at a time. Games the API does not return are logged and yielded with an error, so callers
+        can record them like rejected games. Batches that fail to fetch or parse are logged and skipped.
+
+        Args:
+            game_ids (Iterable[int]): The ids of the games.
+
+        Returns:
+            Iterator[GameDetails]: The details of each game returned, in response order, then a
+                GameDetails with MISSING_ITEM_ERROR for each game of the batch that was not returned.
+        """
+        for batch in batched(game_ids, self.batch_size):
+            result = self.fetch_things_result(batch)
+            if not result.ok:
+                continue
+            returned = set()
+            try:
+                for details in iter_thing_items(result.response.content):
+                    returned.add(details.game_id)
+                    yield details
+            except ValueError as e:
+                logger.error(f"The XML from {result.url} could not be parsed: {e}")
+                continue
+            missing = [game_id for game_id in batch if game_id not in returned]
+            if missing:
+                logger.warning(f"The XML API returned no details for games: {missing}")
+            for game_id in missing:
+                yield GameDetails(game_id=game_id, error=MISSING_ITEM_ERROR)
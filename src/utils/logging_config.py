@@ -1,18 +1,51 @@
 # src/utils/loggin_config.py
 import logging
+import threading
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def setup_logging(log_file: str | None = "app.log", level: int = logging.INFO) -> logging.Logger:
+    """Configures the root logger to write to `log_file` and the console.
+
+    Only entry points (the CLI, `python pipeline.py`) call this, and only the first call in a
+    process has any effect, so importing a module never opens `app.log` or overrides the logging
+    of a host such as Airflow.
+
+    Args:
+        log_file (str | None, optional): The file to log to as well as the console. Defaults to "app.log".
+        level (int, optional): The root logging level. Defaults to logging.INFO.
+
+    Returns:
+        logging.Logger: The logger of this module.
+    """
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            handlers = [logging.StreamHandler()]
+            if log_file is not None:
+                handlers.insert(0, logging.FileHandler(log_file))
+            logging.basicConfig(
+                level=level,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                handlers=handlers,
+            )
+
+            # Set the logging level for httpx to WARNING
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            _configured = True
 
-def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("app.log"),
-            logging.StreamHandler()
-        ]
-    )
-    
-    # Set the logging level for httpx to WARNING
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    
     return logging.getLogger(__name__)
 
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a module's logger without configuring logging, for use at import time.
+
+    Args:
+        name (str): The module's `__name__`.
+
+    Returns:
+        logging.Logger: The logger. Its records go wherever the entry point's `setup_logging` sends them.
+    """
+    return logging.getLogger(name)
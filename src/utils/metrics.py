@@ -0,0 +1,309 @@
+# src/utils/metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Bucket upper bounds in seconds, from sub-millisecond parses to minute-long stages.
+DEFAULT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# The metrics the pipeline records.
+FETCH_SECONDS = "bgg_fetch_seconds"
+FETCH_BYTES = "bgg_fetch_bytes_total"
+PAGES_FETCHED = "bgg_pages_fetched_total"
+LIMITER_WAIT_SECONDS = "bgg_limiter_wait_seconds"
+PARSE_SECONDS = "bgg_parse_seconds"
+PARSE_CACHE_LOOKUPS = "bgg_parse_cache_lookups_total"
+ROWS_VALIDATED = "bgg_rows_validated_total"
+ROWS_REJECTED = "bgg_rows_rejected_total"
+DB_COMMIT_SECONDS = "bgg_db_commit_seconds"
+STAGE_SECONDS = "bgg_stage_seconds"
+
+METRIC_HELP = {
+    FETCH_SECONDS: "Seconds per HTTP request, retries counted separately.",
+    FETCH_BYTES: "Bytes downloaded, before decompression where the transport reports them.",
+    PAGES_FETCHED: "Ranking pages fetched, by where they came from.",
+    LIMITER_WAIT_SECONDS: "Seconds spent waiting on the rate limiter before each request.",
+    PARSE_SECONDS: "Seconds to parse and validate one page or item.",
+    PARSE_CACHE_LOOKUPS: "Parse cache lookups, by whether the page's rows were cached.",
+    ROWS_VALIDATED: "Rows that passed validation.",
+    ROWS_REJECTED: "Rows that failed validation.",
+    DB_COMMIT_SECONDS: "Seconds to write and commit one batch.",
+    STAGE_SECONDS: "Seconds spent in each pipeline stage.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: Mapping[str, str] | None) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+
+class Counter:
+    """A value that only goes up, e.g. bytes downloaded. Thread-safe."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("A counter can only be increased")
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """The distribution of observed values, e.g. fetch latencies, in cumulative buckets. Thread-safe."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_TIME_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket plus the +Inf bucket, not cumulative until exported.
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative_counts(self) -> list[int]:
+        """The count of observations at or below each bucket bound, ending with the +Inf bucket."""
+        counts, total = [], 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def summary(self) -> dict[str, float | int | None]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """Holds every counter and histogram of a run, keyed by name and labels.
+
+    Metrics are created on first use, so instrumented code only needs a name. Each process has
+    its own registry, so metrics recorded in parser worker processes stay in those processes.
+    """
+
+    def __init__(self) -> None:
+        self._counters: dict[str, dict[Labels, Counter]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+
+    def counter(self, name: str, labels: Mapping[str, str] | None = None, help: str = "") -> Counter:
+        """Gets or creates the counter `name` with `labels`."""
+        with self._lock:
+            if help:
+                self._help[name] = help
+            return self._counters.setdefault(name, {}).setdefault(_label_key(labels), Counter())
+
+    def histogram(
+            self,
+            name: str,
+            labels: Mapping[str, str] | None = None,
+            help: str = "",
+            buckets: Sequence[float] = DEFAULT_TIME_BUCKETS,
+            ) -> Histogram:
+        """Gets or creates the histogram `name` with `labels`. `buckets` only applies when it is created."""
+        with self._lock:
+            if help:
+                self._help[name] = help
+            family = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in family:
+                family[key] = Histogram(buckets)
+            return family[key]
+
+    @contextmanager
+    def timer(self, name: str, labels: Mapping[str, str] | None = None) -> Iterator[None]:
+        """Observes the seconds spent inside the block in the histogram `name`, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, labels).observe(time.perf_counter() - start)
+
+    def reset(self) -> None:
+        """Drops every metric, e.g. between runs in a long-lived process."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = datetime.now(timezone.utc)
+
+    def counters(self) -> dict[str, dict[Labels, Counter]]:
+        with self._lock:
+            return {name: dict(family) for name, family in self._counters.items()}
+
+    def histograms(self) -> dict[str, dict[Labels, Histogram]]:
+        with self._lock:
+            return {name: dict(family) for name, family in self._histograms.items()}
+
+    def help(self, name: str) -> str:
+        return self._help.get(name, METRIC_HELP.get(name, ""))
+
+    def snapshot(self) -> dict:
+        """Every metric as plain data, with labelled series listed under their metric."""
+        def series(labels: Labels, values: dict) -> dict:
+            return {"labels": dict(labels), **values}
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "counters": {
+                name: [series(labels, {"value": counter.value}) for labels, counter in sorted(family.items())]
+                for name, family in sorted(self.counters().items())
+            },
+            "histograms": {
+                name: [series(labels, histogram.summary()) for labels, histogram in sorted(family.items())]
+                for name, family in sorted(self.histograms().items())
+            },
+        }
+
+
+# The registry the pipeline records into.
+metrics = MetricsRegistry()
+
+
+def timed(name: str, labels: Mapping[str, str] | None = None, registry: MetricsRegistry | None = None):
+    """Times a block into the histogram `name` of `registry`, the global registry by default.
+
+    Args:
+        name (str): The histogram, e.g. STAGE_SECONDS.
+        labels (Mapping[str, str] | None, optional): The series' labels, e.g. {"stage": "gather"}. Defaults to None.
+        registry (MetricsRegistry | None, optional): The registry to record into. Defaults to `metrics`.
+
+    Returns:
+        A context manager.
+    """
+    return (registry or metrics).timer(name, labels)
+
+
+def _write_atomically(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class JSONSummaryExporter:
+    """Writes a run's metrics to a JSON file, one file per run."""
+
+    def __init__(self, directory: str | Path = "data/metrics", run_id: str | None = None) -> None:
+        """Initialises the JSONSummaryExporter.
+
+        Args:
+            directory (str | Path, optional): Where the summaries are written. Defaults to "data/metrics".
+            run_id (str | None, optional): Names the file, run-<run_id>.json. Defaults to the current UTC time.
+        """
+        self.directory = Path(directory)
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"run-{self.run_id}.json"
+
+    def export(self, registry: MetricsRegistry | None = None) -> Path:
+        snapshot = {"run_id": self.run_id, **(registry or metrics).snapshot()}
+        _write_atomically(self.path, json.dumps(snapshot, indent=1))
+        return self.path
+
+
+def _format_labels(labels: Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_float(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class PrometheusTextfileExporter:
+    """Writes a run's metrics in the Prometheus text format, for node_exporter's textfile collector.
+
+    The file is replaced atomically so the collector never reads a half-written file.
+    """
+
+    def __init__(self, path: str | Path = "data/metrics/bgg_pipeline.prom") -> None:
+        """Initialises the PrometheusTextfileExporter.
+
+        Args:
+            path (str | Path, optional): The .prom file to write. Defaults to "data/metrics/bgg_pipeline.prom".
+        """
+        self.path = Path(path)
+
+    def render(self, registry: MetricsRegistry | None = None) -> str:
+        registry = registry or metrics
+        lines = []
+        for name, family in sorted(registry.counters().items()):
+            if registry.help(name):
+                lines.append(f"# HELP {name} {registry.help(name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, counter in sorted(family.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_float(counter.value)}")
+        for name, family in sorted(registry.histograms().items()):
+            if registry.help(name):
+                lines.append(f"# HELP {name} {registry.help(name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(family.items()):
+                bounds = [*histogram.buckets, float("inf")]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_float(bound)),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_float(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, registry: MetricsRegistry | None = None) -> Path:
+        _write_atomically(self.path, self.render(registry))
+        return self.path
+
+
+@contextmanager
+def record_run(
+        directory: str | Path | None = None,
+        run_id: str | None = None,
+        registry: MetricsRegistry | None = None,
+        ) -> Iterator[MetricsRegistry]:
+    """Starts a run's metrics afresh, times the whole run and exports the metrics when it ends, even if it fails.
+
+    Args:
+        directory (str | Path | None, optional): Where to write the run's JSON summary and a Prometheus
+            textfile, bgg_pipeline.prom. Defaults to None, no export.
+        run_id (str | None, optional): Names the JSON summary. Defaults to the current UTC time.
+        registry (MetricsRegistry | None, optional): The registry to record into. Defaults to `metrics`.
+
+    Returns:
+        A context manager giving the registry.
+    """
+    registry = registry or metrics
+    registry.reset()
+    try:
+        with registry.timer(STAGE_SECONDS, {"stage": "total"}):
+            yield registry
+    finally:
+        if directory is not None:
+            JSONSummaryExporter(directory, run_id=run_id).export(registry)
+            PrometheusTextfileExporter(Path(directory) / "bgg_pipeline.prom").export(registry)
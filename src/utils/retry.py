@@ -0,0 +1,248 @@
+# src/utils/retry.py
+import random
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import httpx
+from utils.logging_config import get_logger
+from utils.throttler import parse_retry_after
+
+logger = get_logger(__name__)
+
+# The key of the policy for transport errors (timeouts, resets, DNS failures), which have no status code.
+TRANSPORT_ERROR = "transport"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How to retry one kind of failure.
+
+    Attributes:
+        max_attempts (int): The most attempts in total, the first one included. 1 never retries.
+        backoff_s (float): The backoff cap before the first retry. Doubles with every retry.
+        max_backoff_s (float): The largest backoff cap.
+        honour_retry_after (bool): Whether a Retry-After header replaces the backoff.
+        max_retry_after_s (float): The longest Retry-After to honour. Longer ones are clamped to it.
+    """
+    max_attempts: int = 4
+    backoff_s: float = 1.0
+    max_backoff_s: float = 30.0
+    honour_retry_after: bool = True
+    max_retry_after_s: float = 300.0
+
+    def delay(self, retry: int, retry_after: str | None = None, rng: random.Random | None = None) -> float:
+        """The wait before a retry: the Retry-After if there is one, else "full jitter" exponential backoff.
+
+        Args:
+            retry (int): Which retry this is, starting at 1.
+            retry_after (str | None, optional): The response's Retry-After header. Defaults to None.
+            rng (random.Random | None, optional): The random source for the jitter. Defaults to None.
+
+        Returns:
+            float: The seconds to wait.
+        """
+        if self.honour_retry_after:
+            retry_after_s = parse_retry_after(retry_after)
+            if retry_after_s is not None:
+                return min(retry_after_s, self.max_retry_after_s)
+        cap = min(self.max_backoff_s, self.backoff_s * 2 ** (retry - 1))
+        return (rng or random).uniform(0, cap)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+DEFAULT_RETRY_POLICIES: dict[int | str, RetryPolicy] = {
+    TRANSPORT_ERROR: RetryPolicy(),
+    # Throttled: back off for longer, and always honour Retry-After.
+    429: RetryPolicy(max_attempts=6, backoff_s=5.0, max_backoff_s=120.0),
+    500: RetryPolicy(),
+    502: RetryPolicy(),
+    503: RetryPolicy(max_attempts=5, backoff_s=2.0, max_backoff_s=60.0),
+    504: RetryPolicy(),
+    # Any other status, e.g. 404, is permanent and not retried.
+}
+
+# The statuses that count towards opening the circuit breaker, as they say the upstream is degraded.
+DEGRADED_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class FetchResult:
+    """The outcome of a request after any retries.
+
+    Attributes:
+        url (str): The requested URL.
+        response (httpx.Response | None): The final response, or None if every attempt hit a transport
+            error or no request was needed.
+        attempts (int): How many attempts were made.
+        error (str | None): Why the request failed, or None if it succeeded.
+        retryable (bool): Whether the failure was a transient one that ran out of attempts, rather
+            than a permanent one like a 404.
+        text (str | None): The page content, filled in by the caller once it has handled the response,
+            e.g. from a cache.
+    """
+    url: str
+    response: httpx.Response | None = None
+    attempts: int = 0
+    error: str | None = None
+    retryable: bool = False
+    text: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def status_code(self) -> int | None:
+        return None if self.response is None else self.response.status_code
+
+
+class CircuitBreaker:
+    """Pauses every request once the upstream looks degraded.
+
+    After `failure_threshold` consecutive degraded responses or transport errors the circuit opens
+    and `before_request` blocks for `reset_timeout_s`. Then a single trial request is let through
+    (half-open): success closes the circuit, failure opens it again. Thread-safe, so one breaker
+    can guard every worker of a crawl.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            reset_timeout_s: float = 60.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+            ) -> None:
+        """Initialises the CircuitBreaker.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to 5.
+            reset_timeout_s (float, optional): How long the circuit stays open. Defaults to 60.0.
+            clock (Callable[[], float], optional): A monotonic clock. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): The sleep function. Defaults to time.sleep.
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+
+    def before_request(self) -> float:
+        """Blocks while the circuit is open.
+
+        Returns:
+            float: The seconds spent paused.
+        """
+        paused_s = 0.0
+        while True:
+            with self._lock:
+                if self.state == self.CLOSED:
+                    return paused_s
+                remaining_s = self._opened_at + self.reset_timeout_s - self._clock()
+                if self.state == self.OPEN and remaining_s <= 0:
+                    self.state = self.HALF_OPEN
+                    return paused_s
+                if self.state == self.HALF_OPEN:
+                    # Another caller holds the trial request, so wait out a fresh timeout.
+                    remaining_s = self.reset_timeout_s
+            self._sleep(remaining_s)
+            paused_s += remaining_s
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("CIRCUIT BREAKER CLOSED, UPSTREAM HAS RECOVERED")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"CIRCUIT BREAKER OPEN AFTER {self.consecutive_failures} FAILURES, "
+                        f"PAUSING REQUESTS FOR {self.reset_timeout_s}s"
+                    )
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+def fetch_with_retry(
+        send: Callable[[], httpx.Response],
+        url: str,
+        policies: Mapping[int | str, RetryPolicy] | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        success_status_codes: frozenset[int] = frozenset({200}),
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+        ) -> FetchResult:
+    """Makes a request, retrying transient failures according to per-status policies.
+
+    Args:
+        send (Callable[[], httpx.Response]): Makes one attempt. Rate limiting belongs in here, so every
+            retry is limited too.
+        url (str): The URL, for the result and logs.
+        policies (Mapping[int | str, RetryPolicy] | None, optional): The policy for each status code,
+            with TRANSPORT_ERROR for transport errors. Unlisted statuses are not retried. Defaults to
+            DEFAULT_RETRY_POLICIES.
+        circuit_breaker (CircuitBreaker | None, optional): A breaker shared by the whole crawl. Defaults to None.
+        success_status_codes (frozenset[int], optional): The statuses that count as success. Defaults to {200}.
+        sleep (Callable[[float], None], optional): The sleep function. Defaults to time.sleep.
+        rng (random.Random | None, optional): The random source for the jitter. Defaults to None.
+
+    Returns:
+        FetchResult: The final response, or why the request failed.
+    """
+    policies = DEFAULT_RETRY_POLICIES if policies is None else policies
+    attempts = 0
+    while True:
+        if circuit_breaker is not None:
+            circuit_breaker.before_request()
+        attempts += 1
+        response = None
+        retry_after = None
+        try:
+            response = send()
+        except httpx.TransportError as e:
+            key: int | str = TRANSPORT_ERROR
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if response.status_code in success_status_codes:
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success()
+                return FetchResult(url=url, response=response, attempts=attempts)
+            key = response.status_code
+            error = f"HTTP {response.status_code}"
+            retry_after = response.headers.get("Retry-After")
+
+        degraded = key == TRANSPORT_ERROR or key in DEGRADED_STATUS_CODES
+        if circuit_breaker is not None:
+            if degraded:
+                circuit_breaker.record_failure()
+            else:
+                # A permanent error like a 404 still means the upstream is answering.
+                circuit_breaker.record_success()
+
+        policy = policies.get(key, NO_RETRY)
+        if attempts >= policy.max_attempts:
+            return FetchResult(
+                url=url,
+                response=response,
+                attempts=attempts,
+                error=error,
+                retryable=policy.max_attempts > 1,
+            )
+        delay_s = policy.delay(attempts, retry_after=retry_after, rng=rng)
+        logger.warning(f"{error} FROM {url}, RETRYING IN {delay_s:.2f}s (ATTEMPT {attempts} OF {policy.max_attempts})")
+        sleep(delay_s)
@@ -0,0 +1,89 @@
+# src/utils/streaming.py
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class _End:
+    """Marks the end of a prefetched stream, carrying the producer's error if it had one."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], max_buffered: int) -> Iterator[T]:
+    """Runs an iterable in a background thread, buffering at most `max_buffered` items.
+
+    The producer blocks once the buffer is full, so a slow consumer applies backpressure
+    to it, while a slow producer (e.g. network I/O) overlaps with the consumer's work.
+    Exceptions raised by the producer are re-raised in the consumer.
+
+    Args:
+        iterable (Iterable[T]): The items to produce in the background.
+        max_buffered (int): The maximum number of items waiting to be consumed.
+
+    Returns:
+        Iterator[T]: The items of `iterable`, in order.
+    """
+    if max_buffered < 1:
+        raise ValueError("max_buffered must be at least 1")
+
+    buffer: queue.Queue = queue.Queue(maxsize=max_buffered)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # Poll so the producer notices if the consumer has gone away.
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_End(e))
+            return
+        put(_End())
+
+    producer = threading.Thread(target=produce, name="prefetch-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _End):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
+
+
+def batched(iterable: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    """Groups an iterable into lists of at most `batch_size` items.
+
+    Args:
+        iterable (Iterable[T]): The items to group.
+        batch_size (int): The maximum size of each batch.
+
+    Returns:
+        Iterator[list[T]]: The batches, in order. The last one may be shorter.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
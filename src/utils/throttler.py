@@ -1,5 +1,11 @@
 # src/utils/throttler.py
+import asyncio
+import random
+import threading
 import time
+from collections.abc import Callable
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 
 
 class RateLimiter:
@@ -10,19 +16,229 @@ class RateLimiter:
     def __init__(self, delay_s: float, jitter_s: float = 0.0) -> None:
         """
         Sleep- if the last call was too recent. Call this right before a request.
+
+        Args:
+            delay_s (float): The minimum number of seconds between calls.
+            jitter_s (float, optional): Up to this many extra seconds, picked at random,
+                are added to each sleep. Defaults to 0.0.
         """
         self.delay_s = float(delay_s)
         self.jitter_s = float(jitter_s)
-        self._last_ts: float = 0.0
+        self._last_ts: float | None = None
+        self._lock = threading.Lock()
 
     def wait(self) -> None:
         """
         Checks the time elasped between previous and current calls.
         if the time is less than required wait till it is. Else, it carries on and sets new time.
+        Safe to call from several threads at once.
+        """
+        with self._lock:
+            if self._last_ts is not None:
+                needed = self.delay_s - (time.monotonic() - self._last_ts)
+                if needed > 0:
+                    time.sleep(needed + random.uniform(0.0, self.jitter_s))
+            self._last_ts = time.monotonic()
+
+
+class TokenBucket:
+    """
+    A token bucket shared by threads and asyncio tasks.
+
+    Tokens refill continuously at `rate_per_s` up to `capacity`, so up to `capacity`
+    requests may go out back to back before the steady rate applies. Each caller
+    reserves its token up front and then sleeps outside the lock, which keeps the
+    long-run request rate within `rate_per_s` however many callers are waiting.
+    """
+
+    def __init__(
+            self,
+            rate_per_s: float,
+            capacity: float = 1.0,
+            jitter_s: float = 0.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+            ) -> None:
+        """
+        Args:
+            rate_per_s (float): The number of tokens added to the bucket per second.
+            capacity (float, optional): The maximum number of tokens the bucket can hold,
+                i.e. the burst size. Defaults to 1.0, meaning no bursts.
+            jitter_s (float, optional): Up to this many extra seconds, picked at random,
+                are added to any wait. Defaults to 0.0.
+            clock (Callable[[], float], optional): A monotonic clock. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): The blocking sleep used by `acquire`.
+                Defaults to time.sleep.
+        """
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be a positive number")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if jitter_s < 0:
+            raise ValueError("jitter_s cannot be negative")
+        self.rate_per_s = float(rate_per_s)
+        self.capacity = float(capacity)
+        self.jitter_s = float(jitter_s)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._last_ts = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # `_last_ts` sits in the future while the bucket is paused, and nothing refills until then.
+        if now > self._last_ts:
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_ts) * self.rate_per_s)
+            self._last_ts = now
+
+    def _reserve(self, tokens: float) -> float:
+        """
+        Takes `tokens` from the bucket, letting the balance go negative, and returns how
+        long the caller must wait before its reservation is honoured.
+        """
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= tokens
+            wait_s = max(0.0, self._last_ts - now) + max(0.0, -self._tokens / self.rate_per_s)
+        if wait_s > 0 and self.jitter_s > 0:
+            wait_s += random.uniform(0.0, self.jitter_s)
+        return wait_s
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks until `tokens` are available and takes them.
+
+        Args:
+            tokens (float, optional): The number of tokens to take. Defaults to 1.0.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        wait_s = self._reserve(tokens)
+        if wait_s > 0:
+            self._sleep(wait_s)
+        return wait_s
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """
+        Waits without blocking the event loop until `tokens` are available and takes them.
+
+        Args:
+            tokens (float, optional): The number of tokens to take. Defaults to 1.0.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        wait_s = self._reserve(tokens)
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+        return wait_s
+
+    def wait(self) -> None:
+        """
+        Alias for `acquire()` so a TokenBucket can stand in for a RateLimiter.
+        """
+        self.acquire()
+
+
+def parse_retry_after(value: str | float | None) -> float | None:
+    """
+    Converts a `Retry-After` header value into a number of seconds.
+
+    Args:
+        value (str | float | None): Either delay-seconds or an HTTP date.
+
+    Returns:
+        float | None: The number of seconds to wait, or None if the value is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    A token bucket whose rate follows the server's responses (AIMD).
+
+    Every successful response adds `increase_per_s` to the rate, up to `max_rate_per_s`.
+    A throttling response (429 or 503) multiplies the rate by `decrease_factor`, down to
+    `min_rate_per_s`, and a `Retry-After` header pauses every caller until it has passed.
+    """
+
+    THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+    def __init__(
+            self,
+            rate_per_s: float,
+            capacity: float = 1.0,
+            jitter_s: float = 0.0,
+            min_rate_per_s: float | None = None,
+            max_rate_per_s: float | None = None,
+            increase_per_s: float | None = None,
+            decrease_factor: float = 0.5,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+            ) -> None:
+        """
+        Args:
+            rate_per_s (float): The starting number of tokens added per second.
+            capacity (float, optional): The burst size. Defaults to 1.0.
+            jitter_s (float, optional): Up to this many extra random seconds on any wait.
+                Defaults to 0.0.
+            min_rate_per_s (float | None, optional): The floor for the rate.
+                Defaults to a tenth of `rate_per_s`.
+            max_rate_per_s (float | None, optional): The ceiling for the rate.
+                Defaults to `rate_per_s`.
+            increase_per_s (float | None, optional): How much each success adds to the rate.
+                Defaults to a twentieth of `max_rate_per_s`.
+            decrease_factor (float, optional): What the rate is multiplied by on a throttling
+                response. Defaults to 0.5.
+            clock (Callable[[], float], optional): A monotonic clock. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): The blocking sleep used by `acquire`.
+                Defaults to time.sleep.
+        """
+        super().__init__(rate_per_s=rate_per_s, capacity=capacity, jitter_s=jitter_s, clock=clock, sleep=sleep)
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.min_rate_per_s = float(min_rate_per_s) if min_rate_per_s is not None else self.rate_per_s / 10
+        self.max_rate_per_s = float(max_rate_per_s) if max_rate_per_s is not None else self.rate_per_s
+        if not 0 < self.min_rate_per_s <= self.rate_per_s <= self.max_rate_per_s:
+            raise ValueError("rates must satisfy 0 < min_rate_per_s <= rate_per_s <= max_rate_per_s")
+        self.increase_per_s = float(increase_per_s) if increase_per_s is not None else self.max_rate_per_s / 20
+        self.decrease_factor = float(decrease_factor)
+
+    def on_response(self, status_code: int, retry_after: str | float | None = None) -> None:
+        """
+        Feeds a response back into the limiter. Call this after every request.
+
+        Args:
+            status_code (int): The HTTP status code of the response.
+            retry_after (str | float | None, optional): The response's `Retry-After` header.
+                Defaults to None.
         """
-        now = time.time()
-        elapsed = now - self._last_ts
-        needed = self.delay_s - elapsed
-        if needed > 0:
-            time.sleep(needed + (self.jitter_s * 0.5)) # tiny fixed jitter if set
-        self._last_ts = time.time()
+        with self._lock:
+            now = self._clock()
+            # Settle tokens earned at the old rate before changing it.
+            self._refill(now)
+            if status_code in self.THROTTLE_STATUS_CODES:
+                self.rate_per_s = max(self.min_rate_per_s, self.rate_per_s * self.decrease_factor)
+                delay_s = parse_retry_after(retry_after)
+                if delay_s is not None:
+                    # Pause: drop any saved-up burst and restart refilling once the delay has passed.
+                    self._tokens = min(self._tokens, 0.0)
+                    self._last_ts = max(self._last_ts, now + delay_s)
+            elif status_code < 400:
+                self.rate_per_s = min(self.max_rate_per_s, self.rate_per_s + self.increase_per_s)
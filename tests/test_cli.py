@@ -0,0 +1,102 @@
+# tests/test_cli.py
+import importlib
+import sqlite3
+import subprocess
+import sys
+import tomllib
+import pytest
+from pathlib import Path
+from src.cli import PARSER_BACKENDS, build_parser, main
+from src.parsers.backends import PARSER_BACKENDS as HTML_PARSER_BACKENDS
+from src.pipeline import fetch_page_shard
+from src.sources.page_cache import RawPageCache
+from tests.test_pipeline import CRAWL_DATE, mocked_html_pages
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+PYPROJECT = SRC_DIR.parent / "pyproject.toml"
+CLI = str(SRC_DIR / "cli.py")
+
+
+def run_cli(*args: str, cwd: Path) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, CLI, *args], cwd=cwd, capture_output=True, text=True, timeout=120)
+
+
+def loaded_modules(code: str, cwd: Path) -> set[str]:
+    script = f"import sys\nsys.path.insert(0, {str(SRC_DIR)!r})\n{code}\nprint(' '.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return set(result.stdout.splitlines()[-1].split())
+
+
+# ------------ Testing the lazy imports ------------
+def test_help_imports_nothing_heavy(tmp_path):
+    modules = loaded_modules("import cli\ntry:\n    cli.main(['--help'])\nexcept SystemExit:\n    pass", tmp_path)
+    assert not {"pipeline", "sqlalchemy", "httpx", "bs4", "pyarrow"} & modules
+    assert not (tmp_path / "app.log").exists()
+
+
+def test_importing_the_pipeline_has_no_side_effects(tmp_path):
+    modules = loaded_modules("import pipeline", tmp_path)
+    assert not {"sqlalchemy", "httpx", "bs4", "lxml", "pyarrow"} & modules
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parser_backends_match_the_parsers():
+    assert PARSER_BACKENDS == HTML_PARSER_BACKENDS
+
+
+# ------------ Testing the entry point ------------
+def test_bgg_pipeline_script_resolves_to_main():
+    pyproject = tomllib.loads(PYPROJECT.read_text(encoding="utf-8"))
+    module_name, function_name = pyproject["project"]["scripts"]["bgg-pipeline"].split(":")
+    assert getattr(importlib.import_module(module_name), function_name) is main
+    # Poetry only installs scripts for packages.
+    assert pyproject["tool"]["poetry"].get("package-mode", True)
+    assert {"include": "src"} in pyproject["tool"]["poetry"]["packages"]
+
+
+# ------------ Testing the subcommands ------------
+def test_parse_args():
+    args = build_parser().parse_args(["parse", "--crawl-date", "2024-06-01", "--stop", "3", "--shard-size", "2"])
+    assert args.crawl_date == CRAWL_DATE
+    assert (args.start, args.stop, args.shard_size) == (1, 3, 2)
+    assert args.staging_dir == "data/staging"
+    args = build_parser().parse_args(["run", "--concurrency", "4", "--rps", "2", "--max-rps", "4", "--burst", "4"])
+    assert (args.concurrency, args.rps, args.max_rps, args.burst) == (4, 2.0, 4.0, 4)
+
+
+def test_run_rejects_streaming_with_concurrency(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(["run", "--streaming", "--concurrency", "4"])
+    assert exit_info.value.code == 2
+    assert "not allowed with argument" in capsys.readouterr().err
+
+
+def test_parse_then_load_from_the_page_store(tmp_path):
+    cache_dir = tmp_path / "cache"
+    html_pages, _ = mocked_html_pages(RawPageCache(root=cache_dir))
+    fetch_page_shard(1, 5, html_pages=html_pages)
+    common = ["--log-file", str(tmp_path / "cli.log")]
+    date_args = ["--crawl-date", CRAWL_DATE.isoformat()]
+
+    parsed = run_cli(
+        *common, "parse", *date_args, "--cache-dir", str(cache_dir), "--staging-dir", "staging", "--shard-size", "2",
+        cwd=tmp_path,
+    )
+    assert parsed.returncode == 0, parsed.stderr
+    assert len(parsed.stdout.split()) == 3
+
+    database = tmp_path / "bgg.db"
+    loaded = run_cli(
+        *common, "--database-url", f"sqlite:///{database}", "load", *date_args, "--staging-dir", "staging", "--history",
+        cwd=tmp_path,
+    )
+    assert loaded.returncode == 0, loaded.stderr
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("SELECT COUNT(*), MIN(rank), MAX(rank) FROM Games").fetchone() == (15, 1, 15)
+
+
+def test_load_without_shards_fails(tmp_path):
+    result = run_cli("--log-file", str(tmp_path / "cli.log"), "load", "--staging-dir", "staging", cwd=tmp_path)
+    assert result.returncode == 1
+    assert "No staged shards" in result.stderr
@@ -0,0 +1,82 @@
+# tests/test_crawl_bounds.py
+import pytest
+from src.crawl_bounds import BoundedRankingCrawl, CrawlBounds, RankDiscontinuity
+from schemas import GameRank
+
+
+def page_of(first_rank: int, last_rank: int) -> list[GameRank]:
+    return [GameRank(id=rank * 10, rank=rank, name=f"Game {rank}") for rank in range(first_rank, last_rank + 1)]
+
+
+# ------------ Testing CrawlBounds ------------
+def test_crawl_bounds_rank_limit():
+    assert CrawlBounds().rank_limit is None
+    assert CrawlBounds(top_n=1000).rank_limit == 1000
+    assert CrawlBounds(top_n=1000, max_rank=250).rank_limit == 250
+
+
+def test_crawl_bounds_last_page_for_top_n():
+    assert CrawlBounds(top_n=1000).last_page(page_size=100, last_page=1500) == 10
+    assert CrawlBounds(top_n=1001).last_page(page_size=100, last_page=1500) == 11
+    assert CrawlBounds(top_n=10**6).last_page(page_size=100, last_page=1500) == 1500
+    assert CrawlBounds(max_rank=1000).last_page(page_size=100, last_page=1500) == 1500
+
+
+@pytest.mark.parametrize("bounds", [{"top_n": 0}, {"max_rank": -1}])
+def test_crawl_bounds_rejects_non_positive_limits(bounds):
+    with pytest.raises(ValueError):
+        CrawlBounds(**bounds)
+
+
+# ------------ Testing BoundedRankingCrawl ------------
+def test_bounded_ranking_crawl_without_bounds_keeps_everything():
+    crawl = BoundedRankingCrawl()
+    assert crawl.accept_page(1, page_of(1, 3)) == page_of(1, 3)
+    assert crawl.accept_page(2, page_of(4, 6)) == page_of(4, 6)
+    assert not crawl.finished
+    assert crawl.discontinuities == []
+
+
+def test_bounded_ranking_crawl_trims_and_stops_at_max_rank():
+    crawl = BoundedRankingCrawl(CrawlBounds(max_rank=5))
+    assert crawl.accept_page(1, page_of(1, 3)) == page_of(1, 3)
+    assert not crawl.finished
+    assert crawl.accept_page(2, page_of(4, 6)) == page_of(4, 5)
+    assert crawl.finished
+
+
+def test_bounded_ranking_crawl_stops_on_unranked_page():
+    crawl = BoundedRankingCrawl(CrawlBounds(stop_on_unranked_page=True))
+    assert crawl.accept_page(1, page_of(1, 3)) == page_of(1, 3)
+    assert not crawl.finished
+    # The ranked games on the page where the unranked games begin are kept.
+    assert crawl.accept_page(2, page_of(4, 5), unranked=1) == page_of(4, 5)
+    assert crawl.finished
+
+    crawl = BoundedRankingCrawl()
+    assert crawl.accept_page(2, page_of(4, 5), unranked=1) == page_of(4, 5)
+    assert not crawl.finished
+
+
+def test_bounded_ranking_crawl_does_not_stop_on_page_without_valid_games():
+    crawl = BoundedRankingCrawl(CrawlBounds(stop_on_unranked_page=True, max_rank=10))
+    assert crawl.accept_page(1, []) == []
+    assert not crawl.finished
+
+
+def test_bounded_ranking_crawl_reports_discontinuities(caplog):
+    crawl = BoundedRankingCrawl()
+    crawl.accept_page(1, page_of(1, 3))
+    crawl.accept_page(2, page_of(3, 5)) # A game moved down a page mid-crawl, so rank 3 repeats.
+    crawl.accept_page(4, page_of(9, 10)) # Page 3 is missing.
+    assert crawl.discontinuities == [RankDiscontinuity(2, 4, 3), RankDiscontinuity(4, 6, 9)]
+    assert "PAGE 2 RANKS ARE NOT CONTIGUOUS" in caplog.text
+
+
+def test_bounded_ranking_crawl_does_not_check_pages_that_arrive_late():
+    crawl = BoundedRankingCrawl(CrawlBounds(max_rank=8))
+    crawl.accept_page(1, page_of(1, 3))
+    crawl.accept_page(3, page_of(7, 9)) # Page 2 failed and is retried after page 3.
+    assert crawl.accept_page(2, page_of(4, 6)) == page_of(4, 6)
+    assert crawl.discontinuities == [RankDiscontinuity(3, 4, 7)]
+    assert (crawl.last_page, crawl.last_rank) == (3, 9)
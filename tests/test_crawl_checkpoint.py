@@ -0,0 +1,172 @@
+# tests/test_crawl_checkpoint.py
+from datetime import date
+import pytest
+from src.sources.crawl_checkpoint import CrawlCheckpoint, ResumableCrawl
+from src.utils.retry import FetchResult
+
+
+class FakeHTMLPages:
+    """Stands in for HTMLPages with a cache, counting the pages that had to go to the network."""
+
+    def __init__(
+            self,
+            crawl_date: date = date(2026, 10, 1),
+            failures: dict[int, int] | None = None,
+            missing: set[int] | None = None,
+            ) -> None:
+        self.cache = {}
+        self.crawl_date = crawl_date
+        self.failures = dict(failures or {})
+        self.missing = set(missing or ())
+        self.network_fetches = []
+
+    def fetch_ranking_page_result(self, page: int) -> FetchResult:
+        url = f"https://boardgamegeek.com/browse/boardgame/page/{page}"
+        if page in self.cache:
+            return FetchResult(url=url, text=self.cache[page])
+        self.network_fetches.append(page)
+        if page in self.missing:
+            return FetchResult(url=url, attempts=1, error="HTTP 404")
+        if self.failures.get(page, 0) > 0:
+            self.failures[page] -= 1
+            return FetchResult(url=url, attempts=5, error="HTTP 503", retryable=True)
+        self.cache[page] = f"<html>{page}</html>"
+        return FetchResult(url=url, attempts=1, text=self.cache[page])
+
+
+def no_sleep(delay_s: float) -> None:
+    pass
+
+
+# ------------ Testing CrawlCheckpoint ------------
+def test_crawl_checkpoint_round_trip(tmp_path):
+    checkpoint = CrawlCheckpoint.new(date(2026, 10, 1), start=1, stop=5)
+    checkpoint.mark_completed(1)
+    checkpoint.mark_completed(2)
+    checkpoint.mark_failed(4, "Page was not fetched")
+    checkpoint.mark_failed(5, "HTTP 404", retryable=False)
+    checkpoint.save(tmp_path / "crawl.json")
+
+    loaded = CrawlCheckpoint.load(tmp_path / "crawl.json")
+    assert loaded == checkpoint
+    assert loaded.crawl_id.startswith("2026-10-01-")
+    assert loaded.pending == [3, 4, 5]
+    assert loaded.attempts == {4: 1, 5: 1}
+    assert loaded.permanently_failed == {5}
+
+
+def test_crawl_checkpoint_load_missing(tmp_path):
+    assert CrawlCheckpoint.load(tmp_path / "missing.json") is None
+
+
+# ------------ Testing ResumableCrawl ------------
+def test_resumable_crawl_fetches_every_page(tmp_path):
+    html_pages = FakeHTMLPages()
+    crawl = ResumableCrawl(html_pages, tmp_path / "crawl.json", sleep=no_sleep)
+    assert [page for page, _ in crawl.iter_ranking_pages(start=1, stop=4)] == [1, 2, 3, 4]
+
+    checkpoint = CrawlCheckpoint.load(tmp_path / "crawl.json")
+    assert checkpoint.finished
+    assert checkpoint.completed == {1, 2, 3, 4}
+    assert ResumableCrawl.resume_point(tmp_path / "crawl.json") is None
+
+
+def test_resumable_crawl_resumes_after_interruption(tmp_path):
+    html_pages = FakeHTMLPages()
+    pages = ResumableCrawl(html_pages, tmp_path / "crawl.json", sleep=no_sleep).iter_ranking_pages(start=1, stop=5)
+    assert [next(pages)[0] for _ in range(3)] == [1, 2, 3]
+    pages.close() # The process dies here.
+
+    crawl_id = CrawlCheckpoint.load(tmp_path / "crawl.json").crawl_id
+    assert ResumableCrawl.resume_point(tmp_path / "crawl.json").pending == [4, 5]
+
+    html_pages.network_fetches.clear()
+    crawl = ResumableCrawl(html_pages, tmp_path / "crawl.json", sleep=no_sleep)
+    assert [page for page, _ in crawl.iter_ranking_pages(start=1, stop=5)] == [1, 2, 3, 4, 5]
+    assert html_pages.network_fetches == [4, 5]
+    assert crawl.checkpoint.crawl_id == crawl_id
+
+
+def test_resumable_crawl_saves_completed_pages_in_batches(tmp_path):
+    crawl = ResumableCrawl(FakeHTMLPages(), tmp_path / "crawl.json", save_every_pages=2, sleep=no_sleep, clock=lambda: 0.0)
+    pages = crawl.iter_ranking_pages(start=1, stop=5)
+    assert [next(pages)[0] for _ in range(3)] == [1, 2, 3]
+    # Page 3 is only recorded with the next batch, or when the crawl is closed.
+    assert CrawlCheckpoint.load(tmp_path / "crawl.json").completed == {1, 2}
+    pages.close()
+    assert CrawlCheckpoint.load(tmp_path / "crawl.json").completed == {1, 2, 3}
+
+
+def test_resumable_crawl_saves_failures_at_once(tmp_path):
+    crawl = ResumableCrawl(FakeHTMLPages(failures={1: 1}), tmp_path / "crawl.json", save_every_pages=10, sleep=no_sleep, clock=lambda: 0.0)
+    pages = crawl.iter_ranking_pages(start=1, stop=3)
+    assert next(pages)[0] == 2
+    assert CrawlCheckpoint.load(tmp_path / "crawl.json").failed == {1: "HTTP 503"}
+    assert "pending" not in (tmp_path / "crawl.json").read_text(encoding="utf-8")
+
+
+def test_resumable_crawl_finish_stops_it_being_resumed(tmp_path):
+    crawl = ResumableCrawl(FakeHTMLPages(), tmp_path / "crawl.json", sleep=no_sleep)
+    pages = crawl.iter_ranking_pages(start=1, stop=5)
+    assert [next(pages)[0] for _ in range(2)] == [1, 2]
+    crawl.finish() # The crawl reached its bounds.
+
+    assert CrawlCheckpoint.load(tmp_path / "crawl.json").finished
+    assert ResumableCrawl.resume_point(tmp_path / "crawl.json") is None
+
+
+def test_resumable_crawl_retries_failed_pages_with_bounded_backoff(tmp_path):
+    html_pages = FakeHTMLPages(failures={2: 2, 3: 10})
+    sleeps = []
+    crawl = ResumableCrawl(html_pages, tmp_path / "crawl.json", max_attempts=3, backoff_s=1.0, max_backoff_s=1.5, sleep=sleeps.append)
+
+    results = list(crawl.iter_ranking_pages(start=1, stop=4))
+    assert [page for page, _ in results] == [1, 4, 2, 3]
+    assert results[-1] == (3, None)
+    assert sleeps == [1.0, 1.5]
+    assert html_pages.network_fetches.count(3) == 3
+
+    checkpoint = CrawlCheckpoint.load(tmp_path / "crawl.json")
+    assert checkpoint.finished
+    assert checkpoint.failed == {3: "HTTP 503"}
+    assert checkpoint.pending == [3]
+
+
+def test_resumable_crawl_does_not_retry_permanent_failures(tmp_path):
+    html_pages = FakeHTMLPages(failures={2: 1}, missing={3})
+    sleeps = []
+    crawl = ResumableCrawl(html_pages, tmp_path / "crawl.json", max_attempts=3, sleep=sleeps.append)
+
+    assert [(page, html is not None) for page, html in crawl.iter_ranking_pages(start=1, stop=3)] == [(1, True), (2, True), (3, False)]
+    assert html_pages.network_fetches.count(3) == 1
+    assert len(sleeps) == 1 # The one round retrying page 2.
+    assert crawl.checkpoint.failed == {3: "HTTP 404"}
+    assert crawl.checkpoint.permanently_failed == {3}
+
+
+def test_resumable_crawl_records_exceptions(tmp_path):
+    def fetch_ranking_page_result(page: int) -> FetchResult:
+        raise ConnectionError("reset")
+
+    html_pages = FakeHTMLPages()
+    html_pages.fetch_ranking_page_result = fetch_ranking_page_result
+    crawl = ResumableCrawl(html_pages, tmp_path / "crawl.json", max_attempts=1, sleep=no_sleep)
+    assert list(crawl.iter_ranking_pages(start=1, stop=1)) == [(1, None)]
+    assert crawl.checkpoint.failed == {1: "ConnectionError: reset"}
+
+
+def test_resumable_crawl_starts_fresh_for_another_crawl_date(tmp_path):
+    pages = ResumableCrawl(FakeHTMLPages(), tmp_path / "crawl.json", sleep=no_sleep).iter_ranking_pages(start=1, stop=3)
+    next(pages)
+    pages.close()
+
+    crawl = ResumableCrawl(FakeHTMLPages(crawl_date=date(2026, 10, 2)), tmp_path / "crawl.json", sleep=no_sleep)
+    list(crawl.iter_ranking_pages(start=1, stop=3))
+    assert crawl.checkpoint.crawl_date == date(2026, 10, 2)
+
+
+def test_resumable_crawl_requires_cache(tmp_path):
+    html_pages = FakeHTMLPages()
+    html_pages.cache = None
+    with pytest.raises(ValueError):
+        ResumableCrawl(html_pages, tmp_path / "crawl.json")
@@ -0,0 +1,66 @@
+# tests/test_database.py
+from sqlalchemy import inspect, text
+from src.database import StorageProfile, create_db_engine, init_db, bulk_load_mode
+
+
+def pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+# ------------ Testing create_db_engine ------------
+def test_create_db_engine_applies_default_profile(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'bgg.db'}", profile="default")
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1 # NORMAL
+    assert pragma(engine, "cache_size") == -64 * 1024
+    assert pragma(engine, "temp_store") == 2 # MEMORY
+    assert pragma(engine, "busy_timeout") == 5000
+    engine.dispose()
+
+
+def test_create_db_engine_applies_custom_profile(tmp_path):
+    profile = StorageProfile(journal_mode="DELETE", synchronous="FULL", cache_size_kib=1024)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'bgg.db'}", profile=profile)
+    assert pragma(engine, "journal_mode") == "delete"
+    assert pragma(engine, "synchronous") == 2 # FULL
+    assert pragma(engine, "cache_size") == -1024
+    engine.dispose()
+
+
+def test_create_db_engine_defaults_to_database_url(tmp_path, monkeypatch):
+    import src.database as database
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'env.db'}")
+    engine = database.create_db_engine()
+    assert engine.url.database == str(tmp_path / "env.db")
+
+
+# ------------ Testing init_db ------------
+def test_init_db_creates_folder_and_tables(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'nested' / 'bgg.db'}")
+    init_db(engine)
+    assert {"Games", "RankHistory"} <= set(inspect(engine).get_table_names())
+    engine.dispose()
+
+
+# ------------ Testing bulk_load_mode ------------
+def test_bulk_load_mode_defers_secondary_indexes(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'bgg.db'}")
+    init_db(engine)
+    index_names = lambda: {index["name"] for index in inspect(engine).get_indexes("RankHistory")}
+    assert "ix_RankHistory_crawl_date_rank" in index_names()
+    with bulk_load_mode(engine):
+        assert "ix_RankHistory_crawl_date_rank" not in index_names()
+    assert "ix_RankHistory_crawl_date_rank" in index_names()
+    engine.dispose()
+
+
+def test_bulk_load_mode_skips_syncs_during_the_load(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'bgg.db'}", profile="default")
+    init_db(engine)
+    with bulk_load_mode(engine):
+        assert pragma(engine, "synchronous") == 0 # OFF
+        assert pragma(engine, "cache_size") == -256 * 1024
+    assert pragma(engine, "synchronous") == 1 # NORMAL
+    assert pragma(engine, "cache_size") == -64 * 1024
+    engine.dispose()
@@ -0,0 +1,82 @@
+# tests/test_history.py
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.history import RankMove, record_snapshot, rank_history, top_n, movers
+from models import Base
+from schemas import GameRankCreate
+
+DAY_1 = date(2026, 1, 1)
+DAY_2 = date(2026, 1, 2)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    record_snapshot(session, DAY_1, [
+        GameRankCreate(id=10, rank=1, name="A"),
+        GameRankCreate(id=20, rank=2, name="B"),
+        GameRankCreate(id=30, rank=3, name="C"),
+        GameRankCreate(id=40, rank=4, name="D"),
+    ])
+    record_snapshot(session, DAY_2, [
+        GameRankCreate(id=40, rank=1, name="D"),
+        GameRankCreate(id=10, rank=2, name="A"),
+        GameRankCreate(id=30, rank=3, name="C"),
+        GameRankCreate(id=50, rank=4, name="E"),
+    ], batch_size=3)
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+# ------------ Testing record_snapshot ------------
+def test_record_snapshot_stores_dates_compactly(db):
+    assert db.execute(text('SELECT DISTINCT crawl_date FROM "RankHistory" ORDER BY 1')).scalars().all() == [20260101, 20260102]
+
+
+def test_record_snapshot_overwrites_same_date(db):
+    record_snapshot(db, DAY_2, [GameRankCreate(id=40, rank=7, name="D")])
+    assert rank_history(db, 40) == [(DAY_1, 4), (DAY_2, 7)]
+
+
+# ------------ Testing rank_history ------------
+def test_rank_history(db):
+    assert rank_history(db, 10) == [(DAY_1, 1), (DAY_2, 2)]
+    assert rank_history(db, 10, start=DAY_2) == [(DAY_2, 2)]
+    assert rank_history(db, 10, end=DAY_1) == [(DAY_1, 1)]
+    assert rank_history(db, 99) == []
+
+
+# ------------ Testing top_n ------------
+def test_top_n(db):
+    assert top_n(db, DAY_2, n=2) == [(1, 40), (2, 10)]
+    assert top_n(db, date(2026, 1, 3)) == []
+
+
+# ------------ Testing movers ------------
+def test_movers_climbers(db):
+    assert movers(db, DAY_1, DAY_2) == [RankMove(game_id=40, from_rank=4, to_rank=1)]
+
+
+def test_movers_fallers(db):
+    moves = movers(db, DAY_1, DAY_2, fallers=True)
+    assert moves == [RankMove(game_id=10, from_rank=1, to_rank=2)]
+    assert moves[0].change == -1
+
+
+def test_history_queries_use_indexes(db):
+    plans = [
+        " ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+        for query in (
+            'SELECT crawl_date, rank FROM "RankHistory" WHERE game_id = 10 ORDER BY crawl_date',
+            'SELECT rank, game_id FROM "RankHistory" WHERE crawl_date = 20260102 ORDER BY rank LIMIT 10',
+        )
+    ]
+    assert "PRIMARY KEY" in plans[0]
+    assert "ix_RankHistory_crawl_date_rank" in plans[1]
+    assert all("SCAN" not in plan for plan in plans)
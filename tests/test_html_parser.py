@@ -3,9 +3,18 @@ from src.parsers.html_parsers import (
     extract_game_ids_and_names, 
     extract_game_ranks, 
     parse_html_ranking_page,
+    parse_html_ranking_page_batch,
+    parse_html_ranking_page_strict,
     get_html_last_page_number,
+    extract_game_ids_names_and_ranks,
+    parse_ranking_page,
+    PARSER_BACKENDS,
+    lxml_html,
     )
+from src.parsers import html_parsers
 from src.schemas import GameRankCreate
+from src.utils.metrics import ROWS_REJECTED
+from utils.metrics import metrics
 from bs4 import BeautifulSoup
 import pytest
 import logging
@@ -42,6 +51,43 @@ valid_mock_html_content = """
 </html>
 """
 
+# Closer to a real browse page: other links, an anchor inside the rank cell and escaped names.
+realistic_mock_html_content = """
+<html>
+<body>
+    <a href="/browse/boardgame" class="nav">Browse</a>
+    <div class="infobox">
+        <a href="/browse/boardgame/page/2" title="next page">Next &raquo;</a>
+        <a href="/browse/boardgame/page/1727" title="last page">[1727]</a>
+    </div>
+    <table id="collectionitems">
+        <tr id="row_">
+            <td class="collection_rank">
+                <a name="101"></a>
+                101
+            </td>
+            <td class="collection_thumbnail"><a href="/boardgame/13/catan"><img src="x.jpg"></a></td>
+            <td class="collection_objectname">
+                <a href="/boardgame/13/catan" class="primary">CATAN</a>
+                <span class="smallerfont dull">(1995)</span>
+            </td>
+        </tr>
+        <tr id="row_">
+            <td class="collection_rank">
+                <a name="102"></a>
+                102
+            </td>
+            <td class="collection_thumbnail"><a href="/boardgame/822/carcassonne"><img src="y.jpg"></a></td>
+            <td class="collection_objectname">
+                <a href="/boardgame/822/carcassonne" class="primary">Tom &amp; Jerry&#39;s <b>Carcassonne</b></a>
+            </td>
+        </tr>
+    </table>
+    <a href="/browse/boardgame/page/1727" title="last page">[1]</a>
+</body>
+</html>
+"""
+
 invalid_mock_html_content = """
 "<html>This html content will fail to parse and will trigger the logging</html>"
 """
@@ -120,4 +166,122 @@ def test_get_html_last_page_number_output():
 
 def test_get_html_last_page_number_without_correct_tags():
     with pytest.raises(ValueError):
-        get_html_last_page_number(invalid_mock_html_content)
\ No newline at end of file
+        get_html_last_page_number(invalid_mock_html_content)
+
+
+# ------------ Testing parser backends ------------
+@pytest.fixture(params=PARSER_BACKENDS)
+def backend(request):
+    if request.param == "lxml" and lxml_html is None:
+        pytest.skip("lxml is not installed")
+    return request.param
+
+
+def test_parse_html_ranking_page_backends_output(backend):
+    output = parse_html_ranking_page(html_content=valid_mock_html_content, backend=backend)
+    assert output is not None
+    assert [(game.id, game.rank, game.name) for game in output] == [
+        (224517, 1, "Brass: Birmingham"),
+        (342942, 2, "Ark Nova"),
+    ]
+
+
+def test_parse_html_ranking_page_backends_match_bs4_on_realistic_page(backend):
+    expected = extract_game_ids_names_and_ranks(realistic_mock_html_content, backend="bs4")
+    assert expected == ([(13, "CATAN"), (822, "Tom & Jerry's Carcassonne")], [101, 102])
+    assert extract_game_ids_names_and_ranks(realistic_mock_html_content, backend=backend) == expected
+
+
+def test_parse_html_ranking_page_batch_backends_output(backend):
+    batch = parse_html_ranking_page_batch(valid_mock_html_content, backend=backend)
+    assert list(batch) == [(224517, 1, "Brass: Birmingham"), (342942, 2, "Ark Nova")]
+    assert batch.rejections == []
+
+
+def test_parse_html_ranking_page_batch_rejects_invalid_rows():
+    batch = parse_html_ranking_page_batch(valid_mock_html_content.replace("                    1\n", "                    0\n", 1))
+    assert list(batch) == [(342942, 2, "Ark Nova")]
+    assert [rejection.row["id"] for rejection in batch.rejections] == [224517]
+
+
+def test_parse_html_ranking_page_batch_rejects_malformed_rank_row_only(backend):
+    metrics.reset()
+    batch = parse_html_ranking_page_batch(valid_mock_html_content.replace("                    1\n", "                    1st\n", 1), backend=backend)
+    assert list(batch) == [(342942, 2, "Ark Nova")]
+    assert [(rejection.row["id"], rejection.row["rank"]) for rejection in batch.rejections] == [(224517, "1st")]
+    assert metrics.counter(ROWS_REJECTED, {"dataset": "rankings"}).value == 1
+
+
+def test_parse_html_ranking_page_batch_keeps_ranked_rows_of_mixed_page(backend):
+    page = valid_mock_html_content.replace("                    2\n", "                    N/A\n", 1)
+    batch = parse_html_ranking_page_batch(page, backend=backend)
+    assert list(batch) == [(224517, 1, "Brass: Birmingham")]
+    assert batch.unranked == 1
+    assert batch.rejections == []
+    assert extract_game_ids_names_and_ranks(page, backend=backend)[1] == [1, None]
+    assert [game.id for game in parse_html_ranking_page(page, backend=backend)] == [224517]
+
+
+def test_parse_html_ranking_page_batch_raises_on_missing_tags(backend):
+    with pytest.raises(ValueError):
+        parse_html_ranking_page_batch(invalid_mock_html_content, backend=backend)
+
+
+def test_parse_html_ranking_page_backends_logging(backend, caplog):
+    caplog.set_level(logging.ERROR)
+    assert parse_html_ranking_page(invalid_mock_html_content, backend=backend) is None
+    assert "HTML content failed to parse with error:" in caplog.text
+
+
+def test_get_html_last_page_number_backends_output(backend):
+    assert get_html_last_page_number(valid_mock_html_content, backend=backend) == 1727
+    assert get_html_last_page_number(realistic_mock_html_content, backend=backend) == 1727
+
+
+def test_get_html_last_page_number_backends_without_correct_tags(backend):
+    with pytest.raises(ValueError):
+        get_html_last_page_number(invalid_mock_html_content, backend=backend)
+
+
+def test_unknown_parser_backend():
+    with pytest.raises(ValueError):
+        parse_html_ranking_page(valid_mock_html_content, backend="regex")
+
+
+# ------------ Testing parse_ranking_page ------------
+def test_parse_ranking_page_exposes_rows_and_metadata(backend):
+    page = parse_ranking_page(valid_mock_html_content, backend=backend)
+    assert page.game_ids_and_names == [(224517, "Brass: Birmingham"), (342942, "Ark Nova")]
+    assert page.game_ranks == [1, 2]
+    assert page.last_page_number == 1727
+    assert page.page_size == 2
+    assert page.estimated_total_games == 3454
+    assert list(page.batch()) == [(224517, 1, "Brass: Birmingham"), (342942, 2, "Ark Nova")]
+
+
+def test_parse_ranking_page_errors_are_raised_by_what_is_read(backend):
+    page = parse_ranking_page(invalid_mock_html_content, backend=backend)
+    with pytest.raises(ValueError, match="class=primary"):
+        page.game_ids_and_names
+    with pytest.raises(ValueError, match="last page number"):
+        page.last_page_number
+    # A malformed row does not hide the last page link.
+    page = parse_ranking_page(valid_mock_html_content.replace("                    2\n", "                    two\n", 1), backend=backend)
+    assert page.last_page_number == 1727
+    with pytest.raises(ValueError):
+        page.game_ranks
+
+
+def test_entry_points_share_one_tree_per_page(monkeypatch):
+    built = []
+    def counting_soup(*args, **kwargs):
+        built.append(args)
+        return BeautifulSoup(*args, **kwargs)
+    monkeypatch.setattr(html_parsers, "BeautifulSoup", counting_soup)
+    page_1 = valid_mock_html_content.replace("Ark Nova", "Ark Nova: Page 1")
+
+    assert get_html_last_page_number(page_1) == 1727
+    assert len(parse_html_ranking_page_batch(page_1)) == 2
+    assert len(parse_html_ranking_page_strict(page_1)) == 2
+    assert len(built) == 1
+
@@ -2,78 +2,213 @@
 import pytest
 import logging
 import httpx
+import time
+from datetime import date
 from unittest.mock import patch, mock_open
-from src.sources.html_pages import HTMLPages
+from src.sources.html_pages import HTMLPages, AsyncHTMLPages
+from src.sources.page_cache import RawPageCache
+
+
+class MockBGG:
+    """A MockTransport handler that serves canned responses in turn, repeating the last one, and records every request."""
+
+    def __init__(self, *responses: httpx.Response) -> None:
+        self.responses = list(responses)
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        return httpx.Response(response.status_code, headers=response.headers, stream=response.stream)
+
+    @property
+    def call_count(self) -> int:
+        return len(self.requests)
+
+
+def mocked_html_pages(*responses: httpx.Response, **kwargs) -> tuple[HTMLPages, MockBGG]:
+    mock_bgg = MockBGG(*responses)
+    return HTMLPages(delay_s=0.0, transport=httpx.MockTransport(mock_bgg), **kwargs), mock_bgg
 
 
 # ------------ Testing test_fetch_ranking_page ------------
 def test_fetch_ranking_page_output():
-    html_pages = HTMLPages(delay_s=0.0)
+    html_pages, _ = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
 
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(200, text="<html>Mocked content</html>")
-        mock_get.return_value = mock_response
-
-        output = html_pages.fetch_ranking_page(page=1)
-        assert output == "<html>Mocked content</html>"
+    output = html_pages.fetch_ranking_page(page=1)
+    assert output == "<html>Mocked content</html>"
 
 
 def test_fetch_ranking_page_type():
-    html_pages = HTMLPages(delay_s=0.0)
-
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(200, text="<html>Mocked content</html>")
-        mock_get.return_value = mock_response
+    html_pages, _ = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
 
-        output = html_pages.fetch_ranking_page(page=1)
-        assert type(output) == str
+    output = html_pages.fetch_ranking_page(page=1)
+    assert type(output) == str
     
 
 def test_fetch_ranking_page_on_non_200_status_code(caplog):
     caplog.set_level(logging.ERROR)
-    html_pages = HTMLPages(delay_s=0.0)
+    html_pages, _ = mocked_html_pages(httpx.Response(404, text="Not Found"))
+
+    output = html_pages.fetch_ranking_page(page=1)
+    assert output is None
+    assert "The following URL failed to return status code 200:" in caplog.text
+
+
+def test_fetch_ranking_page_retries_transient_errors():
+    sleeps = []
+    html_pages, _ = mocked_html_pages(
+        httpx.Response(503),
+        httpx.Response(200, text="<html>Mocked content</html>"),
+        sleep=sleeps.append,
+    )
+
+    result = html_pages.fetch_ranking_page_result(page=1)
+    assert result.ok
+    assert result.attempts == 2
+    assert result.text == "<html>Mocked content</html>"
+    assert len(sleeps) == 1
+
+
+def test_fetch_ranking_page_result_reports_failure():
+    html_pages, _ = mocked_html_pages(httpx.Response(404, text="Not Found"))
+
+    result = html_pages.fetch_ranking_page_result(page=1)
+    assert not result.ok
+    assert result.text is None
+    assert (result.status_code, result.error, result.retryable) == (404, "HTTP 404", False)
+
+
+def test_fetch_ranking_page_sends_configured_headers():
+    html_pages, mock_bgg = mocked_html_pages(
+        httpx.Response(200, text="<html>Mocked content</html>"),
+        user_agent="test-agent/1.0",
+        headers={"From": "data@example.com"},
+    )
 
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(404, text="Not Found")
-        mock_get.return_value = mock_response
+    html_pages.fetch_ranking_page(page=1)
+    request = mock_bgg.requests[0]
+    assert request.headers["User-Agent"] == "test-agent/1.0"
+    assert request.headers["From"] == "data@example.com"
+    assert "gzip" in request.headers["Accept-Encoding"]
+
+
+def test_fetch_ranking_page_decodes_gzip():
+    import gzip
+    html_pages, _ = mocked_html_pages(
+        httpx.Response(200, content=gzip.compress(b"<html>Mocked content</html>"), headers={"Content-Encoding": "gzip"})
+    )
+    assert html_pages.fetch_ranking_page(page=1) == "<html>Mocked content</html>"
+
+
+# ------------ Testing the pooled client ------------
+def test_html_pages_reuses_one_client():
+    html_pages, _ = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
+    html_pages.fetch_ranking_pages(start=1, stop=3)
+    assert html_pages.client is html_pages.client
+
+
+def test_html_pages_client_timeouts():
+    html_pages = HTMLPages(connect_timeout_s=2.0, read_timeout_s=15.0)
+    assert html_pages.client.timeout == httpx.Timeout(15.0, connect=2.0)
+    html_pages.close()
+
+
+def test_html_pages_context_manager_closes_client():
+    with mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))[0] as html_pages:
+        html_pages.fetch_ranking_page(page=1)
+        client = html_pages.client
+    assert client.is_closed
+    assert html_pages._client is None
+
+
+def test_replay_never_opens_a_client(tmp_path):
+    html_pages = HTMLPages(delay_s=0.0, cache=RawPageCache(root=tmp_path), replay=True)
+    html_pages.fetch_ranking_page(page=1)
+    assert html_pages._client is None
 
-        output = html_pages.fetch_ranking_page(page=1)
-        assert "The following URL failed to return status code 200:" in caplog.text
 
 # ------------ Testing test_fetch_ranking_page ------------
 def test_fetch_ranking_pages_type():
-    html_pages = HTMLPages(delay_s=0.0)
-
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(200, text="<html>Mocked content</html>")
-        mock_get.return_value = mock_response
+    html_pages, _ = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
 
-        output = html_pages.fetch_ranking_pages(start=1, stop=2)
-        assert type(output) == list
-        assert len(output) == 2
+    output = html_pages.fetch_ranking_pages(start=1, stop=2)
+    assert type(output) == list
+    assert len(output) == 2
 
 
 def test_fetch_ranking_pages_output():
-    html_pages = HTMLPages(delay_s=0.0)
+    html_pages, _ = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
     correct_output = ["<html>Mocked content</html>", "<html>Mocked content</html>"]
 
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(200, text="<html>Mocked content</html>")
-        mock_get.return_value = mock_response
-
-        output = html_pages.fetch_ranking_pages(start=1, stop=2)
-        assert output == correct_output
+    output = html_pages.fetch_ranking_pages(start=1, stop=2)
+    assert output == correct_output
 
 
 def test_fetch_ranking_pages_error_handling(caplog):
-    html_pages = HTMLPages(delay_s=0.0)
+    html_pages, _ = mocked_html_pages(httpx.Response(404, text="Not Found"))
+
+    output = html_pages.fetch_ranking_pages(start=1, stop=2)
+    assert output == [None, None]
+    assert "The following URL failed to return status code 200:" in caplog.text
+
+# ------------ Testing the thread-pool mode of fetch_ranking_pages ------------
+def threaded_html_pages(failing_pages: set[int] = frozenset(), **kwargs) -> tuple[HTMLPages, list[float]]:
+    request_times = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        request_times.append(time.monotonic())
+        page = int(request.url.path.rsplit("/", 1)[1])
+        # Later pages answer sooner, so they finish out of order.
+        time.sleep(0.01 * (6 - page % 6))
+        if page in failing_pages:
+            return httpx.Response(404)
+        return httpx.Response(200, text=f"<html>Page {page}</html>")
+
+    kwargs.setdefault("delay_s", 0.0)
+    return HTMLPages(transport=httpx.MockTransport(handler), **kwargs), request_times
+
+
+def test_threaded_fetch_ranking_pages_keeps_page_order():
+    html_pages, _ = threaded_html_pages(failing_pages={3})
+    serial = html_pages.fetch_ranking_pages(1, 6)
+    threaded = html_pages.fetch_ranking_pages(1, 6, max_workers=4)
+    assert threaded == serial
+    assert threaded[:4] == ["<html>Page 1</html>", "<html>Page 2</html>", None, "<html>Page 4</html>"]
 
-    with patch("httpx.get") as mock_get:
-        mock_response = httpx.Response(404, text="Not Found")
-        mock_get.return_value = mock_response
 
-        output = html_pages.fetch_ranking_pages(start=1, stop=2)
-        assert "The following URL failed to return status code 200:" in caplog.text
+def test_threaded_fetch_ranking_page_results_reports_each_failure():
+    html_pages, _ = threaded_html_pages(failing_pages={2, 5}, retry_policies={})
+    results = html_pages.fetch_ranking_page_results(1, 6, max_workers=3)
+    assert [result.ok for result in results] == [True, False, True, True, False, True]
+    assert results[1].url.endswith("/browse/boardgame/page/2")
+    assert results[1].error is not None
+
+
+def test_threaded_fetch_ranking_pages_shares_one_client_and_limiter():
+    html_pages, request_times = threaded_html_pages(delay_s=0.02)
+    with patch("src.sources.html_pages.httpx.Client", wraps=httpx.Client) as client:
+        html_pages.fetch_ranking_pages(1, 6, max_workers=6)
+    assert client.call_count == 1
+    gaps = [later - earlier for earlier, later in zip(request_times, request_times[1:])]
+    assert min(gaps) >= 0.015
+
+
+def test_threaded_fetch_ranking_pages_stores_every_page(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    html_pages, _ = threaded_html_pages(cache=cache, crawl_date=date(2024, 6, 1))
+    html_pages.fetch_ranking_pages(1, 6, max_workers=4)
+    assert [cache.get(f"https://boardgamegeek.com/browse/boardgame/page/{page}", date(2024, 6, 1)) for page in (1, 6)] == [
+        "<html>Page 1</html>",
+        "<html>Page 6</html>",
+    ]
+
+
+def test_threaded_fetch_ranking_pages_rejects_no_workers():
+    html_pages, _ = threaded_html_pages()
+    with pytest.raises(ValueError):
+        html_pages.fetch_ranking_pages(1, 2, max_workers=0)
+
 
 # ------------ Testing save_html_file ------------
 def test_save_html_file():
@@ -89,4 +224,127 @@ def test_save_html_file():
         mock_file.assert_called_once_with("/test_file.html", "w", encoding="utf-8")
 
         file_handle = mock_file()
-        file_handle.write.assert_called_once_with(mock_content)
\ No newline at end of file
+        file_handle.write.assert_called_once_with(mock_content)
+
+# ------------ Testing AsyncHTMLPages ------------
+def test_async_fetch_ranking_pages_output_in_page_order():
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, text=f"<html>Page {page}</html>")
+
+    html_pages = AsyncHTMLPages(
+        requests_per_s=1000, max_concurrency=3, transport=httpx.MockTransport(handler)
+        )
+    output = html_pages.fetch_ranking_pages(start=1, stop=5)
+    assert output == [f"<html>Page {n}</html>" for n in range(1, 6)]
+
+
+def test_async_fetch_ranking_pages_sends_user_agent():
+    seen_user_agents = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_user_agents.append(request.headers["User-Agent"])
+        return httpx.Response(200, text="<html>Mocked content</html>")
+
+    html_pages = AsyncHTMLPages(
+        user_agent="test-agent", requests_per_s=1000, transport=httpx.MockTransport(handler)
+        )
+    html_pages.fetch_ranking_pages(start=1, stop=2)
+    assert seen_user_agents == ["test-agent", "test-agent"]
+
+
+def test_async_fetch_ranking_pages_error_handling(caplog):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/2"):
+            return httpx.Response(404, text="Not Found")
+        return httpx.Response(200, text="<html>Mocked content</html>")
+
+    html_pages = AsyncHTMLPages(requests_per_s=1000, transport=httpx.MockTransport(handler))
+    output = html_pages.fetch_ranking_pages(start=1, stop=3)
+    assert output == ["<html>Mocked content</html>", None, "<html>Mocked content</html>"]
+    assert "The following URL failed to return status code 200:" in caplog.text
+
+
+def test_async_fetch_ranking_pages_honours_request_budget():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="<html>Mocked content</html>")
+
+    html_pages = AsyncHTMLPages(
+        requests_per_s=20, max_concurrency=8, transport=httpx.MockTransport(handler)
+        )
+    start = time.monotonic()
+    html_pages.fetch_ranking_pages(start=1, stop=6)
+    # The first token is available immediately, the remaining five arrive at 20/s.
+    assert time.monotonic() - start >= 0.2
+
+
+# ------------ Testing iter_ranking_pages ------------
+def test_iter_ranking_pages_output():
+    html_pages, mock_bgg = mocked_html_pages(httpx.Response(200, text="<html>Mocked content</html>"))
+
+    output = html_pages.iter_ranking_pages(start=3, stop=4)
+    assert mock_bgg.call_count == 0 # Nothing is fetched until the iterator is consumed.
+    assert list(output) == [(3, "<html>Mocked content</html>"), (4, "<html>Mocked content</html>")]
+
+
+# ------------ Testing the raw page cache ------------
+def test_fetch_ranking_page_stores_and_reuses_cached_page(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    html_pages, mock_bgg = mocked_html_pages(
+        httpx.Response(200, text="<html>Mocked content</html>", headers={"ETag": '"v1"'}),
+        cache=cache,
+        crawl_date=date(2026, 1, 1),
+    )
+
+    assert html_pages.fetch_ranking_page(page=1) == "<html>Mocked content</html>"
+    assert html_pages.fetch_ranking_page(page=1) == "<html>Mocked content</html>"
+    assert mock_bgg.call_count == 1
+    assert cache.get_entry("https://boardgamegeek.com/browse/boardgame/page/1", date(2026, 1, 1)).etag == '"v1"'
+
+
+def test_fetch_ranking_page_revalidates_previous_crawl(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    url = "https://boardgamegeek.com/browse/boardgame/page/1"
+    cache.put(url, date(2026, 1, 1), "<html>Yesterday</html>", etag='"v1"')
+    html_pages, mock_bgg = mocked_html_pages(httpx.Response(304), cache=cache, crawl_date=date(2026, 1, 2))
+
+    assert html_pages.fetch_ranking_page(page=1) == "<html>Yesterday</html>"
+    assert mock_bgg.requests[0].headers["If-None-Match"] == '"v1"'
+    assert cache.get(url, date(2026, 1, 2)) == "<html>Yesterday</html>"
+
+
+def test_fetch_ranking_page_refetches_when_revalidated_body_is_gone(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    url = "https://boardgamegeek.com/browse/boardgame/page/1"
+    previous = cache.put(url, date(2026, 1, 1), "<html>Yesterday</html>", etag='"v1"')
+    cache._object_path(previous.content_sha256).unlink()
+    html_pages, mock_bgg = mocked_html_pages(
+        httpx.Response(304),
+        httpx.Response(200, text="<html>Today</html>"),
+        cache=cache,
+        crawl_date=date(2026, 1, 2),
+    )
+
+    assert html_pages.fetch_ranking_page(page=1) == "<html>Today</html>"
+    assert "If-None-Match" not in mock_bgg.requests[1].headers
+    assert cache.get(url, date(2026, 1, 2)) == "<html>Today</html>"
+
+
+def test_fetch_ranking_page_replay_never_uses_network(tmp_path, caplog):
+    cache = RawPageCache(root=tmp_path)
+    cache.put("https://boardgamegeek.com/browse/boardgame/page/1", date(2026, 1, 1), "<html>Cached</html>")
+    html_pages, mock_bgg = mocked_html_pages(
+        httpx.Response(200, text="<html>Network</html>"),
+        cache=cache,
+        crawl_date=date(2026, 1, 1),
+        replay=True,
+    )
+
+    assert html_pages.fetch_ranking_pages(start=1, stop=2) == ["<html>Cached</html>", None]
+    assert mock_bgg.call_count == 0
+    assert "is not in the cache" in caplog.text
+
+
+def test_replay_requires_cache():
+    with pytest.raises(ValueError):
+        HTMLPages(replay=True)
@@ -0,0 +1,136 @@
+# tests/test_loaders.py
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from src.loaders import (
+    UpsertStats,
+    insert_ranking_batch,
+    mark_details_fetched,
+    replace_game_mechanics,
+    upsert_game_batch,
+    upsert_game_statistics,
+    upsert_games,
+)
+from ranking_batch import RankingBatch
+from models import Base, Game, GameMechanicRecord, GameStatisticsRecord
+from schemas import GameMechanic, GameRankCreate, GameStatistics
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def games_in_db(db) -> list[tuple[int, int, str]]:
+    return [tuple(row) for row in db.execute(select(Game.id, Game.rank, Game.name).order_by(Game.id))]
+
+
+# ------------ Testing upsert_games ------------
+def test_upsert_games_into_empty_table(db):
+    stats = upsert_games(db, [
+        GameRankCreate(id=1, rank=1, name="Brass: Birmingham"),
+        GameRankCreate(id=2, rank=2, name="Ark Nova"),
+    ])
+    assert stats == UpsertStats(inserted=2, updated=0, unchanged=0)
+    assert games_in_db(db) == [(1, 1, "Brass: Birmingham"), (2, 2, "Ark Nova")]
+
+
+def test_upsert_games_only_touches_changed_rows(db):
+    upsert_games(db, [
+        GameRankCreate(id=1, rank=1, name="Brass: Birmingham"),
+        GameRankCreate(id=2, rank=2, name="Ark Nova"),
+        GameRankCreate(id=3, rank=3, name="Gloomhaven"),
+    ])
+    stats = upsert_games(db, [
+        GameRankCreate(id=1, rank=1, name="Brass: Birmingham"),
+        GameRankCreate(id=2, rank=3, name="Ark Nova"),
+        GameRankCreate(id=3, rank=2, name="Gloomhaven (2nd Edition)"),
+        GameRankCreate(id=4, rank=4, name="Twilight Imperium"),
+    ], batch_size=2)
+    assert stats == UpsertStats(inserted=1, updated=2, unchanged=1)
+    assert games_in_db(db) == [
+        (1, 1, "Brass: Birmingham"),
+        (2, 3, "Ark Nova"),
+        (3, 2, "Gloomhaven (2nd Edition)"),
+        (4, 4, "Twilight Imperium"),
+    ]
+
+
+def test_upsert_game_batch_last_duplicate_wins(db):
+    stats = upsert_game_batch(db, [
+        GameRankCreate(id=1, rank=5, name="Old"),
+        GameRankCreate(id=1, rank=1, name="New"),
+    ])
+    assert stats == UpsertStats(inserted=1)
+    assert games_in_db(db) == [(1, 1, "New")]
+
+
+def test_upsert_game_batch_empty(db):
+    assert upsert_game_batch(db, []) == UpsertStats()
+
+
+# ------------ Testing insert_ranking_batch ------------
+def test_insert_ranking_batch(db):
+    batch = RankingBatch.from_columns([1, 2], [1, 2], ["Brass: Birmingham", "Ark Nova"])
+    assert insert_ranking_batch(db, batch) == 2
+    db.commit()
+    assert games_in_db(db) == [(1, 1, "Brass: Birmingham"), (2, 2, "Ark Nova")]
+
+
+def test_insert_ranking_batch_joins_session_transaction(db):
+    insert_ranking_batch(db, RankingBatch.from_columns([1], [1], ["Brass: Birmingham"]))
+    db.rollback()
+    assert games_in_db(db) == []
+
+
+def test_insert_ranking_batch_empty(db):
+    assert insert_ranking_batch(db, RankingBatch()) == 0
+
+
+# ------------ Testing upsert_game_statistics ------------
+def game_statistics(game_id: int, average_rating: float) -> GameStatistics:
+    return GameStatistics(
+        id=game_id,
+        description="A game.",
+        year_published=2018,
+        min_players=2,
+        max_players=4,
+        suggested_num_player=3,
+        min_age=14,
+        average_rating=average_rating,
+        average_weight=3.5,
+    )
+
+
+def test_upsert_game_statistics_replaces_existing_rows(db):
+    upsert_game_statistics(db, [game_statistics(1, 8.0), game_statistics(2, 7.0)])
+    written = upsert_game_statistics(db, [game_statistics(2, 7.5), game_statistics(3, 6.0)])
+    ratings = list(db.execute(select(GameStatisticsRecord.id, GameStatisticsRecord.average_rating).order_by(GameStatisticsRecord.id)))
+    assert written == 2
+    assert [tuple(row) for row in ratings] == [(1, 8.0), (2, 7.5), (3, 6.0)]
+
+
+def test_mark_details_fetched_keeps_statistics(db):
+    upsert_game_statistics(db, [game_statistics(1, 8.0)], fetched_on=date(2024, 1, 1))
+    mark_details_fetched(db, [1, 2], fetched_on=date(2024, 2, 1))
+    rows = db.execute(select(GameStatisticsRecord.id, GameStatisticsRecord.average_rating, GameStatisticsRecord.fetched_on).order_by(GameStatisticsRecord.id))
+    assert [tuple(row) for row in rows] == [(1, 8.0, date(2024, 2, 1)), (2, None, date(2024, 2, 1))]
+
+
+# ------------ Testing replace_game_mechanics ------------
+def test_replace_game_mechanics_drops_removed_mechanics(db):
+    replace_game_mechanics(db, [1, 2], [
+        GameMechanic(id=1, mechanic_name="Hand Management"),
+        GameMechanic(id=1, mechanic_name="Dice Rolling"),
+        GameMechanic(id=2, mechanic_name="Dice Rolling"),
+    ])
+    written = replace_game_mechanics(db, [1], [GameMechanic(id=1, mechanic_name="Hand Management")])
+    mechanics = db.execute(select(GameMechanicRecord.id, GameMechanicRecord.mechanic_name).order_by(GameMechanicRecord.id))
+    assert written == 1
+    assert [tuple(row) for row in mechanics] == [(1, "Hand Management"), (2, "Dice Rolling")]
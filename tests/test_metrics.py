@@ -0,0 +1,95 @@
+# tests/test_metrics.py
+import json
+import httpx
+import pytest
+from src.utils.metrics import (
+    FETCH_BYTES,
+    FETCH_SECONDS,
+    PAGES_FETCHED,
+    STAGE_SECONDS,
+    Histogram,
+    JSONSummaryExporter,
+    MetricsRegistry,
+    PrometheusTextfileExporter,
+    record_run,
+)
+from utils.metrics import metrics
+from src.sources.html_pages import HTMLPages
+
+
+# ------------ Testing the registry ------------
+def test_counter_is_created_once_per_labels():
+    registry = MetricsRegistry()
+    registry.counter("rows", {"dataset": "rankings"}).inc(3)
+    registry.counter("rows", {"dataset": "rankings"}).inc()
+    registry.counter("rows", {"dataset": "statistics"}).inc()
+    assert registry.counter("rows", {"dataset": "rankings"}).value == 4
+    with pytest.raises(ValueError):
+        registry.counter("rows").inc(-1)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [2, 3, 4]
+    assert histogram.summary() == {"count": 4, "sum": 2.65, "mean": 0.6625, "min": 0.05, "max": 2.0}
+
+
+def test_timer_records_even_when_the_block_raises():
+    registry = MetricsRegistry()
+    with pytest.raises(RuntimeError):
+        with registry.timer("stage", {"stage": "load"}):
+            raise RuntimeError("boom")
+    assert registry.histogram("stage", {"stage": "load"}).count == 1
+
+
+# ------------ Testing the exporters ------------
+def test_json_summary_exporter(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("rows", {"dataset": "rankings"}).inc(2)
+    registry.histogram("fetch").observe(0.5)
+
+    path = JSONSummaryExporter(tmp_path, run_id="test").export(registry)
+    summary = json.loads(path.read_text())
+    assert path.name == "run-test.json"
+    assert summary["counters"]["rows"] == [{"labels": {"dataset": "rankings"}, "value": 2.0}]
+    assert summary["histograms"]["fetch"][0]["count"] == 1
+
+
+def test_prometheus_textfile_exporter(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter(FETCH_BYTES, {"endpoint": "ranking"}).inc(1024)
+    registry.histogram(FETCH_SECONDS, {"endpoint": "ranking"}, buckets=(0.5,)).observe(0.25)
+
+    path = PrometheusTextfileExporter(tmp_path / "bgg.prom").export(registry)
+    lines = path.read_text().splitlines()
+    assert "# TYPE bgg_fetch_bytes_total counter" in lines
+    assert 'bgg_fetch_bytes_total{endpoint="ranking"} 1024.0' in lines
+    assert "# TYPE bgg_fetch_seconds histogram" in lines
+    assert 'bgg_fetch_seconds_bucket{endpoint="ranking",le="0.5"} 1' in lines
+    assert 'bgg_fetch_seconds_bucket{endpoint="ranking",le="+Inf"} 1' in lines
+    assert 'bgg_fetch_seconds_count{endpoint="ranking"} 1' in lines
+
+
+def test_record_run_exports_on_failure(tmp_path):
+    registry = MetricsRegistry()
+    with pytest.raises(RuntimeError):
+        with record_run(tmp_path, run_id="failed", registry=registry):
+            raise RuntimeError("boom")
+    assert registry.histogram(STAGE_SECONDS, {"stage": "total"}).count == 1
+    assert (tmp_path / "run-failed.json").exists()
+    assert (tmp_path / "bgg_pipeline.prom").exists()
+
+
+# ------------ Testing the instrumentation ------------
+def test_html_pages_records_fetch_metrics():
+    metrics.reset()
+    html_pages = HTMLPages(
+        delay_s=0.0,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<html>Mocked content</html>")),
+    )
+    html_pages.fetch_ranking_page(page=1)
+    assert metrics.histogram(FETCH_SECONDS, {"endpoint": "ranking"}).count == 1
+    assert metrics.counter(FETCH_BYTES, {"endpoint": "ranking"}).value == len("<html>Mocked content</html>")
+    assert metrics.counter(PAGES_FETCHED, {"source": "network"}).value == 1
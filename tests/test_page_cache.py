@@ -0,0 +1,92 @@
+# tests/test_page_cache.py
+from datetime import date
+from src.sources.page_cache import RawPageCache
+
+URL = "https://boardgamegeek.com/browse/boardgame/page/1"
+
+
+# ------------ Testing put and get ------------
+def test_put_and_get(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    cache.put(URL, date(2026, 1, 1), "<html>Page 1</html>", etag='"abc"')
+    assert cache.get(URL, date(2026, 1, 1)) == "<html>Page 1</html>"
+    assert cache.get(URL, date(2026, 1, 2)) is None
+    assert cache.get_entry(URL, date(2026, 1, 1)).etag == '"abc"'
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    cache.put(URL, date(2026, 1, 1), "<html>Same</html>")
+    cache.put(URL, date(2026, 1, 2), "<html>Same</html>")
+    cache.put(URL + "0", date(2026, 1, 2), "<html>Same</html>")
+    assert len(list((tmp_path / "objects").glob("*/*.html.gz"))) == 1
+    assert cache.crawl_dates() == [date(2026, 1, 1), date(2026, 1, 2)]
+
+
+def test_pages_are_compressed(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    cache.put(URL, date(2026, 1, 1), "<tr><td>row</td></tr>" * 1000)
+    assert cache.size_bytes() < 1000
+
+
+# ------------ Testing revalidation ------------
+def test_latest_entry_and_conditional_headers(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    assert cache.latest_entry(URL, on_or_before=date(2026, 1, 2)) is None
+    cache.put(URL, date(2026, 1, 1), "<html>Old</html>", etag='"v1"', last_modified="Thu, 01 Jan 2026 00:00:00 GMT")
+    cache.put(URL, date(2026, 1, 3), "<html>Future</html>", etag='"v3"')
+    entry = cache.latest_entry(URL, on_or_before=date(2026, 1, 2))
+    assert entry.crawl_date == date(2026, 1, 1)
+    assert RawPageCache.conditional_headers(entry) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Thu, 01 Jan 2026 00:00:00 GMT",
+    }
+
+
+def test_revalidated_points_at_previous_body(tmp_path):
+    cache = RawPageCache(root=tmp_path)
+    previous = cache.put(URL, date(2026, 1, 1), "<html>Old</html>", etag='"v1"')
+    cache.revalidated(previous, date(2026, 1, 2))
+    assert cache.get(URL, date(2026, 1, 2)) == "<html>Old</html>"
+    assert cache.get_entry(URL, date(2026, 1, 2)).etag == '"v1"'
+
+
+def test_latest_entry_reads_the_pointer_without_listing_crawls(tmp_path, monkeypatch):
+    cache = RawPageCache(root=tmp_path)
+    previous = cache.put(URL, date(2026, 1, 1), "<html>Old</html>", etag='"v1"')
+    cache.revalidated(previous, date(2026, 1, 2))
+    cache.put(URL, date(2026, 1, 1), "<html>Rewritten</html>") # An older crawl does not move the pointer.
+
+    def crawl_dates():
+        raise AssertionError("The crawls should not be listed")
+
+    monkeypatch.setattr(cache, "crawl_dates", crawl_dates)
+    assert cache.latest_entry(URL, on_or_before=date(2026, 1, 5)).crawl_date == date(2026, 1, 2)
+
+
+# ------------ Testing evict ------------
+def test_evict_by_ttl(tmp_path):
+    cache = RawPageCache(root=tmp_path, ttl_days=7, max_bytes=None)
+    cache.put(URL, date(2026, 1, 1), "<html>Old</html>")
+    cache.put(URL, date(2026, 1, 10), "<html>New</html>")
+    assert cache.evict(today=date(2026, 1, 12)) == 1
+    assert cache.crawl_dates() == [date(2026, 1, 10)]
+    assert len(list((tmp_path / "objects").glob("*/*.html.gz"))) == 1
+
+
+def test_evict_by_size_keeps_newest_crawl(tmp_path):
+    cache = RawPageCache(root=tmp_path, ttl_days=None, max_bytes=1, compression_level=0)
+    for day in (1, 2, 3):
+        cache.put(URL, date(2026, 1, day), f"<html>Day {day}</html>")
+    assert cache.evict() == 2
+    assert cache.crawl_dates() == [date(2026, 1, 3)]
+    assert cache.get(URL, date(2026, 1, 3)) == "<html>Day 3</html>"
+
+
+def test_evict_drops_pointers_to_evicted_crawls(tmp_path):
+    cache = RawPageCache(root=tmp_path, ttl_days=7, max_bytes=None)
+    cache.put(URL, date(2026, 1, 1), "<html>Old</html>")
+    cache.put("https://example.com/other", date(2026, 1, 10), "<html>New</html>")
+    cache.evict(today=date(2026, 1, 12))
+    assert len(list((tmp_path / "latest").glob("*.json"))) == 1
+    assert cache.latest_entry(URL) is None
@@ -0,0 +1,91 @@
+# tests/test_parallel_parser.py
+from src.parsers.parallel_parsers import WORKER_START_METHOD, parse_html_ranking_pages_parallel, parse_page
+from tests.test_html_parser import valid_mock_html_content, invalid_mock_html_content
+import threading
+import warnings
+import pytest
+
+
+# ------------ Testing parse_page ------------
+def test_parse_page_output():
+    result = parse_page(1, valid_mock_html_content)
+    assert result.ok
+    assert [(game.id, game.rank, game.name) for game in result.games] == [
+        (224517, 1, "Brass: Birmingham"),
+        (342942, 2, "Ark Nova"),
+    ]
+
+
+def test_parse_page_reports_rejected_rows():
+    result = parse_page(2, valid_mock_html_content.replace("                    2\n", "                    -2\n", 1))
+    assert result.ok
+    assert [game.id for game in result.games] == [224517]
+    assert [rejection.row["id"] for rejection in result.rejections] == [342942]
+
+
+def test_parse_page_captures_errors():
+    result = parse_page(3, invalid_mock_html_content)
+    assert not result.ok
+    assert result.page_number == 3
+    assert len(result.games) == 0
+    assert "ValueError" in result.error
+
+
+def test_parse_page_unfetched_page():
+    result = parse_page(4, None)
+    assert not result.ok
+    assert result.error == "Page was not fetched"
+
+
+# ------------ Testing parse_html_ranking_pages_parallel ------------
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_parse_html_ranking_pages_parallel_keeps_page_order(max_workers):
+    pages = [
+        (n, invalid_mock_html_content if n % 3 == 0 else valid_mock_html_content)
+        for n in range(1, 11)
+    ]
+    results = list(parse_html_ranking_pages_parallel(
+        iter(pages), max_workers=max_workers, chunk_size=3, max_pending_chunks=2
+        ))
+    assert [result.page_number for result in results] == list(range(1, 11))
+    assert [result.ok for result in results] == [n % 3 != 0 for n in range(1, 11)]
+    assert all(len(result.games) == 2 for result in results if result.ok)
+
+
+def test_parse_html_ranking_pages_parallel_rejects_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        list(parse_html_ranking_pages_parallel([], chunk_size=0))
+
+
+def test_parse_html_ranking_pages_parallel_does_not_fork_a_threaded_parent():
+    assert WORKER_START_METHOD in ("forkserver", "spawn")
+    # A thread holding a lock, like the prefetch producer, must not leak into the workers.
+    held, release = threading.Lock(), threading.Event()
+    def producer():
+        with held:
+            release.wait()
+    thread = threading.Thread(target=producer)
+    thread.start()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            results = list(parse_html_ranking_pages_parallel([(1, valid_mock_html_content)], max_workers=1))
+    finally:
+        release.set()
+        thread.join()
+    assert [result.ok for result in results] == [True]
+
+
+def test_parse_html_ranking_pages_parallel_closes_pages_on_a_worker_error():
+    closed = []
+    def pages():
+        try:
+            yield 1, valid_mock_html_content
+            yield 2, lambda: None # Cannot be sent to a worker.
+            yield 3, valid_mock_html_content
+        finally:
+            closed.append(True)
+    stream = pages()
+    with pytest.raises(Exception):
+        list(parse_html_ranking_pages_parallel(stream, max_workers=1, chunk_size=1, max_pending_chunks=1))
+    assert closed == [True]
@@ -0,0 +1,97 @@
+# tests/test_parquet_export.py
+from datetime import date
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from src.ranking_batch import RankingBatch
+from src.exports.parquet_export import (
+    RankingsParquetWriter,
+    export_game_statistics,
+    export_rankings,
+    partition_path,
+    read_history,
+    )
+from src.schemas import GameStatistics
+
+
+def make_batch(ranks: range, suffix: str = "") -> RankingBatch:
+    return RankingBatch.from_columns(
+        ids=[rank * 3 + 11 for rank in ranks],
+        ranks=list(ranks),
+        names=[f"Game {rank}{suffix}" for rank in ranks],
+    )
+
+
+# ------------ Testing export_rankings ------------
+def test_export_rankings_partitions_by_crawl_date(tmp_path):
+    path = export_rankings(make_batch(range(1, 4)), date(2026, 10, 1), root=tmp_path)
+    assert path == partition_path(tmp_path, "rankings", date(2026, 10, 1)) / "part-0.parquet"
+    assert path.parent.name == "crawl_date=2026-10-01"
+    assert pq.read_table(path).to_pydict() == {
+        "id": [14, 17, 20],
+        "rank": [1, 2, 3],
+        "name": ["Game 1", "Game 2", "Game 3"],
+    }
+
+
+def test_export_rankings_dictionary_encodes_names_with_statistics(tmp_path):
+    path = export_rankings(make_batch(range(1, 251)), date(2026, 10, 1), root=tmp_path, row_group_size=100)
+    metadata = pq.ParquetFile(path).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [100, 100, 50]
+    rank_column = metadata.row_group(1).column(1)
+    assert (rank_column.statistics.min, rank_column.statistics.max) == (101, 200)
+    name_column = metadata.row_group(0).column(2)
+    assert name_column.has_dictionary_page
+    assert name_column.statistics.has_min_max
+
+
+def test_rankings_writer_buffers_small_batches_into_full_row_groups(tmp_path):
+    with RankingsParquetWriter(date(2026, 10, 1), root=tmp_path, row_group_size=100) as writer:
+        for start in range(1, 251, 25):
+            writer.write_batch(make_batch(range(start, start + 25)))
+    metadata = pq.ParquetFile(writer.path).metadata
+    assert writer.rows_written == 250
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [100, 100, 50]
+
+
+def test_rankings_writer_keeps_previous_export_on_failure(tmp_path):
+    crawl_date = date(2026, 10, 1)
+    path = export_rankings(make_batch(range(1, 4)), crawl_date, root=tmp_path)
+    with pytest.raises(RuntimeError):
+        with RankingsParquetWriter(crawl_date, root=tmp_path) as writer:
+            writer.write_batch(make_batch(range(1, 4), suffix=" (new)"))
+            raise RuntimeError("load failed")
+    assert pq.read_table(path).column("name").to_pylist() == ["Game 1", "Game 2", "Game 3"]
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_export_game_statistics(tmp_path):
+    statistics = [GameStatistics(
+        id=13,
+        description="Trade and build",
+        year_published=1995,
+        min_players=3,
+        max_players=4,
+        suggested_num_player=4,
+        min_age=10,
+        average_rating=7.1,
+        average_weight=2.3,
+    )]
+    path = export_game_statistics(statistics, date(2026, 10, 1), root=tmp_path)
+    table = pq.read_table(path)
+    assert table.column("id").to_pylist() == [13]
+    assert table.column("average_weight").to_pylist() == [2.3]
+
+
+# ------------ Testing read_history ------------
+def test_read_history_is_lazy_and_filters_by_crawl_date(tmp_path):
+    for day in (1, 2, 3):
+        export_rankings(make_batch(range(1, 4)), date(2026, 10, day), root=tmp_path)
+
+    history = read_history(tmp_path, columns=["id", "rank"], start=date(2026, 10, 2))
+    assert list(history.columns) == ["id", "rank", "crawl_date"]
+    frame = history.compute()
+    assert len(frame) == 6
+    assert sorted(set(frame["crawl_date"])) == [date(2026, 10, 2), date(2026, 10, 3)]
+
+    assert len(read_history(tmp_path, end=date(2026, 10, 1)).compute()) == 3
@@ -0,0 +1,144 @@
+# tests/test_parse_cache.py
+import os
+import pytest
+from src.parsers import parse_cache as parse_cache_module
+from src.parsers.parallel_parsers import parse_html_ranking_pages_parallel, parse_page
+from src.parsers.parse_cache import ParseResultCache
+from src.utils.metrics import PARSE_CACHE_LOOKUPS
+from ranking_batch import RankingBatch
+from tests.test_html_parser import valid_mock_html_content, invalid_mock_html_content
+from utils.metrics import metrics
+
+EXPECTED_GAMES = [(224517, 1, "Brass: Birmingham"), (342942, 2, "Ark Nova")]
+
+
+def mock_page(page: int) -> str:
+    return valid_mock_html_content.replace("Ark Nova", f"Ark Nova {page}")
+
+
+# ------------ Testing ParseResultCache ------------
+def test_put_and_get(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    assert cache.get(valid_mock_html_content) is None
+    batch = RankingBatch.from_columns([1, 2], [1, 2], ["A", "Ü"])
+    cache.put(valid_mock_html_content, batch)
+    assert cache.get(valid_mock_html_content) == batch
+    assert cache.get(valid_mock_html_content + " ") is None
+
+
+def test_parse_ranking_page_batch_hits_on_unchanged_page(tmp_path, monkeypatch):
+    cache = ParseResultCache(root=tmp_path)
+    assert list(cache.parse_ranking_page_batch(valid_mock_html_content)) == EXPECTED_GAMES
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The page should have come from the cache")
+    monkeypatch.setattr(parse_cache_module, "parse_html_ranking_page_batch", fail)
+    metrics.reset()
+    batch = cache.parse_ranking_page_batch(valid_mock_html_content)
+    assert list(batch) == EXPECTED_GAMES
+    assert batch.rejections == []
+    assert metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "hit"}).value == 1
+
+
+def test_pages_with_rejections_are_not_cached(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    page = valid_mock_html_content.replace("                    2\n", "                    -2\n", 1)
+    assert len(cache.parse_ranking_page_batch(page).rejections) == 1
+    assert cache.get(page) is None
+
+
+def test_pages_with_unranked_rows_are_not_cached(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    page = valid_mock_html_content.replace("                    2\n", "                    N/A\n", 1)
+    assert cache.parse_ranking_page_batch(page).unranked == 1
+    assert cache.get(page) is None
+    assert parse_page(1, page, parse_cache=cache).unranked == 1
+
+
+def test_parse_errors_are_raised_and_not_cached(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    with pytest.raises(ValueError):
+        cache.parse_ranking_page_batch(invalid_mock_html_content)
+    assert cache.size_bytes() == 0
+
+
+def test_parser_version_is_part_of_the_key(tmp_path):
+    ParseResultCache(root=tmp_path, parser_version=1).parse_ranking_page_batch(valid_mock_html_content)
+    assert ParseResultCache(root=tmp_path, parser_version=2).get(valid_mock_html_content) is None
+
+
+def test_parser_backend_is_part_of_the_key(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    cache.parse_ranking_page_batch(valid_mock_html_content, backend="stream")
+    assert cache.get(valid_mock_html_content, "stream") is not None
+    assert cache.get(valid_mock_html_content, "bs4") is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    cache.parse_ranking_page_batch(valid_mock_html_content)
+    (entry,) = tmp_path.glob("v*/*/*/*.rkb.z")
+    entry.write_bytes(b"not zlib")
+    assert cache.get(valid_mock_html_content) is None
+    assert not entry.exists()
+
+
+def test_evict_drops_least_recently_used_pages(tmp_path):
+    cache = ParseResultCache(root=tmp_path, max_bytes=None)
+    pages = [mock_page(page) for page in range(4)]
+    for age, page in enumerate(pages):
+        cache.parse_ranking_page_batch(page)
+        path = cache._entry_path(cache.content_key(page))
+        os.utime(path, (1_000_000 + age, 1_000_000 + age))
+    cache.get(pages[0]) # Page 0 is now the most recently used.
+    entry_size = cache._entry_path(cache.content_key(pages[0])).stat().st_size
+
+    cache.max_bytes = 2 * entry_size
+    assert cache.evict() == 2
+    assert [cache.get(page) is not None for page in pages] == [True, False, False, True]
+
+
+def test_put_evicts_when_over_max_bytes(tmp_path):
+    cache = ParseResultCache(root=tmp_path, max_bytes=1)
+    cache.parse_ranking_page_batch(mock_page(1))
+    cache.parse_ranking_page_batch(mock_page(2))
+    assert len(list(tmp_path.glob("v*/*/*/*.rkb.z"))) == 0
+
+
+def test_evict_drops_other_parser_versions(tmp_path):
+    ParseResultCache(root=tmp_path, parser_version=1).parse_ranking_page_batch(valid_mock_html_content)
+    cache = ParseResultCache(root=tmp_path, parser_version=2)
+    cache.parse_ranking_page_batch(valid_mock_html_content)
+    assert cache.evict() == 1
+    assert [path.parents[2].name for path in tmp_path.glob("v*/*/*/*.rkb.z")] == ["v2"]
+
+
+# ------------ Testing the parallel parser with a cache ------------
+def test_parse_page_uses_the_cache(tmp_path):
+    cache = ParseResultCache(root=tmp_path)
+    first = parse_page(1, valid_mock_html_content, parse_cache=cache)
+    second = parse_page(1, valid_mock_html_content, parse_cache=cache)
+    assert (first.cache_hit, second.cache_hit) == (False, True)
+    assert second.games == first.games
+    assert parse_page(1, valid_mock_html_content).cache_hit is None
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_parse_html_ranking_pages_parallel_with_cache(tmp_path, max_workers):
+    cache = ParseResultCache(root=tmp_path)
+    pages = [(page, mock_page(page)) for page in range(1, 5)]
+    list(parse_html_ranking_pages_parallel(pages[:2], max_workers=max_workers, parse_cache=cache))
+
+    metrics.reset()
+    results = list(parse_html_ranking_pages_parallel(pages, max_workers=max_workers, chunk_size=1, parse_cache=cache))
+    assert [result.page_number for result in results] == [1, 2, 3, 4]
+    assert [result.cache_hit for result in results] == [True, True, False, False]
+    assert metrics.counter(PARSE_CACHE_LOOKUPS, {"result": "hit"}).value == 2
+
+
+def test_parse_html_ranking_pages_parallel_evicts_in_the_parent(tmp_path):
+    cache = ParseResultCache(root=tmp_path, max_bytes=1)
+    pages = [(page, mock_page(page)) for page in range(1, 5)]
+    results = list(parse_html_ranking_pages_parallel(pages, max_workers=2, chunk_size=1, parse_cache=cache))
+    assert all(result.cached_bytes > 0 for result in results)
+    assert len(list(tmp_path.glob("v*/*/*/*.rkb.z"))) == 0
@@ -0,0 +1,297 @@
+# tests/test_pipeline.py
+import httpx
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from src.crawl_bounds import BoundedRankingCrawl, CrawlBounds
+from src.pipeline import (
+    discover_last_page,
+    fetch_page_shard,
+    gather_game_id_names_ranks_from_html_pages,
+    main_pipeline,
+    merge_page_shards,
+    parse_page_shard,
+    parse_ranking_page_stream,
+    load_game_details,
+    plan_page_shards,
+    refresh_game_details,
+)
+from src.parsers.xml_parsers import GameDetails
+from src.sources.html_pages import AsyncHTMLPages, HTMLPages
+from src.sources.xml_api import MISSING_ITEM_ERROR
+from src.sources.page_cache import RawPageCache
+import database
+from models import Base, Game, GameMechanicRecord, GameStatisticsRecord
+from ranking_batch import RankingBatch
+from sources import html_pages as html_pages_module
+
+CRAWL_DATE = date(2024, 6, 1)
+
+
+def ranking_page(page: int, last_page: int = 5) -> str:
+    rows = "".join(
+        f'<tr><td class="collection_rank">{rank}</td>'
+        f'<td><a href="/boardgame/{rank}/game" class="primary">Game {rank}</a></td></tr>'
+        for rank in range((page - 1) * 3 + 1, page * 3 + 1)
+    )
+    return f'<html><a href="/browse/boardgame/page/{last_page}" title="last page">[{last_page}]</a><table>{rows}</table></html>'
+
+
+def mocked_html_pages(cache: RawPageCache, failing_pages: set[int] = frozenset()) -> tuple[HTMLPages, list[int]]:
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.path.rsplit("/", 1)[1])
+        requested.append(page)
+        if page in failing_pages:
+            return httpx.Response(404)
+        return httpx.Response(200, text=ranking_page(page))
+
+    html_pages = HTMLPages(delay_s=0.0, cache=cache, crawl_date=CRAWL_DATE, transport=httpx.MockTransport(handler))
+    return html_pages, requested
+
+
+@pytest.fixture
+def pipeline_db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    # The pipeline opens its sessions through the top level database module.
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_session_factory", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+
+class FakeXMLAPI:
+    """Stands in for XMLAPIThings, recording the games whose details were requested."""
+
+    def __init__(self, details: list[GameDetails] | None = None) -> None:
+        self.details = list(details or [])
+        self.requested = []
+
+    def __enter__(self) -> "FakeXMLAPI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def iter_game_details(self, game_ids):
+        self.requested.extend(game_ids)
+        return iter(self.details)
+
+
+# ------------ Testing plan_page_shards ------------
+def test_plan_page_shards():
+    assert plan_page_shards(5, shard_size=2) == [(1, 2), (3, 4), (5, 5)]
+    assert plan_page_shards(2, shard_size=50) == [(1, 2)]
+    with pytest.raises(ValueError):
+        plan_page_shards(5, shard_size=0)
+
+
+# ------------ Testing the sharded stages ------------
+def test_discover_last_page(tmp_path):
+    html_pages, requested = mocked_html_pages(RawPageCache(root=tmp_path / "cache"))
+    assert discover_last_page(html_pages=html_pages) == 5
+    assert requested == [1]
+
+
+def test_fetch_page_shard_retry_only_fetches_missing_pages(tmp_path):
+    cache = RawPageCache(root=tmp_path / "cache")
+    html_pages, requested = mocked_html_pages(cache, failing_pages={3})
+    with pytest.raises(RuntimeError):
+        fetch_page_shard(2, 4, html_pages=html_pages)
+
+    html_pages, requested = mocked_html_pages(cache)
+    assert fetch_page_shard(2, 4, html_pages=html_pages) == 3
+    assert requested == [3]
+
+
+def test_fetch_page_shard_with_threads(tmp_path):
+    cache = RawPageCache(root=tmp_path / "cache")
+    html_pages, requested = mocked_html_pages(cache, failing_pages={4})
+    with pytest.raises(RuntimeError, match=r"\[4\]"):
+        fetch_page_shard(1, 5, html_pages=html_pages, fetch_workers=3)
+    assert sorted(requested) == [1, 2, 3, 4, 5]
+
+
+def test_parse_and_merge_page_shards(tmp_path):
+    cache_dir = tmp_path / "cache"
+    html_pages, _ = mocked_html_pages(RawPageCache(root=cache_dir))
+    fetch_page_shard(1, 3, html_pages=html_pages)
+
+    paths = [
+        parse_page_shard(1, 2, staging_dir=str(tmp_path / "staging"), cache_dir=str(cache_dir), crawl_date=CRAWL_DATE),
+        parse_page_shard(3, 3, staging_dir=str(tmp_path / "staging"), cache_dir=str(cache_dir), crawl_date=CRAWL_DATE),
+    ]
+    assert paths[0].endswith("2024-06-01/pages-00001-00002.rankings")
+    merged = merge_page_shards(paths)
+    assert list(merged.ids) == list(range(1, 10))
+    assert merged[0] == (1, 1, "Game 1")
+
+
+def test_merge_page_shards_keeps_first_duplicate(tmp_path):
+    first, second = tmp_path / "a.rankings", tmp_path / "b.rankings"
+    first.write_bytes(RankingBatch.from_columns([1, 2], [1, 2], ["A", "B"]).to_bytes())
+    second.write_bytes(RankingBatch.from_columns([2, 3], [3, 4], ["B", "C"]).to_bytes())
+    assert list(merge_page_shards([first, second])) == [(1, 1, "A"), (2, 2, "B"), (3, 4, "C")]
+
+
+def test_parse_page_shard_reuses_the_parse_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    html_pages, _ = mocked_html_pages(RawPageCache(root=cache_dir))
+    fetch_page_shard(1, 2, html_pages=html_pages)
+    parse_cache_dir = str(tmp_path / "parse_cache")
+
+    def parse_shard(staging: str) -> RankingBatch:
+        path = parse_page_shard(
+            1, 2, staging_dir=str(tmp_path / staging), cache_dir=str(cache_dir), crawl_date=CRAWL_DATE, parse_cache_dir=parse_cache_dir,
+        )
+        return merge_page_shards([path])
+
+    first = parse_shard("first")
+    assert len(list((tmp_path / "parse_cache").glob("v*/*/*/*.rkb.z"))) == 2
+    assert parse_shard("second") == first
+
+
+def test_parse_page_shard_trims_to_top_n(tmp_path):
+    cache_dir = tmp_path / "cache"
+    html_pages, _ = mocked_html_pages(RawPageCache(root=cache_dir))
+    fetch_page_shard(1, 3, html_pages=html_pages)
+    path = parse_page_shard(1, 3, staging_dir=str(tmp_path / "staging"), cache_dir=str(cache_dir), crawl_date=CRAWL_DATE, top_n=7)
+    assert [game.rank for game in merge_page_shards([path])] == list(range(1, 8))
+
+
+# ------------ Testing gather_game_id_names_ranks_from_html_pages ------------
+def test_gather_retries_pages_the_concurrent_fetch_missed(monkeypatch):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.path.rsplit("/", 1)[1])
+        requested.append(page)
+        if page == 3 and requested.count(3) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, text=ranking_page(page))
+
+    transport = httpx.MockTransport(handler)
+    # The pipeline imports the fetchers when gathering, from the top level sources package.
+    monkeypatch.setattr(html_pages_module, "HTMLPages", lambda **kwargs: HTMLPages(delay_s=0.0, transport=transport, **kwargs))
+    monkeypatch.setattr(
+        html_pages_module,
+        "AsyncHTMLPages",
+        lambda **kwargs: AsyncHTMLPages(transport=transport, **kwargs),
+    )
+    games = gather_game_id_names_ranks_from_html_pages(max_concurrency=2, requests_per_s=1000, burst=2)
+    assert [game.rank for game in games] == list(range(1, 16))
+    assert requested.count(3) == 2
+
+
+def test_gather_fetches_a_cached_crawl_through_the_token_bucket(tmp_path, monkeypatch):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=ranking_page(int(request.url.path.rsplit("/", 1)[1]))))
+    created = []
+
+    def html_pages(**kwargs) -> HTMLPages:
+        created.append(HTMLPages(delay_s=0.0, transport=transport, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(html_pages_module, "HTMLPages", html_pages)
+    games = gather_game_id_names_ranks_from_html_pages(
+        max_concurrency=3,
+        requests_per_s=1000,
+        burst=3,
+        cache=RawPageCache(root=tmp_path / "cache"),
+        crawl_date=CRAWL_DATE,
+    )
+    assert [game.rank for game in games] == list(range(1, 16))
+    # The threads share a token bucket with the requested budget, not the fixed delay limiter.
+    limiter = created[0].limiter
+    assert type(limiter).__name__ == "AdaptiveTokenBucket"
+    assert (limiter.rate_per_s, limiter.capacity) == (1000, 3)
+
+
+# ------------ Testing refresh_game_details ------------
+def test_refresh_game_details_only_plans_the_crawled_games(pipeline_db):
+    db = database.get_session()
+    db.add_all([Game(id=1, rank=1, name="Game 1"), Game(id=2, rank=2, name="Game 2"), Game(id=3, rank=900, name="Game 3")])
+    db.commit()
+    db.close()
+
+    xml_api = FakeXMLAPI()
+    # A top 1 crawl, so games 2 and 3 are in the Games table but not in the crawl.
+    crawled = RankingBatch.from_columns([1], [1], ["Game 1"])
+    refresh_game_details(crawled, previous_ranks={1: 1, 2: 2, 3: 900}, crawl_date=CRAWL_DATE, xml_api=xml_api)
+    assert xml_api.requested == [1]
+
+
+def test_load_game_details_marks_rejected_and_missing_games_fetched(pipeline_db):
+    db = database.get_session()
+    db.add(GameMechanicRecord(id=1, mechanic_name="Hand Management"))
+    db.commit()
+    db.close()
+
+    xml_api = FakeXMLAPI([GameDetails(game_id=1, error="bad statistics"), GameDetails(game_id=2, error=MISSING_ITEM_ERROR)])
+    assert load_game_details([1, 2], xml_api=xml_api, fetched_on=CRAWL_DATE) == 0
+
+    db = database.get_session()
+    fetched_on = dict(db.execute(select(GameStatisticsRecord.id, GameStatisticsRecord.fetched_on)).all())
+    mechanics = db.execute(select(GameMechanicRecord.id, GameMechanicRecord.mechanic_name)).all()
+    db.close()
+    assert fetched_on == {1: CRAWL_DATE, 2: CRAWL_DATE}
+    # The rejected refetch leaves the game's mechanics alone.
+    assert [tuple(row) for row in mechanics] == [(1, "Hand Management")]
+
+
+# ------------ Testing main_pipeline ------------
+def test_main_pipeline_rejects_parse_workers_without_streaming():
+    with pytest.raises(ValueError, match="parse_workers needs streaming"):
+        main_pipeline(parse_workers=2)
+
+
+def test_main_pipeline_rejects_max_concurrency_with_streaming():
+    with pytest.raises(ValueError, match="max_concurrency cannot be used with streaming"):
+        main_pipeline(streaming=True, max_concurrency=2)
+
+
+# ------------ Testing the crawl bounds ------------
+def test_discover_last_page_for_top_n(tmp_path):
+    html_pages, _ = mocked_html_pages(RawPageCache(root=tmp_path / "cache"))
+    # Three games a page, so the top 7 are on pages 1 to 3.
+    assert discover_last_page(html_pages=html_pages, top_n=7) == 3
+
+
+@pytest.mark.parametrize("bounds, last_rank", [
+    (CrawlBounds(max_rank=7), 7),
+    (CrawlBounds(top_n=4), 4),
+])
+def test_parse_ranking_page_stream_stops_fetching_at_rank_limit(tmp_path, bounds, last_rank):
+    html_pages, requested = mocked_html_pages(RawPageCache(root=tmp_path / "cache"))
+    games = list(parse_ranking_page_stream(html_pages.iter_ranking_pages(1, 5), crawl=BoundedRankingCrawl(bounds)))
+    assert [game.rank for game in games] == list(range(1, last_rank + 1))
+    assert requested == list(range(1, (last_rank + 2) // 3 + 1))
+
+
+def test_parse_ranking_page_stream_stops_on_unranked_page(tmp_path):
+    html_pages, requested = mocked_html_pages(RawPageCache(root=tmp_path / "cache"))
+    # Page 3 holds ranks 7 and 8, then the first unranked game.
+    unranked_page_3 = (
+        (page, html.replace('"collection_rank">9<', '"collection_rank">N/A<') if page == 3 else html)
+        for page, html in html_pages.iter_ranking_pages(1, 5)
+    )
+    crawl = BoundedRankingCrawl(CrawlBounds(stop_on_unranked_page=True))
+    games = list(parse_ranking_page_stream(unranked_page_3, crawl=crawl))
+    assert [game.rank for game in games] == list(range(1, 9))
+    assert crawl.finished
+    assert requested == [1, 2, 3]
+
+
+def test_parse_ranking_page_stream_does_not_stop_on_failed_page(tmp_path):
+    html_pages, requested = mocked_html_pages(RawPageCache(root=tmp_path / "cache"))
+    broken_page_3 = (
+        (page, html.replace("collection_rank", "collection_unranked") if page == 3 else html)
+        for page, html in html_pages.iter_ranking_pages(1, 5)
+    )
+    crawl = BoundedRankingCrawl(CrawlBounds(stop_on_unranked_page=True))
+    games = list(parse_ranking_page_stream(broken_page_3, crawl=crawl))
+    assert len(games) == 12
+    assert not crawl.finished
+    assert requested == [1, 2, 3, 4, 5]
@@ -0,0 +1,87 @@
+# tests/test_ranking_batch.py
+import pickle
+import pyarrow as pa
+import sqlite3
+import pytest
+from src.ranking_batch import RankingBatch
+from src.schemas import GameRankCreate
+
+
+@pytest.fixture
+def batch():
+    return RankingBatch.from_columns(ids=[224517, 342942, 13], ranks=[1, 2, 3], names=["Brass: Birmingham", "Ark Nova", "Café"])
+
+
+# ------------ Testing RankingBatch ------------
+def test_ranking_batch_iteration(batch):
+    assert len(batch) == 3
+    assert list(batch) == [(224517, 1, "Brass: Birmingham"), (342942, 2, "Ark Nova"), (13, 3, "Café")]
+    assert [(game.id, game.rank, game.name) for game in batch] == list(batch)
+
+
+def test_ranking_batch_indexing(batch):
+    assert batch[0].name == "Brass: Birmingham"
+    assert batch[-1] == (13, 3, "Café")
+    assert batch.names == ["Brass: Birmingham", "Ark Nova", "Café"]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_ranking_batch_from_games():
+    games = [GameRankCreate(id=1, rank=1, name="Chess"), GameRankCreate(id=2, rank=2, name="Go")]
+    assert list(RankingBatch.from_games(games)) == [(1, 1, "Chess"), (2, 2, "Go")]
+
+
+def test_ranking_batch_from_columns_length_mismatch():
+    with pytest.raises(ValueError):
+        RankingBatch.from_columns([1, 2], [1], ["a", "b"])
+
+
+def test_ranking_batch_extend_with_batch(batch):
+    combined = RankingBatch.from_columns([7], [4], ["Go"])
+    combined.extend(batch)
+    assert list(combined) == [(7, 4, "Go")] + list(batch)
+
+
+def test_ranking_batch_is_compact(batch):
+    # Two int64s and an int64 offset per row, plus the UTF-8 names and the leading offset.
+    assert batch.nbytes == 3 * 24 + 8 + len("Brass: BirminghamArk NovaCafé".encode("utf-8"))
+
+
+def test_ranking_batch_pickles(batch):
+    assert pickle.loads(pickle.dumps(batch)) == batch
+
+
+def test_ranking_batch_bytes_round_trip(batch):
+    data = batch.to_bytes()
+    assert len(data) == 20 + batch.nbytes
+    assert RankingBatch.from_bytes(data) == batch
+    assert len(RankingBatch.from_bytes(RankingBatch().to_bytes())) == 0
+
+
+def test_ranking_batch_from_bytes_rejects_bad_data(batch):
+    with pytest.raises(ValueError):
+        RankingBatch.from_bytes(batch.to_bytes()[:-1])
+    with pytest.raises(ValueError):
+        RankingBatch.from_bytes(b"not a batch at all, honestly")
+
+
+def test_ranking_batch_as_executemany_parameters(batch):
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE Games (id INTEGER PRIMARY KEY, rank INTEGER, name TEXT)")
+    connection.executemany("INSERT INTO Games (id, rank, name) VALUES (?, ?, ?)", batch)
+    assert connection.execute("SELECT id, rank, name FROM Games ORDER BY rank").fetchall() == list(batch)
+    assert list(batch.as_mappings())[0] == {"id": 224517, "rank": 1, "name": "Brass: Birmingham"}
+
+
+def test_ranking_batch_to_arrow(batch):
+    table = batch.to_arrow()
+    assert table.column("id").to_pylist() == [224517, 342942, 13]
+    assert table.column("name").type == pa.large_string()
+    assert table.column("name").to_pylist() == batch.names
+
+
+def test_ranking_batch_to_pandas(batch):
+    frame = batch.to_pandas()
+    assert list(frame["rank"]) == [1, 2, 3]
+    assert list(frame["name"]) == batch.names
@@ -0,0 +1,83 @@
+# tests/test_refresh_scheduler.py
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.refresh_scheduler import (
+    RefreshReason,
+    StalenessTier,
+    plan_detail_refresh,
+    schedule_detail_refresh,
+    ttl_for_rank,
+)
+from models import Base, Game, GameStatisticsRecord
+from schemas import GameRank
+
+TODAY = date(2024, 6, 1)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+# ------------ Testing ttl_for_rank ------------
+def test_ttl_for_rank_uses_first_matching_tier():
+    assert ttl_for_rank(1) == timedelta(days=1)
+    assert ttl_for_rank(100) == timedelta(days=1)
+    assert ttl_for_rank(101) == timedelta(days=7)
+    assert ttl_for_rank(50_000) == timedelta(days=90)
+    assert ttl_for_rank(None) == timedelta(days=90)
+
+
+def test_ttl_for_rank_without_catch_all_tier():
+    assert ttl_for_rank(500, [StalenessTier(max_rank=100, ttl_days=1)]) is None
+
+
+# ------------ Testing plan_detail_refresh ------------
+def test_plan_detail_refresh_reasons():
+    game_ranks = [
+        GameRank(1, 1, "Fresh"),
+        GameRank(2, 2, "Stale top game"),
+        GameRank(3, 500, "Mover"),
+        GameRank(4, 4, "New"),
+        GameRank(5, 5000, "No details"),
+        GameRank(6, 5001, "Fresh enough"),
+    ]
+    previous_ranks = {1: 1, 2: 2, 3: 900, 5: 5000, 6: 5001}
+    fetched_on = {1: TODAY, 2: TODAY - timedelta(days=1), 3: TODAY, 6: TODAY - timedelta(days=29)}
+
+    tasks = plan_detail_refresh(game_ranks, previous_ranks, fetched_on, today=TODAY)
+    assert [(task.game_id, task.reason) for task in tasks] == [
+        (4, RefreshReason.NEW),
+        (5, RefreshReason.MISSING),
+        (3, RefreshReason.RANK_MOVED),
+        (2, RefreshReason.STALE),
+    ]
+    assert tasks[2].previous_rank == 900
+
+
+def test_plan_detail_refresh_small_moves_are_ignored():
+    tasks = plan_detail_refresh([GameRank(1, 150, "Game")], {1: 100}, {1: TODAY}, today=TODAY)
+    assert tasks == []
+
+
+def test_plan_detail_refresh_orders_by_rank_within_reason_and_limits():
+    game_ranks = [GameRank(1, 30, "C"), GameRank(2, 10, "A"), GameRank(3, 20, "B")]
+    tasks = plan_detail_refresh(game_ranks, {}, {}, today=TODAY, limit=2)
+    assert [task.game_id for task in tasks] == [2, 3]
+
+
+# ------------ Testing schedule_detail_refresh ------------
+def test_schedule_detail_refresh_reads_db(db):
+    db.add_all([Game(id=1, rank=1, name="A"), Game(id=2, rank=2, name="B")])
+    db.add(GameStatisticsRecord(id=1, fetched_on=TODAY))
+    db.commit()
+
+    tasks = schedule_detail_refresh(db, [GameRank(1, 1, "A"), GameRank(2, 2, "B"), GameRank(3, 3, "C")], today=TODAY)
+    assert [(task.game_id, task.reason) for task in tasks] == [(3, RefreshReason.NEW), (2, RefreshReason.MISSING)]
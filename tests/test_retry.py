@@ -0,0 +1,129 @@
+# tests/test_retry.py
+import random
+import httpx
+import pytest
+from src.utils.retry import (
+    TRANSPORT_ERROR,
+    CircuitBreaker,
+    RetryPolicy,
+    fetch_with_retry,
+    )
+from tests.test_throttler import FakeClock
+
+URL = "https://boardgamegeek.com/browse/boardgame/page/1"
+
+
+def responses(*items):
+    """Makes a `send` that returns (or raises) each item in turn."""
+    remaining = list(items)
+
+    def send() -> httpx.Response:
+        item = remaining.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+    return send
+
+
+# ------------ Testing RetryPolicy ------------
+def test_retry_policy_full_jitter_backoff():
+    policy = RetryPolicy(backoff_s=1.0, max_backoff_s=5.0)
+    rng = random.Random(0)
+    for retry, cap in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+        delays = [policy.delay(retry, rng=rng) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= cap
+        assert max(delays) > cap * 0.8
+
+
+def test_retry_policy_honours_retry_after():
+    assert RetryPolicy().delay(1, retry_after="7") == 7.0
+    assert RetryPolicy(max_retry_after_s=10.0).delay(1, retry_after="3600") == 10.0
+    assert RetryPolicy(honour_retry_after=False, backoff_s=1.0).delay(1, retry_after="7") <= 1.0
+
+
+# ------------ Testing fetch_with_retry ------------
+def test_fetch_with_retry_recovers_from_transient_errors():
+    clock = FakeClock()
+    send = responses(httpx.ConnectError("reset"), httpx.Response(503), httpx.Response(200, text="ok"))
+    result = fetch_with_retry(send, URL, sleep=clock.sleep, rng=random.Random(0))
+    assert result.ok
+    assert result.attempts == 3
+    assert result.response.text == "ok"
+    assert len(clock.sleeps) == 2
+
+
+def test_fetch_with_retry_does_not_retry_permanent_errors():
+    clock = FakeClock()
+    result = fetch_with_retry(responses(httpx.Response(404)), URL, sleep=clock.sleep)
+    assert not result.ok
+    assert (result.status_code, result.attempts, result.error, result.retryable) == (404, 1, "HTTP 404", False)
+    assert clock.sleeps == []
+
+
+def test_fetch_with_retry_gives_up_after_max_attempts():
+    clock = FakeClock()
+    policies = {TRANSPORT_ERROR: RetryPolicy(max_attempts=3, backoff_s=0.5)}
+    send = responses(*[httpx.ReadTimeout("slow")] * 3)
+    result = fetch_with_retry(send, URL, policies=policies, sleep=clock.sleep)
+    assert result.response is None
+    assert result.attempts == 3
+    assert result.retryable
+    assert result.error == "ReadTimeout: slow"
+
+
+def test_fetch_with_retry_sleeps_for_retry_after():
+    clock = FakeClock()
+    send = responses(httpx.Response(429, headers={"Retry-After": "12"}), httpx.Response(200))
+    assert fetch_with_retry(send, URL, sleep=clock.sleep).ok
+    assert clock.sleeps == [12.0]
+
+
+# ------------ Testing CircuitBreaker ------------
+def test_circuit_breaker_opens_and_pauses_requests():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30.0, clock=clock, sleep=clock.sleep)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.before_request() == 30.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_request() == 0.0
+
+
+def test_circuit_breaker_reopens_when_trial_request_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=10.0, clock=clock, sleep=clock.sleep)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.before_request() == 10.0
+
+
+def test_circuit_breaker_pauses_the_whole_crawl():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60.0, clock=clock, sleep=clock.sleep)
+    policies = {500: RetryPolicy(max_attempts=2, backoff_s=0.0)}
+    fetch_with_retry(responses(httpx.Response(500), httpx.Response(500)), URL, policies, breaker, sleep=clock.sleep)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The next page waits for the circuit before making its request.
+    result = fetch_with_retry(responses(httpx.Response(200)), URL, policies, breaker, sleep=clock.sleep)
+    assert result.ok
+    assert 60.0 in clock.sleeps
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_ignores_permanent_errors():
+    breaker = CircuitBreaker(failure_threshold=1)
+    fetch_with_retry(responses(httpx.Response(404)), URL, circuit_breaker=breaker)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_rejects_invalid_threshold():
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_threshold=0)
@@ -1,5 +1,11 @@
 # tests/test_schemas.py
-from src.schemas import GameRankCreate, GameStatistics, GameMechanic
+from src.schemas import (
+    GameRankCreate,
+    GameStatistics,
+    GameMechanic,
+    validate_game_rank_columns,
+    validate_game_rank_rows,
+    )
 from pydantic import ValidationError
 from datetime import datetime
 import pytest
@@ -23,6 +29,56 @@ def test_invalid_GameRankCreate():
         GameRankCreate() # type: ignore Test if the schema rejects empty values.
    
 
+# ------------ Testing batch validation ------------
+def test_validate_game_rank_columns_valid_batch():
+    batch = validate_game_rank_columns(ids=[13, 822], ranks=[1, 2], names=["CATAN", "Carcassonne"])
+    assert batch.ids == [13, 822]
+    assert batch.ranks == [1, 2]
+    assert batch.names == ["CATAN", "Carcassonne"]
+    assert batch.rejections == []
+    assert [(game.id, game.rank, game.name) for game in batch] == [(13, 1, "CATAN"), (822, 2, "Carcassonne")]
+
+
+def test_validate_game_rank_columns_matches_GameRankCreate():
+    ids, ranks, names = [1, -1, 2, "3", 4], [1, 2, 0, 4, 5], ["a", "b", "c", "d", 5]
+    batch = validate_game_rank_columns(ids, ranks, names)
+
+    expected = []
+    for game_id, rank, name in zip(ids, ranks, names):
+        try:
+            game = GameRankCreate(id=game_id, rank=rank, name=name)
+        except ValidationError:
+            continue
+        expected.append((game.id, game.rank, game.name))
+    assert list(batch) == expected == [(1, 1, "a"), (3, 4, "d")]
+
+
+def test_validate_game_rank_columns_rejection_report():
+    batch = validate_game_rank_columns(ids=[1, -1, 3], ranks=[1, 0, 3], names=["a", "b", 3])
+    assert len(batch) == 1
+    assert [rejection.index for rejection in batch.rejections] == [1, 2]
+    assert batch.rejections[0].row == {"id": -1, "rank": 0, "name": "b"}
+    assert len(batch.rejections[0].errors) == 2
+    assert batch.rejections[1].errors[0].startswith("name:")
+
+
+def test_validate_game_rank_columns_length_mismatch():
+    with pytest.raises(ValueError):
+        validate_game_rank_columns(ids=[1, 2], ranks=[1], names=["a", "b"])
+
+
+def test_validate_game_rank_rows():
+    batch = validate_game_rank_rows([
+        {"id": 1, "rank": 1, "name": "a"},
+        {"id": 2, "name": "b"},
+        {"id": 3, "rank": -3, "name": "c"},
+        {"id": 4, "rank": 4, "name": "d", "extra": True},
+    ])
+    assert list(batch) == [(1, 1, "a"), (4, 4, "d")]
+    assert [rejection.index for rejection in batch.rejections] == [1, 2]
+    assert batch.rejections[0].errors == ["rank: Field required"]
+
+
 # ------------ Testing GameMechanic ------------
 def test_valid_GameMechanic():
     game_mechanic = GameMechanic(id=1, mechanic_name="Grid Movement")
@@ -0,0 +1,74 @@
+# tests/test_streaming.py
+import threading
+import time
+import pytest
+from src.utils.streaming import prefetch, batched
+
+
+# ------------ Testing prefetch ------------
+def test_prefetch_output():
+    assert list(prefetch(range(10), max_buffered=3)) == list(range(10))
+
+
+def test_prefetch_applies_backpressure():
+    produced = []
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    stream = prefetch(produce(), max_buffered=2)
+    assert next(stream) == 0
+    time.sleep(0.2)
+    # One item consumed, two buffered and at most one more waiting to be put.
+    assert len(produced) <= 4
+    stream.close()
+
+
+def test_prefetch_overlaps_producer_and_consumer():
+    def produce():
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    start = time.monotonic()
+    for _ in prefetch(produce(), max_buffered=5):
+        time.sleep(0.05)
+    # Run back to back this would take 0.5 s.
+    assert time.monotonic() - start < 0.45
+
+
+def test_prefetch_reraises_producer_errors():
+    def produce():
+        yield 1
+        raise RuntimeError("producer failed")
+
+    stream = prefetch(produce(), max_buffered=2)
+    assert next(stream) == 1
+    with pytest.raises(RuntimeError, match="producer failed"):
+        next(stream)
+
+
+def test_prefetch_stops_producer_when_closed():
+    before = threading.active_count()
+    stream = prefetch(iter(range(1_000_000)), max_buffered=1)
+    next(stream)
+    stream.close()
+    assert threading.active_count() == before
+
+
+def test_prefetch_rejects_empty_buffer():
+    with pytest.raises(ValueError):
+        list(prefetch(range(3), max_buffered=0))
+
+
+# ------------ Testing batched ------------
+def test_batched_output():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+
+
+def test_batched_rejects_invalid_batch_size():
+    with pytest.raises(ValueError):
+        list(batched(range(3), 0))
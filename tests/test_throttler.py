@@ -0,0 +1,151 @@
+# tests/test_throttler.py
+import asyncio
+import time
+import threading
+import pytest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from src.utils.throttler import RateLimiter, TokenBucket, AdaptiveTokenBucket, parse_retry_after
+
+
+class FakeClock:
+    """A clock that only moves when something sleeps on it."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+# ------------ Testing RateLimiter ------------
+def test_rate_limiter_first_call_does_not_wait():
+    limiter = RateLimiter(delay_s=10.0)
+    start = time.monotonic()
+    limiter.wait()
+    assert time.monotonic() - start < 1.0
+
+
+def test_rate_limiter_enforces_delay():
+    limiter = RateLimiter(delay_s=0.05)
+    start = time.monotonic()
+    limiter.wait()
+    limiter.wait()
+    limiter.wait()
+    assert time.monotonic() - start >= 0.1
+
+
+# ------------ Testing TokenBucket ------------
+def test_token_bucket_allows_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.5)
+    assert waits[4] == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10.0
+    # Refill is capped at capacity, so only two free tokens come back.
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_token_bucket_jitter_is_random_and_bounded():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=1.0, jitter_s=0.5, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    waits = [bucket.acquire() for _ in range(20)]
+    # Extra time slept as jitter earns back up to half a token for the next caller.
+    assert all(0.5 <= w <= 1.5 for w in waits)
+    assert len(set(waits)) > 1
+
+
+def test_token_bucket_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_s=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_s=1, capacity=0.5)
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_s=1).acquire(tokens=2)
+
+
+def test_token_bucket_is_thread_safe():
+    bucket = TokenBucket(rate_per_s=100.0)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One free token, then ten more at 100/s.
+    assert time.monotonic() - start >= 0.09
+
+
+def test_token_bucket_acquire_async():
+    bucket = TokenBucket(rate_per_s=50.0)
+
+    async def run() -> float:
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.09
+
+
+# ------------ Testing AdaptiveTokenBucket ------------
+def test_adaptive_token_bucket_backs_off_and_recovers():
+    clock = FakeClock()
+    bucket = AdaptiveTokenBucket(
+        rate_per_s=4.0, max_rate_per_s=4.0, increase_per_s=1.0, clock=clock, sleep=clock.sleep
+        )
+    bucket.on_response(429)
+    assert bucket.rate_per_s == 2.0
+    bucket.on_response(503)
+    assert bucket.rate_per_s == 1.0
+    bucket.on_response(200)
+    assert bucket.rate_per_s == 2.0
+    for _ in range(10):
+        bucket.on_response(200)
+    assert bucket.rate_per_s == 4.0
+
+
+def test_adaptive_token_bucket_respects_min_rate():
+    bucket = AdaptiveTokenBucket(rate_per_s=1.0, min_rate_per_s=0.4)
+    for _ in range(5):
+        bucket.on_response(429)
+    assert bucket.rate_per_s == 0.4
+
+
+def test_adaptive_token_bucket_ignores_client_errors():
+    bucket = AdaptiveTokenBucket(rate_per_s=1.0, max_rate_per_s=2.0)
+    bucket.on_response(404)
+    assert bucket.rate_per_s == 1.0
+
+
+def test_adaptive_token_bucket_honours_retry_after():
+    clock = FakeClock()
+    bucket = AdaptiveTokenBucket(rate_per_s=10.0, capacity=5, clock=clock, sleep=clock.sleep)
+    bucket.on_response(429, retry_after="30")
+    assert bucket.acquire() == pytest.approx(30.0 + 1 / 5.0)
+
+
+# ------------ Testing parse_retry_after ------------
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 60
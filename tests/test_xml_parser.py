@@ -0,0 +1,92 @@
+# tests/test_xml_parser.py
+import io
+import pytest
+from src.parsers.xml_parsers import iter_thing_items
+from schemas import GameMechanic
+
+THING_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<items termsofuse="https://boardgamegeek.com/xmlapi/termsofuse">
+    <item type="boardgame" id="224517">
+        <name type="primary" sortindex="1" value="Brass: Birmingham" />
+        <description>Brass: Birmingham is an economic strategy game.&#10;&#10;Build networks.</description>
+        <yearpublished value="2018" />
+        <minplayers value="2" />
+        <maxplayers value="4" />
+        <poll name="suggested_numplayers" title="User Suggested Number of Players" totalvotes="900">
+            <results numplayers="2">
+                <result value="Best" numvotes="100" />
+                <result value="Recommended" numvotes="400" />
+            </results>
+            <results numplayers="3">
+                <result value="Best" numvotes="500" />
+            </results>
+            <results numplayers="4+">
+                <result value="Best" numvotes="900" />
+            </results>
+        </poll>
+        <minage value="14" />
+        <link type="boardgamecategory" id="1021" value="Economic" />
+        <link type="boardgamemechanic" id="2040" value="Hand Management" />
+        <link type="boardgamemechanic" id="2081" value="Network and Route Building" />
+        <statistics page="1">
+            <ratings>
+                <average value="8.58" />
+                <averageweight value="3.87" />
+            </ratings>
+        </statistics>
+    </item>
+    <item type="boardgame" id="5">
+        <description>An ancient game.</description>
+        <yearpublished value="-3000" />
+        <minplayers value="2" />
+        <maxplayers value="2" />
+        <minage value="8" />
+        <link type="boardgamemechanic" id="2072" value="Dice Rolling" />
+        <statistics page="1"><ratings><average value="6.5" /><averageweight value="1.2" /></ratings></statistics>
+    </item>
+</items>
+"""
+
+
+# ------------ Testing iter_thing_items ------------
+def test_iter_thing_items_parses_statistics():
+    details = list(iter_thing_items(THING_XML))
+    statistics = details[0].statistics
+    assert details[0].ok
+    assert statistics.id == 224517
+    assert statistics.description == "Brass: Birmingham is an economic strategy game.\n\nBuild networks."
+    assert statistics.year_published == 2018
+    assert (statistics.min_players, statistics.max_players) == (2, 4)
+    assert statistics.min_age == 14
+    assert statistics.average_rating == 8.58
+    assert statistics.average_weight == 3.87
+
+
+def test_iter_thing_items_suggested_players_ignores_open_ended_counts():
+    details = list(iter_thing_items(THING_XML))
+    assert details[0].statistics.suggested_num_player == 3
+
+
+def test_iter_thing_items_parses_mechanics():
+    details = list(iter_thing_items(THING_XML))
+    assert details[0].mechanics == [
+        GameMechanic(id=224517, mechanic_name="Hand Management"),
+        GameMechanic(id=224517, mechanic_name="Network and Route Building"),
+    ]
+
+
+def test_iter_thing_items_keeps_mechanics_of_rejected_statistics():
+    details = list(iter_thing_items(THING_XML))
+    assert not details[1].ok
+    assert details[1].statistics is None
+    assert "year_published" in details[1].error
+    assert details[1].mechanics == [GameMechanic(id=5, mechanic_name="Dice Rolling")]
+
+
+def test_iter_thing_items_reads_file_objects():
+    assert [details.game_id for details in iter_thing_items(io.BytesIO(THING_XML))] == [224517, 5]
+
+
+def test_iter_thing_items_malformed_xml():
+    with pytest.raises(ValueError):
+        list(iter_thing_items(b"<items><item id='1'>"))
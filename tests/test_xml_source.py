@@ -0,0 +1,78 @@
+# tests/test_xml_source.py
+import logging
+import httpx
+import pytest
+from src.sources.xml_api import MISSING_ITEM_ERROR, XMLAPIThings
+from tests.test_html_source import MockBGG
+from tests.test_xml_parser import THING_XML
+
+
+def mocked_xml_api(*responses: httpx.Response, **kwargs) -> tuple[XMLAPIThings, MockBGG]:
+    mock_bgg = MockBGG(*responses)
+    return XMLAPIThings(delay_s=0.0, transport=httpx.MockTransport(mock_bgg), **kwargs), mock_bgg
+
+
+# ------------ Testing XMLAPIThings ------------
+def test_iter_game_details_batches_ids():
+    xml_api, mock_bgg = mocked_xml_api(httpx.Response(200, content=b"<items />"), batch_size=2)
+
+    list(xml_api.iter_game_details([1, 2, 3, 4, 5]))
+    assert [request.url.params["id"] for request in mock_bgg.requests] == ["1,2", "3,4", "5"]
+    assert all(request.url.params["stats"] == "1" for request in mock_bgg.requests)
+    assert mock_bgg.requests[0].url.path == "/xmlapi2/thing"
+
+
+def test_iter_game_details_parses_response():
+    xml_api, _ = mocked_xml_api(httpx.Response(200, content=THING_XML))
+
+    details = list(xml_api.iter_game_details([224517, 5]))
+    assert [game.game_id for game in details] == [224517, 5]
+    assert details[0].statistics.average_rating == 8.58
+
+
+def test_iter_game_details_logs_missing_games(caplog):
+    caplog.set_level(logging.WARNING)
+    xml_api, _ = mocked_xml_api(httpx.Response(200, content=THING_XML))
+
+    details = list(xml_api.iter_game_details([224517, 5, 99]))
+    assert "returned no details for games: [99]" in caplog.text
+    assert [game.game_id for game in details] == [224517, 5, 99]
+    assert details[-1].error == MISSING_ITEM_ERROR
+
+
+def test_iter_game_details_skips_failed_batches(caplog):
+    caplog.set_level(logging.ERROR)
+    xml_api, _ = mocked_xml_api(
+        httpx.Response(404),
+        httpx.Response(200, content=THING_XML),
+        batch_size=2,
+    )
+
+    details = list(xml_api.iter_game_details([1, 2, 224517, 5]))
+    assert [game.game_id for game in details] == [224517, 5]
+    assert "The following URL failed to return status code 200:" in caplog.text
+
+
+def test_iter_game_details_retries_throttling():
+    sleeps = []
+    xml_api, mock_bgg = mocked_xml_api(
+        httpx.Response(429, headers={"Retry-After": "1"}),
+        httpx.Response(200, content=THING_XML),
+        sleep=sleeps.append,
+    )
+
+    assert len(list(xml_api.iter_game_details([224517, 5]))) == 2
+    assert mock_bgg.call_count == 2
+    assert sleeps == [1.0]
+
+
+def test_api_token_is_sent_as_bearer():
+    xml_api, mock_bgg = mocked_xml_api(httpx.Response(200, content=b"<items />"), api_token="secret")
+
+    list(xml_api.iter_game_details([1]))
+    assert mock_bgg.requests[0].headers["Authorization"] == "Bearer secret"
+
+
+def test_batch_size_is_capped():
+    with pytest.raises(ValueError):
+        XMLAPIThings(batch_size=21)